@@ -1041,8 +1041,11 @@ def verificar_evaluacion_economica():
         propuestas = data.get('propuestas', [])
         puntaje_maximo = float(data.get('puntaje_economico_maximo', 100))
         
+        if not propuestas:
+            return jsonify({'error': 'No hay propuestas para evaluar'}), 400
+        
         resultado = evaluador.verificar_evaluacion_economica(propuestas, puntaje_maximo)
-        return jsonify(resultado)
+        return jsonify(resultado.to_dict())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1080,6 +1083,8 @@ def generar_informe_evaluacion():
     """Genera informe completo de verificación"""
     try:
         data = request.get_json()
+        if not data.get('propuestas'):
+            return jsonify({'error': 'No hay propuestas para evaluar'}), 400
         
         # Verificar evaluación técnica
         resultado_tecnica = evaluador.verificar_evaluacion_tecnica(
@@ -1417,7 +1422,7 @@ def verificar_evaluacion_pdf():
                 # Usar el evaluador para verificar
                 verificacion = evaluador.verificar_evaluacion_economica(propuestas)
                 
-                resultado_extraccion['verificacion'] = verificacion
+                resultado_extraccion['verificacion'] = verificacion.to_dict()
             
             return jsonify(resultado_extraccion)
         finally:
@@ -18,6 +18,9 @@ class Config:
     GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash-exp')
     USE_GEMINI = os.getenv('USE_GEMINI', 'false').lower() == 'true'
     
+    # Motor de expresiones regulares RE2 (google-re2) para el procesador de PDFs
+    USE_RE2 = os.getenv('USE_RE2', 'false').lower() == 'true'
+    
     # Servidor
     DEBUG = os.getenv('DEBUG', 'true').lower() == 'true'
     PORT = int(os.getenv('PORT', 5000))
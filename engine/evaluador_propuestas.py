@@ -8,9 +8,289 @@ Este módulo permite:
 3. Detectar errores aritméticos en los cálculos
 4. Generar informe de inconsistencias
 """
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Final, List, NamedTuple, Optional, Tuple, Union
 from datetime import datetime
+import json
+from functools import lru_cache
+from types import MappingProxyType
 import re
+import sys
+
+from engine.gemini_cache import get_gemini_cache
+
+
+# Valor por defecto compartido (solo lectura) para búsquedas en dicts de propuestas
+_VACIO = MappingProxyType({})
+
+# Precio ofertado en textos de propuestas (S/ 12,345.67)
+_PATRON_PRECIO = re.compile(r's/?\.?\s*([\d,]+(?:\.\d{2})?)', re.IGNORECASE)
+
+# Número decimal ya sin separadores de miles (validación previa a float())
+_PATRON_NUMERO = re.compile(r'[-+]?(?:\d+(?:\.\d*)?|\.\d+)')
+
+# Indicadores de requisitos en el análisis básico (una sola pasada por el texto)
+_PATRON_INDICADORES = re.compile(
+    r'(rnp|registro nacional de proveedores|declaración jurada|declaro bajo juramento)',
+    re.IGNORECASE
+)
+
+# Palabras clave de consultas sobre evaluación (con y sin tilde)
+_PATRON_CONSULTA_EVALUACION = re.compile(
+    r'evaluaci[oó]n|evaluar|puntaje|calificaron|calificaci[oó]n|error aritm[eé]tico'
+    r'|propuesta t[eé]cnica|propuesta econ[oó]mica',
+    re.IGNORECASE
+)
+
+
+def _fecha_informe(momento: Optional[datetime] = None) -> str:
+    """Fecha 'dd/mm/aaaa HH:MM' de los informes (sin pasar por strftime)"""
+    m = momento or datetime.now()
+    return f"{m.day:02d}/{m.month:02d}/{m.year} {m.hour:02d}:{m.minute:02d}"
+
+
+def _puntuar_precio(
+    precio: float,
+    valor_referencial: float,
+    limite_temeraria: float,
+    precio_menor: Optional[float] = None
+) -> Tuple[float, bool, bool]:
+    """
+    Núcleo numérico de la Etapa 4 para una propuesta (sin dicts).
+    
+    Returns:
+        (puntaje_economico, es_temeraria, excede_vr)
+    """
+    if precio <= 0 or valor_referencial <= 0:
+        return 0, False, False
+    
+    # PE = Pm/Pi x 100 (sin Pm, este postor es el de menor precio)
+    puntaje = round((precio_menor / precio) * 100, 2) if precio_menor else 100
+    return puntaje, precio < limite_temeraria, precio > valor_referencial
+
+
+def _esquema_requisitos(requisitos_bases: List[Dict]) -> List[Tuple[str, bool, str, str]]:
+    """Campos fijos de cada requisito de las bases: (nombre, obligatorio, descripcion, base_legal)"""
+    return [
+        (
+            req.get("nombre", req.get("requisito", "")),
+            req.get("obligatorio", True),
+            req.get("descripcion", ""),
+            req.get("base_legal", "Art. 52 del Reglamento")
+        )
+        for req in requisitos_bases
+    ]
+
+
+def _esquema_rtm(rtm_bases: List[Dict]) -> List[Tuple[str, str, object, Optional[float]]]:
+    """
+    Campos fijos de cada RTM de las bases: (nombre, descripcion, valor_minimo, minimo_numerico).
+    minimo_numerico es None si el RTM no se verifica numéricamente.
+    """
+    esquema = []
+    for rtm in rtm_bases:
+        valor_minimo = rtm.get("valor_minimo", rtm.get("exigido", ""))
+        min_val = None
+        if rtm.get("tipo_verificacion", "cumple_no_cumple") == "numerico" and valor_minimo:
+            min_val = _a_numero(valor_minimo)
+        esquema.append((
+            rtm.get("nombre", rtm.get("rtm", "")),
+            rtm.get("descripcion", ""),
+            valor_minimo,
+            min_val
+        ))
+    return esquema
+
+
+@lru_cache(maxsize=256)
+def _pretty(clave: str) -> str:
+    """'rnp_vigente' -> 'Rnp Vigente' (los nombres se repiten entre postores)"""
+    return clave.replace('_', ' ').title()
+
+
+def _a_numero(valor) -> Optional[float]:
+    """Convierte '1,500.50' (o un número) a float; None si no es numérico"""
+    texto = str(valor).replace(",", "").strip()
+    if _PATRON_NUMERO.fullmatch(texto):
+        return float(texto)
+    return None
+
+
+class ResultadoEvaluacionEconomica(NamedTuple):
+    """
+    Resultado de verificar_evaluacion_economica.
+    
+    Conserva get() y to_dict() para los consumidores del formato dict anterior.
+    """
+    precio_menor: float
+    promedio_precios: float
+    limite_inferior_90: float
+    resultados_por_postor: List[Dict]
+    inconsistencias: List[Dict]
+    ofertas_posiblemente_temerarias: List[Dict]
+    evaluacion_correcta: bool
+    base_legal: str = "Art. 78 del D.S. N° 009-2025-EF"
+    
+    def get(self, clave: str, default=None):
+        """Acceso compatible con el formato dict anterior (solo a los campos)"""
+        if clave in self._fields:
+            return getattr(self, clave)
+        return default
+    
+    def to_dict(self) -> Dict:
+        """Serializa al formato dict (para respuestas JSON)"""
+        return self._asdict()
+
+
+def _calcular_columnas_economicas(
+    precios: List[float],
+    precio_menor: float,
+    promedio: float,
+    limite_temeraria: float,
+    valor_referencial: float,
+    puntaje_maximo: float
+) -> Tuple[List[float], List[bool], List[bool], List[Optional[float]], List[Optional[float]]]:
+    """
+    Núcleo numérico de la Etapa 4: un único recorrido por los precios.
+    
+    Returns:
+        (puntajes, es_temeraria, supera_vr, porcentaje_bajo_promedio, porcentaje_exceso)
+        Los porcentajes son None cuando la condición correspondiente no aplica.
+    """
+    puntajes = []
+    temerarias = []
+    sobre_vr = []
+    pct_bajo = []
+    pct_exceso = []
+    vr_activo = valor_referencial > 0
+    
+    for precio in precios:
+        puntajes.append(round((precio_menor / precio) * puntaje_maximo, 2) if precio > 0 else 0)
+        
+        es_temeraria = precio < limite_temeraria
+        temerarias.append(es_temeraria)
+        pct_bajo.append(round((1 - precio/promedio) * 100, 1) if es_temeraria else None)
+        
+        supera = vr_activo and precio > valor_referencial
+        sobre_vr.append(supera)
+        pct_exceso.append(round((precio/valor_referencial - 1) * 100, 1) if supera else None)
+    
+    return puntajes, temerarias, sobre_vr, pct_bajo, pct_exceso
+
+
+# =========================================================================
+# PROMPT DE EVALUACIÓN AUTOMÁTICA (GEMINI)
+# =========================================================================
+
+_PROMPT_PROPUESTA_INICIO = """Eres un experto en contrataciones públicas del Perú (Ley 32069 y Reglamento D.S. 009-2025-EF).
+Analiza la siguiente propuesta de un postor y extrae la información relevante para evaluar si cumple con los requisitos.
+
+TEXTO DE LA PROPUESTA:
+"""
+
+_PROMPT_PROPUESTA_ESQUEMA = """Responde en formato JSON con la siguiente estructura EXACTA (sin texto adicional, solo el JSON):
+{
+    "postor_identificado": "nombre del postor encontrado en el documento",
+    "precio_ofertado": 0.0,
+    "etapa1_requisitos_minimos": {
+        "rnp_vigente": {"presentado": true/false, "documento": "descripción", "observacion": ""},
+        "capacidad_legal": {"presentado": true/false, "documento": "descripción", "observacion": ""},
+        "declaracion_jurada": {"presentado": true/false, "documento": "descripción", "observacion": ""},
+        "habilitacion": {"presentado": true/false, "documento": "descripción", "observacion": ""}
+    },
+    "etapa2_rtm": {
+        "especificaciones_tecnicas": {"cumple": true/false, "descripcion": "", "evidencia": ""},
+        "equipamiento_minimo": {"cumple": true/false, "descripcion": "", "evidencia": ""},
+        "personal_clave": {"cumple": true/false, "descripcion": "", "evidencia": ""},
+        "experiencia_minima": {"cumple": true/false, "descripcion": "", "evidencia": ""},
+        "plazo_ofertado": {"cumple": true/false, "valor": "", "evidencia": ""}
+    },
+    "etapa3_factores_tecnicos": {
+        "experiencia_postor": {"puntaje_estimado": 0, "max": 50, "evidencia": ""},
+        "experiencia_personal": {"puntaje_estimado": 0, "max": 30, "evidencia": ""},
+        "plan_trabajo": {"puntaje_estimado": 0, "max": 20, "evidencia": ""}
+    },
+    "etapa4_economica": {
+        "precio_ofertado": 0.0,
+        "moneda": "PEN",
+        "incluye_igv": true/false,
+        "plazo_ejecucion": ""
+    },
+    "vicios_detectados": [
+        {"tipo": "", "descripcion": "", "gravedad": "ALTA/MEDIA/BAJA", "base_legal": ""}
+    ],
+    "observaciones_generales": ""
+}"""
+
+
+# Secciones contenedoras de la respuesta de Gemini y su tipo esperado
+_ESQUEMA_DATOS_EXTRAIDOS = {
+    "etapa1_requisitos_minimos": dict,
+    "etapa2_rtm": dict,
+    "etapa3_factores_tecnicos": dict,
+    "etapa4_economica": dict,
+    "vicios_detectados": list,
+}
+
+
+def _parsear_respuesta_propuesta(respuesta_texto: str) -> Dict:
+    """Quita las cercas de markdown, parsea el JSON y lo valida (lanza si no es válido)"""
+    respuesta_texto = (
+        respuesta_texto.strip()
+        .removeprefix("```json")
+        .removeprefix("```")
+        .removesuffix("```")
+        .strip()
+    )
+    return _validar_datos_extraidos(json.loads(respuesta_texto))
+
+
+def _validar_datos_extraidos(datos) -> Dict:
+    """
+    Valida la respuesta JSON de Gemini en una sola pasada: garantiza que cada
+    sección exista con el tipo esperado y que el precio ofertado sea numérico,
+    para que la evaluación por etapas pueda indexar sin .get() defensivos.
+    """
+    if not isinstance(datos, dict):
+        raise ValueError("La respuesta de Gemini no es un objeto JSON")
+    
+    for clave, tipo in _ESQUEMA_DATOS_EXTRAIDOS.items():
+        if not isinstance(datos.get(clave), tipo):
+            datos[clave] = tipo()
+    
+    eco = datos["etapa4_economica"]
+    precio = eco.get("precio_ofertado", 0)
+    if not isinstance(precio, (int, float)) or isinstance(precio, bool):
+        # Copia de la sección: no se altera el dict que entregó el llamador
+        datos["etapa4_economica"] = {**eco, "precio_ofertado": _a_numero(precio) or 0.0}
+    
+    return datos
+
+
+def _llega_a_etapa_economica(datos: Dict) -> bool:
+    """
+    Indica si una propuesta (ya validada) supera las etapas 1 a 3 y llega a la
+    evaluación económica, con los mismos criterios que la evaluación por etapas.
+    """
+    requisitos_ok = all(
+        info.get("presentado", False)
+        for req, info in datos["etapa1_requisitos_minimos"].items()
+        if req != "habilitacion"
+    )
+    return requisitos_ok and all(
+        info.get("cumple", False) for info in datos["etapa2_rtm"].values()
+    )
+
+
+def _construir_prompt_propuesta(texto_propuesta: str, texto_bases: str, valor_referencial: float) -> str:
+    """Arma el prompt de evaluación recortando los textos de la propuesta y de las bases"""
+    return "".join([
+        _PROMPT_PROPUESTA_INICIO,
+        texto_propuesta[:15000],
+        "\n\n",
+        ("TEXTO DE LAS BASES:\n" + texto_bases[:8000]) if texto_bases else "",
+        f"\n\nVALOR REFERENCIAL: S/ {valor_referencial:,.2f} (si es 0, intenta encontrarlo en el texto)\n\n",
+        _PROMPT_PROPUESTA_ESQUEMA,
+    ])
 
 
 class EvaluadorPropuestas:
@@ -37,6 +317,7 @@ class EvaluadorPropuestas:
     
     # Límites de evaluación
     LIMITE_INFERIOR_PRECIO = 0.90  # 90% del promedio (ofertas temerarias)
+    LIMITE_INFERIOR_VR = 0.90      # 90% del VR (evaluación automática desde PDF)
     
     # =========================================================================
     # TIPOS DE FACTORES DE EVALUACIÓN TÉCNICA
@@ -148,8 +429,22 @@ class EvaluadorPropuestas:
         }
     }
     
+    # Modelo de Gemini para la evaluación automática desde PDF
+    MODELO_GEMINI = 'gemini-2.0-flash'
+    
     def __init__(self):
-        pass
+        # El modelo de Gemini se configura una sola vez, en el primer uso
+        self._gemini_model = None
+    
+    def _get_gemini_model(self):
+        """Obtiene (y crea la primera vez) el modelo de Gemini reutilizable"""
+        if self._gemini_model is None:
+            import google.generativeai as genai
+            from config import Config
+            
+            genai.configure(api_key=Config.GEMINI_API_KEY)
+            self._gemini_model = genai.GenerativeModel(self.MODELO_GEMINI)
+        return self._gemini_model
     
     # =========================================================================
     # VERIFICACIÓN DE EVALUACIÓN TÉCNICA
@@ -283,7 +578,7 @@ class EvaluadorPropuestas:
         self,
         propuestas: List[Dict],
         puntaje_economico_maximo: float = 100
-    ) -> Dict:
+    ) -> ResultadoEvaluacionEconomica:
         """
         Verifica la evaluación económica de todas las propuestas
         
@@ -293,10 +588,13 @@ class EvaluadorPropuestas:
             puntaje_economico_maximo: Puntaje máximo según bases
             
         Returns:
-            Dict con análisis completo
+            ResultadoEvaluacionEconomica (usar .to_dict() para JSON)
+            
+        Raises:
+            ValueError: si no hay propuestas
         """
         if not propuestas:
-            return {"error": "No hay propuestas para evaluar"}
+            raise ValueError("No hay propuestas para evaluar")
         
         # Determinar precio menor
         precio_menor = min(p["precio"] for p in propuestas)
@@ -318,15 +616,14 @@ class EvaluadorPropuestas:
             diferencia = abs(puntaje_correcto - puntaje_otorgado)
             es_correcto = diferencia < 0.1  # tolerancia de 0.1 puntos
             
-            resultado_postor = {
+            resultados.append({
                 "postor": postor,
                 "precio": precio,
                 "puntaje_otorgado": puntaje_otorgado,
                 "puntaje_correcto": puntaje_correcto,
                 "diferencia": round(diferencia, 2),
                 "es_correcto": es_correcto
-            }
-            resultados.append(resultado_postor)
+            })
             
             if not es_correcto:
                 inconsistencias.append({
@@ -343,21 +640,15 @@ class EvaluadorPropuestas:
         promedio_precios = sum(p["precio"] for p in propuestas) / len(propuestas)
         limite_inferior = promedio_precios * self.LIMITE_INFERIOR_PRECIO
         
-        ofertas_temerarias = [
-            p for p in propuestas 
-            if p["precio"] < limite_inferior
-        ]
-        
-        return {
-            "precio_menor": precio_menor,
-            "promedio_precios": round(promedio_precios, 2),
-            "limite_inferior_90": round(limite_inferior, 2),
-            "resultados_por_postor": resultados,
-            "inconsistencias": inconsistencias,
-            "ofertas_posiblemente_temerarias": ofertas_temerarias,
-            "evaluacion_correcta": len(inconsistencias) == 0,
-            "base_legal": "Art. 78 del D.S. N° 009-2025-EF"
-        }
+        return ResultadoEvaluacionEconomica(
+            precio_menor=precio_menor,
+            promedio_precios=round(promedio_precios, 2),
+            limite_inferior_90=round(limite_inferior, 2),
+            resultados_por_postor=resultados,
+            inconsistencias=inconsistencias,
+            ofertas_posiblemente_temerarias=[p for p in propuestas if p["precio"] < limite_inferior],
+            evaluacion_correcta=len(inconsistencias) == 0
+        )
     
     # =========================================================================
     # VERIFICACIÓN DE ORDEN DE PRELACIÓN
@@ -437,7 +728,7 @@ Puntaje máximo posible: {puntaje_max_tecnico}
 Puntaje otorgado: {puntaje_tecnico}
 
 """.format(
-            fecha=datetime.now().strftime("%d/%m/%Y %H:%M"),
+            fecha=_fecha_informe(),
             estado_tecnica="✅ CORRECTA" if resultado_tecnica.get("evaluacion_correcta") else "❌ CON ERRORES",
             puntaje_max_tecnico=resultado_tecnica.get("puntaje_total_maximo", "N/A"),
             puntaje_tecnico=resultado_tecnica.get("puntaje_total_otorgado", "N/A")
@@ -557,8 +848,19 @@ un especialista en contrataciones públicas.
     # FORMATEO PARA CHAT
     # =========================================================================
     
-    def formatear_resultado_verificacion(self, resultado: Dict, tipo: str) -> str:
-        """Formatea resultado de verificación para chat"""
+    def formatear_resultado_verificacion(
+        self,
+        resultado: Union[Dict, ResultadoEvaluacionEconomica],
+        tipo: str
+    ) -> str:
+        """
+        Formatea resultado de verificación para chat
+        
+        Args:
+            resultado: Dict de verificar_evaluacion_tecnica, o para "economica" el
+                ResultadoEvaluacionEconomica (o su .to_dict(), que se reconstruye)
+            tipo: "tecnica" o "economica"
+        """
         
         if tipo == "tecnica":
             estado = "✅ CORRECTA" if resultado.get("evaluacion_correcta") else "❌ CON ERRORES"
@@ -578,18 +880,21 @@ un especialista en contrataciones públicas.
             return respuesta
         
         elif tipo == "economica":
-            estado = "✅ CORRECTA" if resultado.get("evaluacion_correcta") else "❌ CON ERRORES"
+            if isinstance(resultado, dict):
+                resultado = ResultadoEvaluacionEconomica(**resultado)
+            
+            estado = "✅ CORRECTA" if resultado.evaluacion_correcta else "❌ CON ERRORES"
             
             respuesta = f"""💰 **VERIFICACIÓN DE EVALUACIÓN ECONÓMICA**
 
 **Estado:** {estado}
-**Precio menor:** S/ {resultado.get('precio_menor', 0):,.2f}
-**Promedio:** S/ {resultado.get('promedio_precios', 0):,.2f}
+**Precio menor:** S/ {resultado.precio_menor:,.2f}
+**Promedio:** S/ {resultado.promedio_precios:,.2f}
 
 """
-            if resultado.get("inconsistencias"):
+            if resultado.inconsistencias:
                 respuesta += "⚠️ **Errores detectados:**\n"
-                for inc in resultado["inconsistencias"]:
+                for inc in resultado.inconsistencias:
                     respuesta += f"• {inc['descripcion']}\n"
             
             return respuesta
@@ -652,7 +957,8 @@ un especialista en contrataciones públicas.
     def evaluar_requisitos_minimos(
         self,
         requisitos_bases: List[Dict],
-        documentos_postor: Dict
+        documentos_postor: Dict,
+        esquema: Optional[List[Tuple]] = None
     ) -> Dict:
         """
         ETAPA 1: Evalúa requisitos mínimos de calificación.
@@ -663,6 +969,7 @@ un especialista en contrataciones públicas.
                 [{nombre, descripcion, obligatorio, base_legal}]
             documentos_postor: Documentos presentados
                 {requisito: {presentado: bool, documento: str, observaciones: str}}
+            esquema: _esquema_requisitos(requisitos_bases) ya calculado (evaluación en lote)
         
         Returns:
             {
@@ -677,26 +984,32 @@ un especialista en contrataciones públicas.
         detalle = []
         incumplimientos = []
         cumple_todos = True
+        cumplidos = 0
         
-        for req in requisitos_bases:
-            nombre = req.get("nombre", req.get("requisito", ""))
-            obligatorio = req.get("obligatorio", True)
-            descripcion = req.get("descripcion", "")
-            base_legal = req.get("base_legal", "Art. 52 del Reglamento")
-            
+        # Métodos ligados fuera del bucle (evita la búsqueda de atributo por fila)
+        doc_de = documentos_postor.get
+        agregar_detalle = detalle.append
+        agregar_incumplimiento = incumplimientos.append
+        
+        if esquema is None:
+            esquema = _esquema_requisitos(requisitos_bases)
+        
+        for nombre, obligatorio, descripcion, base_legal in esquema:
             # Verificar si el postor presentó este requisito
-            doc_postor = documentos_postor.get(nombre, {})
+            doc_postor = doc_de(nombre, _VACIO)
             presentado = doc_postor.get("presentado", False)
             documento = doc_postor.get("documento", "")
             obs_postor = doc_postor.get("observaciones", "")
             
             cumple_req = presentado
             observacion = ""
+            if cumple_req:
+                cumplidos += 1
             
             if not cumple_req and obligatorio:
                 cumple_todos = False
                 observacion = f"INCUMPLE: No presentó {descripcion}"
-                incumplimientos.append({
+                agregar_incumplimiento({
                     "requisito": nombre,
                     "descripcion": descripcion,
                     "tipo": "requisito_obligatorio_no_presentado",
@@ -708,7 +1021,7 @@ un especialista en contrataciones públicas.
             else:
                 observacion = f"Cumple: {documento}" if documento else "Presentado correctamente"
             
-            detalle.append({
+            agregar_detalle({
                 "requisito": nombre,
                 "descripcion": descripcion,
                 "obligatorio": obligatorio,
@@ -725,7 +1038,7 @@ un especialista en contrataciones públicas.
             "detalle": detalle,
             "incumplimientos": incumplimientos,
             "total_requisitos": len(requisitos_bases),
-            "requisitos_cumplidos": len([d for d in detalle if d["cumple"]]),
+            "requisitos_cumplidos": cumplidos,
             "base_legal": "Arts. 52-53 del Reglamento D.S. N° 009-2025-EF",
             "puede_continuar": cumple_todos
         }
@@ -733,7 +1046,8 @@ un especialista en contrataciones públicas.
     def evaluar_rtm(
         self,
         rtm_bases: List[Dict],
-        propuesta_tecnica: Dict
+        propuesta_tecnica: Dict,
+        esquema: Optional[List[Tuple]] = None
     ) -> Dict:
         """
         ETAPA 2: Evalúa Requerimientos Técnicos Mínimos.
@@ -744,6 +1058,7 @@ un especialista en contrataciones públicas.
                 [{nombre, descripcion, valor_minimo, tipo_verificacion}]
             propuesta_tecnica: Lo que ofrece el postor
                 {rtm: {valor_ofrecido, cumple, descripcion}}
+            esquema: _esquema_rtm(rtm_bases) ya calculado (evaluación en lote)
         
         Returns:
             {
@@ -757,33 +1072,34 @@ un especialista en contrataciones públicas.
         detalle = []
         incumplimientos = []
         cumple_todos = True
+        cumplidos = 0
         
-        for rtm in rtm_bases:
-            nombre = rtm.get("nombre", rtm.get("rtm", ""))
-            descripcion = rtm.get("descripcion", "")
-            valor_minimo = rtm.get("valor_minimo", rtm.get("exigido", ""))
-            tipo = rtm.get("tipo_verificacion", "cumple_no_cumple")
-            
+        # Campos de las bases (mínimos numéricos ya convertidos)
+        if esquema is None:
+            esquema = _esquema_rtm(rtm_bases)
+        
+        # Métodos ligados fuera del bucle (evita la búsqueda de atributo por fila)
+        oferta_de = propuesta_tecnica.get
+        agregar_detalle = detalle.append
+        agregar_incumplimiento = incumplimientos.append
+        
+        for nombre, descripcion, valor_minimo, min_val in esquema:
             # Verificar lo ofrecido por el postor
-            oferta = propuesta_tecnica.get(nombre, {})
+            oferta = oferta_de(nombre, _VACIO)
             valor_ofrecido = oferta.get("valor_ofrecido", oferta.get("ofrecido", ""))
             cumple_rtm = oferta.get("cumple", False)
-            obs = oferta.get("observaciones", "")
             
             # Verificación automática si hay valores numéricos
-            if tipo == "numerico" and valor_minimo and valor_ofrecido:
-                try:
-                    min_val = float(str(valor_minimo).replace(",", ""))
-                    ofr_val = float(str(valor_ofrecido).replace(",", ""))
+            if min_val is not None and valor_ofrecido:
+                ofr_val = _a_numero(valor_ofrecido)
+                if ofr_val is not None:
                     cumple_rtm = ofr_val >= min_val
-                except:
-                    pass
             
             observacion = ""
             if not cumple_rtm:
                 cumple_todos = False
                 observacion = f"NO CUMPLE RTM: {descripcion}"
-                incumplimientos.append({
+                agregar_incumplimiento({
                     "rtm": nombre,
                     "descripcion": descripcion,
                     "exigido": valor_minimo,
@@ -792,9 +1108,10 @@ un especialista en contrataciones públicas.
                     "consecuencia": "DESCALIFICACIÓN"
                 })
             else:
+                cumplidos += 1
                 observacion = f"Cumple: ofrece {valor_ofrecido}" if valor_ofrecido else "Cumple RTM"
             
-            detalle.append({
+            agregar_detalle({
                 "rtm": nombre,
                 "descripcion": descripcion,
                 "exigido": valor_minimo,
@@ -811,7 +1128,7 @@ un especialista en contrataciones públicas.
             "detalle": detalle,
             "incumplimientos": incumplimientos,
             "total_rtm": len(rtm_bases),
-            "rtm_cumplidos": len([d for d in detalle if d["cumple"]]),
+            "rtm_cumplidos": cumplidos,
             "base_legal": "Art. 16 de la Ley 32069 - Especificaciones Técnicas",
             "puede_continuar": cumple_todos
         }
@@ -842,55 +1159,43 @@ un especialista en contrataciones públicas.
                 puede_continuar: bool
             }
         """
+        # Columnas numéricas por factor (una sola extracción)
+        nombres = [f.get("nombre", f.get("factor", "")) for f in factores_bases]
+        maximos = [float(f.get("puntaje_maximo", f.get("maximo", 0))) for f in factores_bases]
+        presentados = [propuesta_tecnica.get(nombre, _VACIO) for nombre in nombres]
+        otorgados = [float(p.get("puntaje_otorgado", 0)) for p in presentados]
+        
+        puntaje_total = sum(otorgados)
+        puntaje_maximo_total = sum(maximos)
+        excede = [otorgado > maximo for otorgado, maximo in zip(otorgados, maximos)]
+        negativo = [otorgado < 0 for otorgado in otorgados]
+        
+        # Alertas solo para los factores que exceden el máximo
+        alertas = [
+            {"tipo": "puntaje_excede_maximo", "factor": nombres[i], "gravedad": "ALTA"}
+            for i, flag in enumerate(excede) if flag
+        ]
+        
         detalle = []
-        puntaje_total = 0
-        puntaje_maximo_total = 0
-        alertas = []
-        
-        for factor in factores_bases:
-            nombre = factor.get("nombre", factor.get("factor", ""))
-            puntaje_max = float(factor.get("puntaje_maximo", factor.get("maximo", 0)))
-            metodologia = factor.get("metodologia", "")
-            descripcion = factor.get("descripcion", "")
-            
-            puntaje_maximo_total += puntaje_max
-            
-            # Obtener lo presentado por el postor
-            presentado = propuesta_tecnica.get(nombre, {})
-            puntaje_otorgado = float(presentado.get("puntaje_otorgado", 0))
-            puntaje_solicitado = float(presentado.get("puntaje_solicitado", 0))
-            valor = presentado.get("valor_presentado", "")
-            documentacion = presentado.get("documentacion", "")
-            
-            # Validaciones
-            observacion = ""
-            tiene_error = False
-            
-            if puntaje_otorgado > puntaje_max:
-                tiene_error = True
+        for factor, nombre, puntaje_max, presentado, puntaje_otorgado, es_exceso, es_negativo in zip(
+            factores_bases, nombres, maximos, presentados, otorgados, excede, negativo
+        ):
+            if es_exceso:
                 observacion = f"ERROR: Puntaje otorgado ({puntaje_otorgado}) excede máximo ({puntaje_max})"
-                alertas.append({
-                    "tipo": "puntaje_excede_maximo",
-                    "factor": nombre,
-                    "gravedad": "ALTA"
-                })
-            elif puntaje_otorgado < 0:
-                tiene_error = True
+            elif es_negativo:
                 observacion = f"ERROR: Puntaje negativo ({puntaje_otorgado})"
             else:
                 observacion = f"Puntaje: {puntaje_otorgado}/{puntaje_max}"
             
-            puntaje_total += puntaje_otorgado
-            
             detalle.append({
                 "factor": nombre,
-                "descripcion": descripcion,
-                "metodologia": metodologia,
+                "descripcion": factor.get("descripcion", ""),
+                "metodologia": factor.get("metodologia", ""),
                 "puntaje_maximo": puntaje_max,
                 "puntaje_otorgado": puntaje_otorgado,
-                "valor_presentado": valor,
-                "documentacion": documentacion,
-                "tiene_error": tiene_error,
+                "valor_presentado": presentado.get("valor_presentado", ""),
+                "documentacion": presentado.get("documentacion", ""),
+                "tiene_error": es_exceso or es_negativo,
                 "observacion": observacion
             })
         
@@ -933,59 +1238,74 @@ un especialista en contrataciones públicas.
                 etapa: "ECONOMICA",
                 precio_menor: float,
                 ranking: [],
+                indice_por_postor: {postor: fila_ranking},
                 ofertas_temerarias: [],
                 ofertas_sobre_vr: [],
                 errores_calculo: [],
+                errores_por_postor: {postor: [errores]},
                 formula_aplicada: str
             }
         """
         if not propuestas:
             return {"error": "No hay propuestas para evaluar", "etapa": "ECONOMICA"}
         
-        # Obtener precio menor
-        precios = [p.get("precio", 0) for p in propuestas if p.get("precio", 0) > 0]
-        if not precios:
+        # Una sola pasada: columnas por postor (postor, precio, puntaje otorgado),
+        # precio menor y suma de precios válidos
+        postores = []
+        precios_postor = []
+        puntajes_otorgados = []
+        total_precios = 0
+        cantidad_precios = 0
+        precio_menor = None
+        for prop in propuestas:
+            precio = prop.get("precio", 0)
+            postores.append(prop.get("postor", "Sin nombre"))
+            precios_postor.append(precio)
+            puntajes_otorgados.append(prop.get("puntaje_otorgado", None))
+            if precio > 0:
+                total_precios += precio
+                cantidad_precios += 1
+                if precio_menor is None or precio < precio_menor:
+                    precio_menor = precio
+        
+        if not cantidad_precios:
             return {"error": "No hay precios válidos", "etapa": "ECONOMICA"}
         
-        precio_menor = min(precios)
-        promedio_precios = sum(precios) / len(precios)
+        promedio_precios = total_precios / cantidad_precios
         limite_temeraria = promedio_precios * self.LIMITE_INFERIOR_PRECIO
         
+        # Columnas por postor: puntaje según Art. 78 y detección de anomalías
+        (puntajes_correctos, temerarias, sobre_vr,
+         porcentajes_bajo, porcentajes_exceso) = _calcular_columnas_economicas(
+            precios_postor, precio_menor, promedio_precios, limite_temeraria,
+            valor_referencial, puntaje_economico_maximo
+        )
+        
         resultados = []
         ofertas_temerarias = []
         ofertas_sobre_vr = []
         errores_calculo = []
         
-        for prop in propuestas:
-            postor = prop.get("postor", "Sin nombre")
-            precio = prop.get("precio", 0)
-            puntaje_otorgado = prop.get("puntaje_otorgado", None)
-            
-            # Calcular puntaje correcto según Art. 78
-            if precio > 0:
-                puntaje_correcto = round((precio_menor / precio) * puntaje_economico_maximo, 2)
-            else:
-                puntaje_correcto = 0
-            
-            # Detectar oferta temeraria
-            es_temeraria = precio < limite_temeraria
+        for (postor, precio, puntaje_otorgado, puntaje_correcto, es_temeraria, supera_vr,
+             pct_bajo, pct_exceso) in zip(
+            postores, precios_postor, puntajes_otorgados, puntajes_correctos, temerarias,
+            sobre_vr, porcentajes_bajo, porcentajes_exceso
+        ):
             if es_temeraria:
                 ofertas_temerarias.append({
                     "postor": postor,
                     "precio": precio,
                     "limite": round(limite_temeraria, 2),
-                    "porcentaje_bajo_promedio": round((1 - precio/promedio_precios) * 100, 1)
+                    "porcentaje_bajo_promedio": pct_bajo
                 })
             
-            # Detectar oferta sobre VR
-            supera_vr = valor_referencial > 0 and precio > valor_referencial
             if supera_vr:
                 ofertas_sobre_vr.append({
                     "postor": postor,
                     "precio": precio,
                     "valor_referencial": valor_referencial,
                     "exceso": round(precio - valor_referencial, 2),
-                    "porcentaje_exceso": round((precio/valor_referencial - 1) * 100, 1)
+                    "porcentaje_exceso": pct_exceso
                 })
             
             # Verificar error de cálculo si hay puntaje otorgado
@@ -1014,10 +1334,17 @@ un especialista en contrataciones públicas.
                 "supera_vr": supera_vr
             })
         
-        # Ordenar por puntaje (ranking)
-        ranking = sorted(resultados, key=lambda x: x["puntaje_correcto"], reverse=True)
-        for i, r in enumerate(ranking):
-            r["posicion"] = i + 1
+        # Ordenar por puntaje (ranking) usando la columna de puntajes
+        orden = sorted(range(len(resultados)), key=puntajes_correctos.__getitem__, reverse=True)
+        ranking = [resultados[i] for i in orden]
+        indice_por_postor = {}
+        for posicion, r in enumerate(ranking, 1):
+            r["posicion"] = posicion
+            indice_por_postor.setdefault(r["postor"], r)
+        
+        errores_por_postor = {}
+        for error in errores_calculo:
+            errores_por_postor.setdefault(error["postor"], []).append(error)
         
         return {
             "etapa": "ECONOMICA",
@@ -1029,9 +1356,11 @@ un especialista en contrataciones públicas.
             "puntaje_economico_maximo": puntaje_economico_maximo,
             "resultados": resultados,
             "ranking": ranking,
+            "indice_por_postor": indice_por_postor,
             "ofertas_temerarias": ofertas_temerarias,
             "ofertas_sobre_vr": ofertas_sobre_vr,
             "errores_calculo": errores_calculo,
+            "errores_por_postor": errores_por_postor,
             "tiene_errores": len(errores_calculo) > 0,
             "tiene_temerarias": len(ofertas_temerarias) > 0,
             "tiene_sobre_vr": len(ofertas_sobre_vr) > 0,
@@ -1047,7 +1376,9 @@ un especialista en contrataciones públicas.
         propuesta: Dict,
         propuestas_economicas: List[Dict],
         valor_referencial: float = 0,
-        puntaje_minimo_tecnico: float = 0
+        puntaje_minimo_tecnico: float = 0,
+        resultado_e4_cache: Optional[Dict] = None,
+        esquemas_bases: Optional[Dict] = None
     ) -> Dict:
         """
         Ejecuta las 4 etapas secuencialmente.
@@ -1066,6 +1397,10 @@ un especialista en contrataciones públicas.
             propuestas_economicas: Todas las propuestas económicas
             valor_referencial: VR del proceso
             puntaje_minimo_tecnico: Puntaje mínimo técnico requerido
+            resultado_e4_cache: Resultado de evaluar_economica_completa ya calculado
+                para estas propuestas_economicas (evita recalcular la Etapa 4)
+            esquemas_bases: {"requisitos": [...], "rtm": [...]} con los campos de las
+                bases ya extraídos (se comparten entre postores del mismo proceso)
         
         Returns:
             {
@@ -1085,11 +1420,13 @@ un especialista en contrataciones públicas.
         etapas = {}
         vicios = []
         recomendaciones = []
+        esquemas_bases = esquemas_bases or {}
         
         # ETAPA 1: Requisitos Mínimos
         resultado_e1 = self.evaluar_requisitos_minimos(
             requisitos_bases,
-            propuesta.get("documentos", {})
+            propuesta.get("documentos", {}),
+            esquema=esquemas_bases.get("requisitos")
         )
         etapas[1] = resultado_e1
         
@@ -1120,7 +1457,8 @@ un especialista en contrataciones públicas.
         # ETAPA 2: RTM
         resultado_e2 = self.evaluar_rtm(
             rtm_bases,
-            propuesta.get("tecnica", {})
+            propuesta.get("tecnica", {}),
+            esquema=esquemas_bases.get("rtm")
         )
         etapas[2] = resultado_e2
         
@@ -1183,30 +1521,31 @@ un especialista en contrataciones públicas.
             }
         
         # ETAPA 4: Económica
-        resultado_e4 = self.evaluar_economica_completa(
-            propuestas_economicas,
-            valor_referencial
-        )
+        if resultado_e4_cache is not None:
+            resultado_e4 = resultado_e4_cache
+        else:
+            resultado_e4 = self.evaluar_economica_completa(
+                propuestas_economicas,
+                valor_referencial
+            )
         etapas[4] = resultado_e4
         
         # Encontrar el puntaje económico del postor evaluado
         puntaje_economico = 0
         posicion_ranking = None
-        for r in resultado_e4.get("ranking", []):
-            if r["postor"] == postor:
-                puntaje_economico = r["puntaje_correcto"]
-                posicion_ranking = r["posicion"]
-                break
-        
-        for error in resultado_e4.get("errores_calculo", []):
-            if error["postor"] == postor:
-                vicios.append({
-                    "etapa": 4,
-                    "tipo": "error_calculo_economico",
-                    "descripcion": f"Diferencia de {error['diferencia']} puntos en puntaje económico",
-                    "gravedad": "ALTA"
-                })
-                recomendaciones.append("Considerar recurso de apelación por error en evaluación económica")
+        fila_postor = resultado_e4.get("indice_por_postor", {}).get(postor)
+        if fila_postor:
+            puntaje_economico = fila_postor["puntaje_correcto"]
+            posicion_ranking = fila_postor["posicion"]
+        
+        for error in resultado_e4.get("errores_por_postor", {}).get(postor, []):
+            vicios.append({
+                "etapa": 4,
+                "tipo": "error_calculo_economico",
+                "descripcion": f"Diferencia de {error['diferencia']} puntos en puntaje económico",
+                "gravedad": "ALTA"
+            })
+            recomendaciones.append("Considerar recurso de apelación por error en evaluación económica")
         
         # Puntaje total (asumiendo 50-50 por defecto, puede ajustarse)
         puntaje_total = round(puntaje_tecnico + puntaje_economico, 2)
@@ -1226,13 +1565,72 @@ un especialista en contrataciones públicas.
             "base_legal": "Arts. 77-78 del Reglamento D.S. N° 009-2025-EF"
         }
     
-    def generar_informe_evaluacion_etapas(self, resultado: Dict) -> str:
-        """Genera informe formateado de la evaluación por etapas"""
+    def evaluar_lote(
+        self,
+        requisitos_bases: List[Dict],
+        rtm_bases: List[Dict],
+        factores_bases: List[Dict],
+        propuestas: List[Dict],
+        propuestas_economicas: List[Dict],
+        valor_referencial: float = 0,
+        puntaje_minimo_tecnico: float = 0
+    ) -> List[Dict]:
+        """
+        Ejecuta evaluacion_integral para varios postores del mismo proceso.
+        La Etapa 4 (global a todas las propuestas económicas) y los campos de
+        las bases se calculan una sola vez y se comparten entre postores.
+        
+        Args:
+            propuestas: Lista de propuestas en el formato de evaluacion_integral
+            (resto de argumentos igual que evaluacion_integral)
+        
+        Returns:
+            Lista de resultados de evaluacion_integral, en el mismo orden
+        """
+        resultado_e4 = self.evaluar_economica_completa(
+            propuestas_economicas,
+            valor_referencial
+        )
+        esquemas = {
+            "requisitos": _esquema_requisitos(requisitos_bases),
+            "rtm": _esquema_rtm(rtm_bases)
+        }
+        
+        return [
+            self.evaluacion_integral(
+                requisitos_bases,
+                rtm_bases,
+                factores_bases,
+                propuesta,
+                propuestas_economicas,
+                valor_referencial,
+                puntaje_minimo_tecnico,
+                resultado_e4_cache=resultado_e4,
+                esquemas_bases=esquemas
+            )
+            for propuesta in propuestas
+        ]
+    
+    def generar_informe_evaluacion_etapas(self, resultado: Dict, fecha_str: Optional[str] = None) -> str:
+        """
+        Genera informe formateado de la evaluación por etapas
+        
+        Args:
+            resultado: Resultado de evaluacion_integral
+            fecha_str: Fecha ya formateada (para generar varios informes con la misma fecha)
+        """
+        if fecha_str is None:
+            fecha_str = _fecha_informe()
+        
+        return self._construir_informe_etapas(resultado, fecha_str)
+    
+    def _construir_informe_etapas(self, resultado: Dict, fecha_str: str) -> str:
+        """Arma el texto del informe por etapas"""
         postor = resultado.get("postor", "Postor")
         estado = resultado.get("resultado_final", "N/A")
         etapa_final = resultado.get("etapa_final", 0)
         
-        informe = f"""
+        partes = [f"""
 ╔══════════════════════════════════════════════════════════════════════════════╗
 ║      INFORME DE EVALUACIÓN DE PROPUESTA - FLUJO POR ETAPAS                   ║
 ╚══════════════════════════════════════════════════════════════════════════════╝
@@ -1240,12 +1638,12 @@ un especialista en contrataciones públicas.
 Postor:          {postor}
 Resultado:       {'✅ ' + estado if estado == 'ADMITIDO' else '❌ ' + estado}
 Etapa Final:     {etapa_final}/4
-Fecha Análisis:  {datetime.now().strftime("%d/%m/%Y %H:%M")}
+Fecha Análisis:  {fecha_str}
 
 ═══════════════════════════════════════════════════════════════════════════════
                     RESUMEN POR ETAPAS
 ═══════════════════════════════════════════════════════════════════════════════
-"""
+"""]
         
         nombres_etapas = {
             1: "Requisitos Mínimos",
@@ -1258,29 +1656,29 @@ Fecha Análisis:  {datetime.now().strftime("%d/%m/%Y %H:%M")}
             etapa = resultado.get("etapas", {}).get(i, {})
             if etapa:
                 estado_etapa = "✅ PASA" if etapa.get("cumple", etapa.get("puede_continuar", True)) else "❌ NO PASA"
-                informe += f"\nETAPA {i}: {nombres_etapas[i]}\n"
-                informe += f"Estado: {estado_etapa}\n"
+                partes.append(f"\nETAPA {i}: {nombres_etapas[i]}\n")
+                partes.append(f"Estado: {estado_etapa}\n")
                 
                 if i == 3 and etapa.get("puntaje_tecnico"):
-                    informe += f"Puntaje: {etapa['puntaje_tecnico']}/{etapa['puntaje_maximo']}\n"
+                    partes.append(f"Puntaje: {etapa['puntaje_tecnico']}/{etapa['puntaje_maximo']}\n")
                 if i == 4 and resultado.get("puntaje_economico"):
-                    informe += f"Puntaje Económico: {resultado['puntaje_economico']}\n"
-                    informe += f"Posición en Ranking: {resultado.get('posicion_ranking', 'N/A')}\n"
+                    partes.append(f"Puntaje Económico: {resultado['puntaje_economico']}\n")
+                    partes.append(f"Posición en Ranking: {resultado.get('posicion_ranking', 'N/A')}\n")
         
         # Vicios detectados
         vicios = resultado.get("vicios_detectados", [])
         if vicios:
-            informe += """
+            partes.append("""
 ═══════════════════════════════════════════════════════════════════════════════
                     VICIOS DETECTADOS
 ═══════════════════════════════════════════════════════════════════════════════
-"""
+""")
             for i, v in enumerate(vicios, 1):
-                informe += f"\n{i}. [{v['gravedad']}] Etapa {v['etapa']}: {v['descripcion']}\n"
+                partes.append(f"\n{i}. [{v['gravedad']}] Etapa {v['etapa']}: {v['descripcion']}\n")
         
         # Puntaje final
         if resultado.get("puntaje_total"):
-            informe += f"""
+            partes.append(f"""
 ═══════════════════════════════════════════════════════════════════════════════
                     PUNTAJE FINAL
 ═══════════════════════════════════════════════════════════════════════════════
@@ -1289,25 +1687,25 @@ Puntaje Técnico:    {resultado['puntaje_tecnico']}
 Puntaje Económico:  {resultado['puntaje_economico']}
 ─────────────────────────────────────────────────
 PUNTAJE TOTAL:      {resultado['puntaje_total']}
-"""
+""")
         
         # Recomendaciones
-        informe += """
+        partes.append("""
 ═══════════════════════════════════════════════════════════════════════════════
                     RECOMENDACIONES
 ═══════════════════════════════════════════════════════════════════════════════
-"""
+""")
         for rec in resultado.get("recomendaciones", []):
-            informe += f"• {rec}\n"
+            partes.append(f"• {rec}\n")
         
-        informe += f"""
+        partes.append(f"""
 ───────────────────────────────────────────────────────────────────────────────
 Base legal: {resultado.get('base_legal', 'Arts. 77-78 del Reglamento D.S. N° 009-2025-EF')}
 Generado por INKABOT - Agente de Contrataciones Públicas
 ═══════════════════════════════════════════════════════════════════════════════
-"""
+""")
         
-        return informe
+        return "".join(partes)
 
     # =========================================================================
     # EVALUACIÓN AUTOMÁTICA DESDE PDF (CON GEMINI)
@@ -1334,12 +1732,8 @@ Generado por INKABOT - Agente de Contrataciones Públicas
         Returns:
             Dict con resultado completo de evaluación y análisis IA
         """
-        import google.generativeai as genai
-        from config import Config
-        
         try:
-            genai.configure(api_key=Config.GEMINI_API_KEY)
-            model = genai.GenerativeModel('gemini-2.0-flash')
+            model = self._get_gemini_model()
         except Exception as e:
             return {
                 "error": f"No se pudo configurar Gemini: {str(e)}",
@@ -1348,64 +1742,15 @@ Generado por INKABOT - Agente de Contrataciones Públicas
             }
         
         # Prompt para que Gemini extraiga y analice la propuesta
-        prompt = f"""Eres un experto en contrataciones públicas del Perú (Ley 32069 y Reglamento D.S. 009-2025-EF).
-Analiza la siguiente propuesta de un postor y extrae la información relevante para evaluar si cumple con los requisitos.
-
-TEXTO DE LA PROPUESTA:
-{texto_propuesta[:15000]}
-
-{"TEXTO DE LAS BASES:" + chr(10) + texto_bases[:8000] if texto_bases else ""}
-
-VALOR REFERENCIAL: S/ {valor_referencial:,.2f} (si es 0, intenta encontrarlo en el texto)
-
-Responde en formato JSON con la siguiente estructura EXACTA (sin texto adicional, solo el JSON):
-{{
-    "postor_identificado": "nombre del postor encontrado en el documento",
-    "precio_ofertado": 0.0,
-    "etapa1_requisitos_minimos": {{
-        "rnp_vigente": {{"presentado": true/false, "documento": "descripción", "observacion": ""}},
-        "capacidad_legal": {{"presentado": true/false, "documento": "descripción", "observacion": ""}},
-        "declaracion_jurada": {{"presentado": true/false, "documento": "descripción", "observacion": ""}},
-        "habilitacion": {{"presentado": true/false, "documento": "descripción", "observacion": ""}}
-    }},
-    "etapa2_rtm": {{
-        "especificaciones_tecnicas": {{"cumple": true/false, "descripcion": "", "evidencia": ""}},
-        "equipamiento_minimo": {{"cumple": true/false, "descripcion": "", "evidencia": ""}},
-        "personal_clave": {{"cumple": true/false, "descripcion": "", "evidencia": ""}},
-        "experiencia_minima": {{"cumple": true/false, "descripcion": "", "evidencia": ""}},
-        "plazo_ofertado": {{"cumple": true/false, "valor": "", "evidencia": ""}}
-    }},
-    "etapa3_factores_tecnicos": {{
-        "experiencia_postor": {{"puntaje_estimado": 0, "max": 50, "evidencia": ""}},
-        "experiencia_personal": {{"puntaje_estimado": 0, "max": 30, "evidencia": ""}},
-        "plan_trabajo": {{"puntaje_estimado": 0, "max": 20, "evidencia": ""}}
-    }},
-    "etapa4_economica": {{
-        "precio_ofertado": 0.0,
-        "moneda": "PEN",
-        "incluye_igv": true/false,
-        "plazo_ejecucion": ""
-    }},
-    "vicios_detectados": [
-        {{"tipo": "", "descripcion": "", "gravedad": "ALTA/MEDIA/BAJA", "base_legal": ""}}
-    ],
-    "observaciones_generales": ""
-}}"""
-
+        prompt = _construir_prompt_propuesta(texto_propuesta, texto_bases, valor_referencial)
+        
         try:
-            response = model.generate_content(prompt)
-            respuesta_texto = response.text.strip()
-            
-            # Limpiar respuesta JSON
-            if respuesta_texto.startswith("```json"):
-                respuesta_texto = respuesta_texto[7:]
-            if respuesta_texto.startswith("```"):
-                respuesta_texto = respuesta_texto[3:]
-            if respuesta_texto.endswith("```"):
-                respuesta_texto = respuesta_texto[:-3]
-            
-            import json
-            datos_extraidos = json.loads(respuesta_texto.strip())
+            # Solo se guarda en caché una respuesta que pasa la validación
+            datos_extraidos = get_gemini_cache().get_or_call(
+                self.MODELO_GEMINI, prompt,
+                lambda: model.generate_content(prompt).text,
+                _parsear_respuesta_propuesta
+            )
             
         except Exception as e:
             # Fallback con análisis básico
@@ -1421,21 +1766,16 @@ Responde en formato JSON con la siguiente estructura EXACTA (sin texto adicional
     
     def _analisis_fallback_propuesta(self, texto: str, valor_referencial: float) -> Dict:
         """Análisis básico cuando Gemini falla"""
-        texto_lower = texto.lower()
-        
         # Buscar precio
         precio = 0.0
-        patron_precio = r's/?\.?\s*([\d,]+(?:\.\d{2})?)'
-        match = re.search(patron_precio, texto, re.IGNORECASE)
+        match = _PATRON_PRECIO.search(texto)
         if match:
-            try:
-                precio = float(match.group(1).replace(',', ''))
-            except:
-                pass
+            precio = _a_numero(match.group(1)) or 0.0
         
         # Buscar indicadores básicos
-        tiene_rnp = 'rnp' in texto_lower or 'registro nacional de proveedores' in texto_lower
-        tiene_dj = 'declaración jurada' in texto_lower or 'declaro bajo juramento' in texto_lower
+        encontrados = {m.group(1).lower() for m in _PATRON_INDICADORES.finditer(texto)}
+        tiene_rnp = 'rnp' in encontrados or 'registro nacional de proveedores' in encontrados
+        tiene_dj = 'declaración jurada' in encontrados or 'declaro bajo juramento' in encontrados
         
         return {
             "postor_identificado": "Postor (análisis básico)",
@@ -1472,159 +1812,179 @@ Responde en formato JSON con la siguiente estructura EXACTA (sin texto adicional
         self, 
         datos: Dict, 
         valor_referencial: float,
-        nombre_postor: str
+        nombre_postor: str,
+        precio_menor: Optional[float] = None,
+        timestamp: Optional[str] = None,
+        vr_threshold: Optional[float] = None
     ) -> Dict:
-        """Ejecuta las 4 etapas con los datos extraídos por Gemini"""
+        """
+        Ejecuta las 4 etapas con los datos extraídos por Gemini (ya validados)
+        
+        Args:
+            precio_menor: Menor precio entre todos los postores (Pm). Si no se
+                indica, se asume que este postor es el de menor precio.
+            timestamp: Marca de tiempo ISO compartida por un lote de evaluaciones
+            vr_threshold: Límite de oferta temeraria (90% del VR) ya calculado
+        """
         
         resultado = {
             "postor": nombre_postor,
             "datos_extraidos": datos,
             "etapas": {},
-            "vicios_detectados": datos.get("vicios_detectados", []),
-            "timestamp": datetime.now().isoformat()
+            "vicios_detectados": list(datos.get("vicios_detectados") or ()),
+            "timestamp": timestamp or datetime.now().isoformat()
         }
+        # Etapas en orden (posición 0 = etapa 1); se publica como {n: etapa} al terminar
+        etapas = []
         
         # ========== ETAPA 1: Requisitos Mínimos ==========
-        req_minimos = datos.get("etapa1_requisitos_minimos", {})
-        cumple_e1 = True
-        detalle_e1 = []
-        incumplimientos_e1 = []
-        
-        for req, info in req_minimos.items():
-            presentado = info.get("presentado", False)
-            detalle_e1.append({
-                "requisito": req,
-                "cumple": presentado,
+        req_minimos = datos["etapa1_requisitos_minimos"]
+        
+        # Detalle en una sola pasada; los incumplimientos salen del detalle.
+        # Los nombres se internan: en un lote, todos los postores comparten el mismo objeto
+        detalle_e1 = [
+            {
+                "requisito": sys.intern(req),
+                "cumple": info.get("presentado", False),
                 "observacion": info.get("observacion", "")
-            })
-            if not presentado and req != "habilitacion":  # habilitación es opcional
-                cumple_e1 = False
-                incumplimientos_e1.append({
-                    "requisito": req,
-                    "descripcion": f"No presenta: {req.replace('_', ' ').title()}"
-                })
+            }
+            for req, info in req_minimos.items()
+        ]
+        # Máscara de faltantes (habilitación es opcional) y luego se recogen sus nombres
+        faltantes_e1 = [
+            d["requisito"] for d in detalle_e1
+            if not d["cumple"] and d["requisito"] != "habilitacion"
+        ]
+        cumple_e1 = not faltantes_e1
+        incumplimientos_e1 = [
+            {"requisito": req, "descripcion": f"No presenta: {_pretty(req)}"}
+            for req in faltantes_e1
+        ]
         
-        resultado["etapas"][1] = {
+        etapas.append({
             "etapa": "REQUISITOS_MINIMOS",
             "cumple": cumple_e1,
             "resultado": "ADMITIDO" if cumple_e1 else "DESCALIFICADO",
             "detalle": detalle_e1,
             "incumplimientos": incumplimientos_e1
-        }
+        })
         
         if not cumple_e1:
             resultado["resultado_final"] = "DESCALIFICADO"
             resultado["etapa_final"] = 1
             resultado["motivo"] = "No cumple requisitos mínimos de calificación"
+            resultado["etapas"] = dict(enumerate(etapas, 1))
             return resultado
         
         # ========== ETAPA 2: RTM ==========
-        rtm = datos.get("etapa2_rtm", {})
-        cumple_e2 = True
-        detalle_e2 = []
-        incumplimientos_e2 = []
-        
-        for rtm_item, info in rtm.items():
-            cumple = info.get("cumple", True)
-            detalle_e2.append({
-                "rtm": rtm_item,
-                "cumple": cumple,
+        rtm = datos["etapa2_rtm"]
+        
+        # Igual que "presentado" en la Etapa 1: sin "cumple" explícito, el RTM no se da por cumplido
+        detalle_e2 = [
+            {
+                "rtm": sys.intern(rtm_item),
+                "cumple": info.get("cumple", False),
                 "evidencia": info.get("evidencia", "")
-            })
-            if not cumple:
-                cumple_e2 = False
-                incumplimientos_e2.append({
-                    "rtm": rtm_item,
-                    "descripcion": f"No cumple: {rtm_item.replace('_', ' ').title()}"
-                })
+            }
+            for rtm_item, info in rtm.items()
+        ]
+        faltantes_e2 = [d["rtm"] for d in detalle_e2 if not d["cumple"]]
+        cumple_e2 = not faltantes_e2
+        incumplimientos_e2 = [
+            {"rtm": rtm_item, "descripcion": f"No cumple: {_pretty(rtm_item)}"}
+            for rtm_item in faltantes_e2
+        ]
         
-        resultado["etapas"][2] = {
+        etapas.append({
             "etapa": "RTM",
             "cumple": cumple_e2,
             "resultado": "ADMITIDO" if cumple_e2 else "DESCALIFICADO",
             "detalle": detalle_e2,
             "incumplimientos": incumplimientos_e2
-        }
+        })
         
         if not cumple_e2:
             resultado["resultado_final"] = "DESCALIFICADO"
             resultado["etapa_final"] = 2
             resultado["motivo"] = "No cumple requerimientos técnicos mínimos"
+            resultado["etapas"] = dict(enumerate(etapas, 1))
             return resultado
         
         # ========== ETAPA 3: Factores Técnicos ==========
-        factores = datos.get("etapa3_factores_tecnicos", {})
-        puntaje_tecnico = 0
-        puntaje_max = 0
-        detalle_e3 = []
-        
-        for factor, info in factores.items():
-            pts = info.get("puntaje_estimado", 0)
-            max_pts = info.get("max", 0)
-            puntaje_tecnico += pts
-            puntaje_max += max_pts
-            detalle_e3.append({
-                "factor": factor,
-                "puntaje": pts,
-                "maximo": max_pts,
-                "evidencia": info.get("evidencia", "")
-            })
+        factores = datos["etapa3_factores_tecnicos"]
+        
+        # Una sola lectura de cada factor; totales y detalle salen de las mismas tuplas
+        filas_e3 = [
+            (sys.intern(factor), info.get("puntaje_estimado", 0), info.get("max", 0), info.get("evidencia", ""))
+            for factor, info in factores.items()
+        ]
+        
+        if filas_e3:
+            puntaje_tecnico = sum(fila[1] for fila in filas_e3)
+            puntaje_max = sum(fila[2] for fila in filas_e3)
+        else:
+            puntaje_tecnico = puntaje_max = 0
+        
+        detalle_e3 = [
+            {"factor": factor, "puntaje": pts, "maximo": max_pts, "evidencia": evidencia}
+            for factor, pts, max_pts, evidencia in filas_e3
+        ]
         
-        resultado["etapas"][3] = {
+        etapas.append({
             "etapa": "FACTORES_TECNICOS",
             "cumple": True,
             "puntaje_tecnico": puntaje_tecnico,
             "puntaje_maximo": puntaje_max,
             "detalle": detalle_e3
-        }
+        })
         resultado["puntaje_tecnico"] = puntaje_tecnico
         
         # ========== ETAPA 4: Evaluación Económica ==========
-        eco = datos.get("etapa4_economica", {})
+        eco = datos["etapa4_economica"]
         precio = eco.get("precio_ofertado", 0)
         
-        # Calcular puntaje económico (asumiendo que es el único postor o el de menor precio)
-        if precio > 0 and valor_referencial > 0:
-            # Verificar límites
-            es_temeraria = precio < (valor_referencial * 0.9)
-            excede_vr = precio > valor_referencial
-            
-            # Puntaje (PE = Pm/Pi x 100, asumiendo este es Pm)
-            puntaje_economico = 100
-        else:
-            puntaje_economico = 0
-            es_temeraria = False
-            excede_vr = False
+        # Calcular puntaje económico (sin Pm, se asume que es el único postor o el de menor precio)
+        if vr_threshold is None:
+            vr_threshold = valor_referencial * self.LIMITE_INFERIOR_VR
+        puntaje_economico, es_temeraria, excede_vr = _puntuar_precio(
+            precio, valor_referencial, vr_threshold, precio_menor
+        )
         
-        resultado["etapas"][4] = {
-            "etapa": "ECONOMICA",
-            "cumple": not excede_vr,
-            "precio_ofertado": precio,
-            "valor_referencial": valor_referencial,
-            "puntaje_economico": puntaje_economico,
-            "es_oferta_temeraria": es_temeraria,
-            "excede_valor_referencial": excede_vr,
-            "alertas": []
-        }
+        alertas_e4 = []
+        vicios_e4 = []
         
         if es_temeraria:
-            resultado["etapas"][4]["alertas"].append("⚠️ Oferta potencialmente temeraria (< 90% VR)")
-            resultado["vicios_detectados"].append({
+            alertas_e4.append("⚠️ Oferta potencialmente temeraria (< 90% VR)")
+            vicios_e4.append({
                 "tipo": "oferta_temeraria",
-                "descripcion": f"Precio ({precio:,.2f}) menor al 90% del VR ({valor_referencial * 0.9:,.2f})",
+                "etapa": 4,
+                "descripcion": f"Precio ({precio:,.2f}) menor al 90% del VR ({vr_threshold:,.2f})",
                 "gravedad": "ALTA",
                 "base_legal": "Art. 78.2 del Reglamento"
             })
         
         if excede_vr:
-            resultado["etapas"][4]["alertas"].append("❌ Excede valor referencial")
-            resultado["vicios_detectados"].append({
+            alertas_e4.append("❌ Excede valor referencial")
+            vicios_e4.append({
                 "tipo": "excede_vr",
+                "etapa": 4,
                 "descripcion": f"Precio ({precio:,.2f}) excede el VR ({valor_referencial:,.2f})",
                 "gravedad": "ALTA",
                 "base_legal": "Art. 77 del Reglamento"
             })
         
+        etapas.append({
+            "etapa": "ECONOMICA",
+            "cumple": not excede_vr,
+            "precio_ofertado": precio,
+            "valor_referencial": valor_referencial,
+            "puntaje_economico": puntaje_economico,
+            "es_oferta_temeraria": es_temeraria,
+            "excede_valor_referencial": excede_vr,
+            "alertas": alertas_e4
+        })
+        resultado["vicios_detectados"].extend(vicios_e4)
+        
         resultado["puntaje_economico"] = puntaje_economico
         resultado["puntaje_total"] = puntaje_tecnico + puntaje_economico
         
@@ -1638,30 +1998,65 @@ Responde en formato JSON con la siguiente estructura EXACTA (sin texto adicional
             resultado["etapa_final"] = 4
             resultado["motivo"] = "Propuesta cumple todas las etapas"
         
+        resultado["etapas"] = dict(enumerate(etapas, 1))
+        
         # Generar informe
         resultado["informe"] = self.generar_informe_evaluacion_etapas(resultado)
         resultado["observaciones_ia"] = datos.get("observaciones_generales", "")
         
         return resultado
 
+    def evaluar_propuestas_batch(
+        self,
+        propuestas: List[Tuple[str, Dict]],
+        valor_referencial: float
+    ) -> List[Dict]:
+        """
+        Ejecuta las 4 etapas para varios postores del mismo proceso, calculando
+        el puntaje económico relativo al menor precio ofertado (PE = Pm/Pi x 100).
+        
+        Args:
+            propuestas: Lista de (nombre_postor, datos_extraidos)
+            valor_referencial: Valor referencial del proceso
+        
+        Returns:
+            Lista de resultados, en el mismo orden que las propuestas
+        """
+        # Se valida una copia superficial: los dicts del llamador no se modifican
+        datos_validados = [_validar_datos_extraidos(dict(datos)) for _, datos in propuestas]
+        
+        # Pm sale solo de las ofertas que superan las etapas 1 a 3 (Art. 78 del Reglamento);
+        # se obtiene una sola vez para todo el lote
+        precios = [
+            datos["etapa4_economica"].get("precio_ofertado", 0)
+            for datos in datos_validados
+            if _llega_a_etapa_economica(datos)
+        ]
+        precios_validos = [p for p in precios if p > 0]
+        precio_menor = min(precios_validos) if precios_validos else None
+        
+        # Un lote es un único acto de evaluación: misma marca de tiempo para todos
+        timestamp = datetime.now().isoformat()
+        vr_threshold = valor_referencial * self.LIMITE_INFERIOR_VR
+        
+        return [
+            self._ejecutar_evaluacion_desde_datos_extraidos(
+                datos,
+                valor_referencial,
+                nombre,
+                precio_menor=precio_menor,
+                timestamp=timestamp,
+                vr_threshold=vr_threshold
+            )
+            for (nombre, _), datos in zip(propuestas, datos_validados)
+        ]
 
     def detect_and_process(self, message: str) -> Optional[str]:
         """Detecta si el mensaje es consulta sobre evaluación"""
-        message_lower = message.lower()
-        
-        keywords = ['evaluación', 'evaluacion', 'evaluar', 'puntaje', 
-                    'calificaron', 'calificación', 'error aritmético',
-                    'propuesta técnica', 'propuesta económica']
-        
-        if not any(kw in message_lower for kw in keywords):
-            return None
-        
-        return get_evaluador_info()
+        return _EVALUADOR_INFO if _PATRON_CONSULTA_EVALUACION.search(message) else None
 
 
-def get_evaluador_info() -> str:
-    """Información general sobre evaluación de propuestas"""
-    return """📊 **EVALUADOR DE PROPUESTAS**
+_EVALUADOR_INFO: Final[str] = """📊 **EVALUADOR DE PROPUESTAS**
 
 **Base Legal:** Arts. 77-78 del D.S. N° 009-2025-EF
 
@@ -1697,3 +2092,8 @@ def get_evaluador_info() -> str:
 • Orden de prelación otorgado
 
 📚 *Base legal: Arts. 77-78 del Reglamento*"""
+
+
+def get_evaluador_info() -> str:
+    """Información general sobre evaluación de propuestas"""
+    return _EVALUADOR_INFO
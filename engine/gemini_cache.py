@@ -0,0 +1,200 @@
+"""
+Caché de Respuestas de Gemini
+Evita repetir llamadas idénticas al LLM (mismo modelo + mismo prompt)
+
+Dos niveles:
+1. Memoria (LRU acotado) para repeticiones dentro del mismo proceso
+2. SQLite (modo WAL) para que la caché sobreviva reinicios, con caducidad
+   y un máximo de filas para que el archivo no crezca sin límite
+"""
+import sqlite3
+import os
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Optional, TypeVar
+
+# Ruta de la base de datos
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'gemini_cache.db')
+
+logger = logging.getLogger(__name__)
+
+# Lock para thread-safety
+_db_lock = threading.Lock()
+
+# Vigencia de una respuesta guardada y máximo de filas en disco
+TTL_SEGUNDOS = 30 * 24 * 3600
+MAX_FILAS = 5000
+# La poda recorre la tabla entera: se hace una vez cada tantas inserciones
+# (entre podas puede haber hasta PODAR_CADA - 1 filas de más; get ya ignora las caducadas)
+PODAR_CADA = 100
+
+T = TypeVar("T")
+
+
+class GeminiCache:
+    """
+    Caché clave-valor de respuestas de Gemini.
+    La clave es el SHA-256 de (modelo, prompt); el valor es el texto crudo de la respuesta.
+    """
+
+    def __init__(self, db_path: str = None, max_memoria: int = 128,
+                 ttl_segundos: float = TTL_SEGUNDOS, max_filas: int = MAX_FILAS,
+                 podar_cada: int = PODAR_CADA):
+        self.db_path = db_path or DB_PATH
+        self.max_memoria = max_memoria
+        self.ttl_segundos = ttl_segundos
+        self.max_filas = max_filas
+        self.podar_cada = max(1, podar_cada)
+        # Inserciones desde la última poda (la primera inserción poda lo que dejó el proceso anterior)
+        self._sin_podar = self.podar_cada
+        self._memoria = OrderedDict()
+        self._memoria_lock = threading.Lock()
+        self._init_db()
+
+    @contextmanager
+    def _get_connection(self):
+        """Context manager para conexiones thread-safe"""
+        with _db_lock:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                yield conn
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                raise e
+            finally:
+                conn.close()
+
+    def _init_db(self):
+        """Inicializa la tabla de respuestas (si falla, solo se usa la memoria)"""
+        try:
+            with self._get_connection() as conn:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS respuestas (
+                        clave TEXT PRIMARY KEY,
+                        respuesta TEXT NOT NULL,
+                        ts REAL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_respuestas_ts ON respuestas (ts)')
+        except sqlite3.Error as e:
+            logger.warning("Caché de Gemini sin persistencia: %s", e)
+
+    @staticmethod
+    def clave(modelo: str, prompt: str) -> str:
+        """Hash estable del par (modelo, prompt)"""
+        return hashlib.sha256(f"{modelo}|{prompt}".encode("utf-8")).hexdigest()
+
+    def _recordar(self, clave: str, respuesta: str, ts: float):
+        """Guarda en el LRU de memoria, descartando la entrada más antigua"""
+        with self._memoria_lock:
+            self._memoria[clave] = (respuesta, ts)
+            self._memoria.move_to_end(clave)
+            if len(self._memoria) > self.max_memoria:
+                self._memoria.popitem(last=False)
+
+    def get(self, modelo: str, prompt: str) -> Optional[str]:
+        """Obtiene una respuesta guardada o None"""
+        clave = self.clave(modelo, prompt)
+        vigente_desde = time.time() - self.ttl_segundos
+
+        with self._memoria_lock:
+            if clave in self._memoria:
+                respuesta, ts = self._memoria[clave]
+                if ts >= vigente_desde:
+                    self._memoria.move_to_end(clave)
+                    return respuesta
+                del self._memoria[clave]
+
+        try:
+            with self._get_connection() as conn:
+                fila = conn.execute(
+                    'SELECT respuesta, ts FROM respuestas WHERE clave = ? AND ts >= ?',
+                    (clave, vigente_desde)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+
+        if fila:
+            self._recordar(clave, fila[0], fila[1])
+            return fila[0]
+        return None
+
+    def set(self, modelo: str, prompt: str, respuesta: str):
+        """Guarda una respuesta en memoria y en disco; cada `podar_cada` inserciones poda la tabla"""
+        clave = self.clave(modelo, prompt)
+        ahora = time.time()
+        self._recordar(clave, respuesta, ahora)
+
+        try:
+            with self._get_connection() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO respuestas (clave, respuesta, ts) VALUES (?, ?, ?)',
+                    (clave, respuesta, ahora)
+                )
+                # Dentro de la conexión: _db_lock protege también el contador
+                self._sin_podar += 1
+                if self._sin_podar >= self.podar_cada:
+                    self._sin_podar = 0
+                    conn.execute('DELETE FROM respuestas WHERE ts < ?', (ahora - self.ttl_segundos,))
+                    conn.execute(
+                        'DELETE FROM respuestas WHERE clave IN '
+                        '(SELECT clave FROM respuestas ORDER BY ts DESC LIMIT -1 OFFSET ?)',
+                        (self.max_filas,)
+                    )
+        except sqlite3.Error as e:
+            logger.warning("No se pudo persistir respuesta de Gemini en caché: %s", e)
+
+    def borrar(self, modelo: str, prompt: str):
+        """Elimina una respuesta de memoria y de disco"""
+        clave = self.clave(modelo, prompt)
+        with self._memoria_lock:
+            self._memoria.pop(clave, None)
+
+        try:
+            with self._get_connection() as conn:
+                conn.execute('DELETE FROM respuestas WHERE clave = ?', (clave,))
+        except sqlite3.Error:
+            pass
+
+    def get_or_call(self, modelo: str, prompt: str, llamar: Callable[[], str],
+                    procesar: Callable[[str], T]) -> T:
+        """
+        Devuelve procesar(respuesta) de la respuesta guardada, o ejecuta `llamar()`.
+        La respuesta nueva solo se guarda si `procesar` la acepta (no lanza
+        excepción): una respuesta mal formada no queda en caché. Una guardada
+        que `procesar` rechaza se borra y se vuelve a llamar.
+        Los errores de `llamar()` y de `procesar()` se propagan.
+        """
+        respuesta = self.get(modelo, prompt)
+        if respuesta is not None:
+            try:
+                return procesar(respuesta)
+            except Exception:
+                self.borrar(modelo, prompt)
+
+        respuesta = llamar()
+        resultado = procesar(respuesta)
+        self.set(modelo, prompt, respuesta)
+        return resultado
+
+
+# Instancia global (se crea en el primer uso). Su propio lock: _db_lock no sirve
+# aquí porque el constructor lo toma al inicializar la base de datos
+_cache_instance: Optional[GeminiCache] = None
+_instancia_lock = threading.Lock()
+
+
+def get_gemini_cache() -> GeminiCache:
+    """Obtiene la instancia global de la caché de Gemini"""
+    global _cache_instance
+    if _cache_instance is None:
+        with _instancia_lock:
+            if _cache_instance is None:
+                _cache_instance = GeminiCache()
+    return _cache_instance
@@ -712,9 +712,9 @@ _______________________________
         return {
             "vicios_detectados": vicios_validados,
             "total_vicios": len(vicios_validados),
-            "vicios_alta_probabilidad": len([v for v in vicios_validados if v["probabilidad_acogimiento"] >= 0.7]),
-            "vicios_media_probabilidad": len([v for v in vicios_validados if 0.4 <= v["probabilidad_acogimiento"] < 0.7]),
-            "vicios_baja_probabilidad": len([v for v in vicios_validados if v["probabilidad_acogimiento"] < 0.4]),
+            "vicios_alta_probabilidad": sum(1 for v in vicios_validados if v["probabilidad_acogimiento"] >= 0.7),
+            "vicios_media_probabilidad": sum(1 for v in vicios_validados if 0.4 <= v["probabilidad_acogimiento"] < 0.7),
+            "vicios_baja_probabilidad": sum(1 for v in vicios_validados if v["probabilidad_acogimiento"] < 0.4),
             "observaciones_sugeridas": observaciones_sugeridas,
             "procede_formular_observaciones": len(observaciones_sugeridas) > 0,
             "resumen": self._generar_resumen_analisis(vicios_validados),
@@ -1043,9 +1043,9 @@ _______________________________
         if not vicios:
             return "No se detectaron vicios observables en las bases."
         
-        alta = len([v for v in vicios if v.get("probabilidad_acogimiento", 0) >= 0.7])
-        media = len([v for v in vicios if 0.4 <= v.get("probabilidad_acogimiento", 0) < 0.7])
-        baja = len([v for v in vicios if v.get("probabilidad_acogimiento", 0) < 0.4])
+        alta = sum(1 for v in vicios if v.get("probabilidad_acogimiento", 0) >= 0.7)
+        media = sum(1 for v in vicios if 0.4 <= v.get("probabilidad_acogimiento", 0) < 0.7)
+        baja = sum(1 for v in vicios if v.get("probabilidad_acogimiento", 0) < 0.4)
         
         resumen = f"Se detectaron {len(vicios)} posibles vicios: "
         resumen += f"{alta} de alta probabilidad de acogimiento, "
@@ -6,13 +6,1193 @@ Usa PyMuPDF (fitz) para extracción de texto y Gemini para análisis inteligente
 """
 import os
 import re
+import bisect
+import heapq
+import functools
+import logging
 import fitz  # PyMuPDF
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import json
+from concurrent.futures import ProcessPoolExecutor
 
 from google import genai
 from config import Config
+from engine.gemini_cache import get_gemini_cache
+
+# RE2 (opcional): motor sin backtracking, recorre el texto en tiempo lineal
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Hyperscan (opcional): busca todas las palabras clave de las reglas en una sola pasada
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
+
+# Trazas de la extracción por patrones (a nivel DEBUG: en lotes no escriben nada
+# salvo que se configure logging) y del análisis con Gemini / reglas (INFO y
+# superiores: sin tomar el lock de stdout en cada documento)
+logger = logging.getLogger(__name__)
+
+# Flags de get_text("dict") para tablas: los de por defecto, sin incrustar imágenes
+_FLAGS_DICT_SIN_IMAGENES = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+# =============================================================================
+# PATRONES PRECOMPILADOS
+# Se compilan una sola vez al importar el módulo. El orden de cada lista es la
+# prioridad: gana el primer patrón que coincide y supera la validación.
+# =============================================================================
+
+# Con USE_RE2=true se compila con RE2. Ojo: en RE2 \s y \d son solo ASCII
+# (no cubren, por ejemplo, el espacio no separable que a veces trae el PDF).
+_USAR_RE2 = Config.USE_RE2 and RE2_AVAILABLE
+
+# RE2 no acepta flags de `re`; se traducen a flags en línea
+_FLAGS_EN_LINEA = ((re.IGNORECASE, 'i'), (re.DOTALL, 's'), (re.MULTILINE, 'm'))
+
+
+def _compilar_patron(patron: str, flags: int = 0):
+    """
+    Compila un patrón con RE2 si está habilitado, o con `re` en caso contrario.
+    Los patrones que RE2 no soporta (lookahead, etc.) se quedan en `re`.
+    """
+    if _USAR_RE2:
+        en_linea = ''.join(letra for flag, letra in _FLAGS_EN_LINEA if flags & flag)
+        try:
+            return re2.compile(f'(?{en_linea}){patron}' if en_linea else patron)
+        except re2.error:
+            logger.debug("RE2 no soporta el patrón, se compila con re: %s", patron[:60])
+    return re.compile(patron, flags)
+
+
+def _compilar(patrones: List[str], flags: int = 0) -> Tuple[re.Pattern, ...]:
+    """Compila una lista de patrones conservando su orden de prioridad"""
+    return tuple(_compilar_patron(patron, flags) for patron in patrones)
+
+
+# Apóstrofe de millones (1'234,567) y espacios: se descartan antes de interpretar el monto
+_SIN_APOSTROFES = str.maketrans('', '', "' ")
+
+
+def _compilar_etiquetados(pares: List[Tuple[str, str]], flags: int = 0) -> Tuple[Tuple[re.Pattern, str], ...]:
+    """Compila pares (patrón, etiqueta) conservando la etiqueta y el orden"""
+    return tuple((_compilar_patron(patron, flags), etiqueta) for patron, etiqueta in pares)
+
+
+def _compilar_con_literal(pares: List[Tuple[Optional[str], str]], flags: int = 0) -> Tuple[Tuple[Optional[str], re.Pattern], ...]:
+    """
+    Como _compilar, pero cada patrón va acompañado de un literal en minúsculas
+    que toda coincidencia contiene (None si no lo hay). Si el literal no está en
+    el texto en minúsculas, el patrón no puede coincidir y no se ejecuta.
+    """
+    return tuple((literal, _compilar_patron(patron, flags)) for literal, patron in pares)
+
+
+def _candidatos(patrones: Tuple[Tuple[Optional[str], re.Pattern], ...], texto_lower: str):
+    """Patrones (en orden de prioridad) cuyo literal aparece en el texto en minúsculas"""
+    return (patron for literal, patron in patrones if literal is None or literal in texto_lower)
+
+
+def _parsear_monto(texto: str) -> float:
+    """
+    Convierte un monto en soles a float: '1,234,567.89', "1'234,567.89",
+    '1.234.567,89' (formato peruano) o '850,000'.
+    
+    Si hay coma y punto, el decimal es el que aparece último. Si hay un solo tipo
+    de separador, es decimal solo si aparece una vez y no va seguido de 3 dígitos.
+    """
+    limpio = texto.translate(_SIN_APOSTROFES)
+    coma, punto = limpio.rfind(','), limpio.rfind('.')
+    if coma == -1 and punto == -1:
+        return float(limpio)
+    
+    if coma != -1 and punto != -1:
+        decimal = ',' if coma > punto else '.'
+    else:
+        decimal = ',' if coma != -1 else '.'
+        if limpio.count(decimal) > 1 or len(limpio) - max(coma, punto) == 4:
+            # Solo separadores de miles
+            return float(limpio.replace(decimal, ''))
+    
+    entero, _, fraccion = limpio.rpartition(decimal)
+    return float(entero.replace(',', '').replace('.', '') + '.' + fraccion)
+
+
+# --- extraer_datos_bases ---
+_BASES_PATRONES_VR = _compilar_con_literal([
+    # Formato: "VALOR REFERENCIAL: S/ 1,234,567.89"
+    ('referencial', r'VALOR\s+REFERENCIAL[:\s]+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)'),
+    # Formato: "V.R.: S/. 1,234,567.89"
+    (None, r'V\.?R\.?[:\s]+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)'),
+    # Formato con soles al final
+    ('referencial', r'VALOR\s+REFERENCIAL[:\s]+([\d,]+(?:\.\d{2})?)\s*(?:SOLES|NUEVOS SOLES)'),
+    # Formato tabla: "Valor Referencial   S/ 1,234,567.89"
+    ('referencial', r'(?:VALOR|Valor)\s+(?:REFERENCIAL|Referencial)\s+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)'),
+    # Formato: "El valor referencial es de S/ 1,234,567.89"
+    ('referencial', r'valor\s+referencial\s+(?:es\s+(?:de\s+)?)?S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)'),
+    # Formato corto: "VR S/ 1,234,567.89"
+    ('vr', r'\bVR\b[:\s]+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)'),
+    # Formato: "monto referencial S/ 1,234,567.89"
+    ('referencial', r'[Mm]onto\s+[Rr]eferencial[:\s]+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)'),
+    # Formato: "PRESUPUESTO REFERENCIAL: S/ 1,234,567.89"
+    ('presupuesto', r'PRESUPUESTO\s+REFERENCIAL[:\s]+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)'),
+    # Formato con punto de miles y coma decimal (peruano)
+    ('referencial', r'VALOR\s+REFERENCIAL[:\s]+S/?\s*\.?\s*([\d.]+,\d{2})'),
+    # Buscar montos grandes con S/ antes (más de 100,000)
+    (None, r'\bS/?\s*\.?\s*(\d{1,3}(?:,\d{3}){2,}(?:\.\d{2})?)\b'),
+    # Formato: "1,234,567.89 (VALOR REFERENCIAL)"
+    ('referencial', r'([\d,]+(?:\.\d{2})?)\s*\(?VALOR\s+REFERENCIAL\)?'),
+    # Formato: "S/. 1'234,567.89" (con apóstrofe para millones)
+    ("'", r"S/?\s*\.?\s*(\d{1,3}'\d{3},\d{3}(?:\.\d{2})?)"),
+    # Formato: buscar en contexto de "presupuesto" o "monto"
+    (None, r'(?:presupuesto|monto)\s+(?:total|base)?[:\s]+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)'),
+], re.IGNORECASE)
+
+_BASES_PATRONES_PROCESO = _compilar_con_literal([
+    (None, r'(?:LP|PA|CD|AS|SIE|CP|AMC)\s*N[°º]?\s*([\d\-]+\s*-\s*\d{4})'),
+    (None, r'(?:LICITACI[ÓO]N|PROCEDIMIENTO)\s+(?:P[ÚU]BLICA|ABREVIADO)\s*N[°º]?\s*([\d\-]+(?:-\d{4})?)'),
+    ('proceso', r'PROCESO\s*N[°º]?\s*([\d\-]+(?:-\d{4})?)'),
+    ('adjudicaci', r'(?:ADJUDICACI[ÓO]N)\s+(?:SIMPLIFICADA|DIRECTA)\s*N[°º]?\s*([\d\-]+)'),
+    (None, r'N[°º]\s*([\d]+\s*-\s*\d{4})\s*-?\s*(?:LP|PA|AS|CD|SIE)'),
+    ('procedimiento', r'PROCEDIMIENTO\s+DE\s+SELECCI[ÓO]N\s*N[°º]?\s*([\d\-]+)'),
+    ('concurso', r'CONCURSO\s+P[ÚU]BLICO\s*N[°º]?\s*([\d\-]+)'),
+    ('-', r'([A-Z]{2,3}-\d+-\d{4}-[A-Z]+)'),  # Formato: AS-001-2025-ENTIDAD
+], re.IGNORECASE)
+
+_BASES_PATRONES_PLAZO = _compilar_con_literal([
+    ('plazo', r'PLAZO\s+(?:DE\s+)?EJECUCI[ÓO]N[:\s]+(\d+)\s*(?:D[ÍI]AS)'),
+    ('plazo', r'PLAZO\s+(?:DE\s+)?(?:ENTREGA|PRESTACI[ÓO]N)[:\s]+(\d+)\s*(?:D[ÍI]AS)'),
+    ('plazo', r'(?:PLAZO|Plazo)[:\s]+(\d+)\s*(?:d[íi]as\s+)?(?:calendario|h[áa]biles)'),
+    ('plazo', r'(?:plazo|PLAZO)\s+(?:m[áa]ximo|total)[:\s]+(\d+)\s*(?:d[íi]as)'),
+    ('duraci', r'duraci[óo]n[:\s]+(\d+)\s*(?:d[íi]as)'),
+    (None, r'(?:en\s+un\s+plazo\s+de|dentro\s+de)\s+(\d+)\s*(?:d[íi]as)'),
+], re.IGNORECASE)
+
+_BASES_PATRONES_EXP = _compilar_con_literal([
+    ('postor', r'[Ee]xperiencia\s+(?:del\s+)?[Pp]ostor[:\s]+(?:S/?\s*\.?\s*)?([\d,]+(?:\.\d{2})?)'),
+    ('experiencia', r'[Ee]xperiencia\s+m[íi]nima[:\s]+(?:S/?\s*\.?\s*)?([\d,]+(?:\.\d{2})?)'),
+    ('monto', r'[Mm]onto\s+(?:facturado|acumulado)\s+(?:m[íi]nimo)?[:\s]+(?:S/?\s*\.?\s*)?([\d,]+(?:\.\d{2})?)'),
+    ('experiencia', r'acreditar\s+experiencia[^.]*(?:S/?\s*\.?\s*)([\d,]+(?:\.\d{2})?)'),
+    ('acumulado', r'(?:hasta|por)\s+(?:un\s+)?(?:monto|valor)\s+acumulado[^.]*(?:S/?\s*\.?\s*)([\d,]+(?:\.\d{2})?)'),
+], re.IGNORECASE)
+
+_BASES_PATRONES_PEN = _compilar_con_literal([
+    ('penalidad', r'[Pp]enalidad\s+(?:diaria|por\s+mora)?[:\s]+([\d.]+)\s*%'),
+    ('%', r'([\d.]+)\s*%\s*(?:diario|por\s+d[íi]a)\s*(?:de\s+)?(?:penalidad|mora)'),
+    ('penalidad', r'penalidad[^.]*([\d.]+)\s*%\s*(?:del\s+monto)'),
+    ('multa', r'multa\s+(?:diaria)?[:\s]+([\d.]+)\s*%'),
+], re.IGNORECASE)
+
+_BASES_SECCIONES_CLAVE = tuple((seccion, _compilar_con_literal(patrones, re.IGNORECASE)) for seccion, patrones in [
+    ("terminos_referencia", [('rminos', r'T[ÉE]RMINOS\s+DE\s+REFERENCIA'), ('tdr', r'TDR'), ('términos de referencia', r'TÉRMINOS DE REFERENCIA')]),
+    ("especificaciones_tecnicas", [('especificaciones', r'ESPECIFICACIONES\s+T[ÉE]CNICAS'), ('eett', r'EETT'), ('e.e.t.t', r'E\.E\.T\.T')]),
+    ("requisitos_calificacion", [('requisitos', r'REQUISITOS\s+DE\s+CALIFICACI[ÓO]N'), ('iii', r'CAP[ÍI]TULO\s+III')]),
+    ("factores_evaluacion", [('factores', r'FACTORES\s+DE\s+EVALUACI[ÓO]N'), ('iv', r'CAP[ÍI]TULO\s+IV')]),
+    ("penalidades", [('penalidades', r'PENALIDADES'), ('penalidades', r'CAP[ÍI]TULO.*PENALIDADES')]),
+    ("garantias", [('garant', r'GARANT[ÍI]AS'), ('fiel', r'GARANT[ÍI]A\s+DE\s+FIEL')]),
+])
+
+# --- _extraer_requisitos ---
+_REQ_ENCABEZADO = _compilar_patron(r'REQUISITOS\s+DE\s+CALIFICACI[ÓO]N', re.IGNORECASE)
+_REQ_FIN_SECCION = _compilar_patron(r'FACTORES|CAP[ÍI]TULO', re.IGNORECASE)
+_REQ_VENTANA = 50000  # Caracteres máximos de la sección a partir del encabezado
+# El tramo entre la etiqueta y el dato va acotado: un `.*?` sin límite recorre el
+# resto de la sección por cada etiqueta que no tiene dato
+_REQ_EXP_POSTOR = _compilar_patron(r'EXPERIENCIA\s+DEL\s+POSTOR.{0,500}?(?:S/?\.?\s*([\d,]+)|(\d+)\s*(?:contratos|servicios))', re.IGNORECASE | re.DOTALL)
+_REQ_PERSONAL = _compilar_patron(r'PERSONAL\s+(?:CLAVE|T[ÉE]CNICO).{0,200}?(\d+)\s*(?:a[ñn]os|meses)', re.IGNORECASE | re.DOTALL)
+
+# --- extraer_cuadro_evaluacion (nombre y tramo hasta el precio acotados, por lo mismo) ---
+_CUADRO_POSTOR = _compilar_patron(r'(?:POSTOR|EMPRESA|CONSORCIO)[:\s]+([A-Z\s\.]{1,80}).{0,300}?(?:PRECIO|MONTO)[:\s]+S/?\.?\s*([\d,]+(?:\.\d{2})?)', re.IGNORECASE | re.DOTALL)
+_CUADRO_GANADOR = _compilar_patron(r'(?:BUENA\s+PRO|ADJUDICADO|GANADOR)[:\s]+([A-Z\s\.]+)', re.IGNORECASE)
+
+# --- _extraer_factores ---
+_FACTORES_PATRON = _compilar_patron(r'(?:FACTOR|CRITERIO)\s+(?:DE\s+)?([A-Z\s]+)[:\s]+(?:HASTA\s+)?(\d+)\s*(?:PUNTOS|PTS)', re.IGNORECASE)
+
+# --- _extraer_numero_proceso / _extraer_entidad (análisis de fallback) ---
+_NUMERO_PROCESO_PATRONES = _compilar([
+    r'(?:LP|PA|CD|AS|SIE)\s*N[°º]?\s*([\d\-]+\s*-\s*\d{4})',
+    r'Procedimiento\s+N[°º]?\s*([\d\-]+)',
+], re.IGNORECASE)
+_ENTIDAD_PATRONES = _compilar([
+    r'(?:ENTIDAD|CONVOCANTE)[:\s]+([A-ZÁÉÍÓÚÑ\s]+)',
+    r'(?:MUNICIPALIDAD|GOBIERNO REGIONAL|MINISTERIO)[^\n]+',
+], re.IGNORECASE)
+
+# --- _extraer_datos_cuantificables (se aplican sobre el texto en minúsculas) ---
+_CUANT_PATRONES_VR = _compilar_con_literal([
+    ('referencial', r'valor\s+referencial[:\s]+s/?\.?\s*([\d,]+(?:\.\d{2})?)'),
+    (None, r'v\.?\s*r\.?[:\s]+s/?\.?\s*([\d,]+(?:\.\d{2})?)'),
+    ('presupuesto', r'presupuesto\s+(?:base|referencial)[:\s]+s/?\.?\s*([\d,]+(?:\.\d{2})?)'),
+    ('referencial', r'monto\s+referencial[:\s]+s/?\.?\s*([\d,]+(?:\.\d{2})?)'),
+    ('estimado', r'valor\s+estimado[:\s]+s/?\.?\s*([\d,]+(?:\.\d{2})?)'),
+    ('referencial', r's/\.?\s*([\d,]+(?:\.\d{2})?)\s+(?:\(|soles).*valor\s+referencial'),
+    # Patrones con formato diferente
+    ('referencial', r'referencial[:\s]+(?:s/?\.?\s*)?([\d]{1,3}(?:,\d{3})+(?:\.\d{2})?)'),
+])
+
+_CUANT_PATRONES_EXP_POSTOR = _compilar_con_literal([
+    ('postor', r'experiencia\s+(?:del\s+)?postor[:\s]+(?:s/?\.?\s*)?([\d,]+(?:\.\d{2})?)'),
+    ('experiencia', r'experiencia\s+m[íi]nima[:\s]+(?:s/?\.?\s*)?([\d,]+(?:\.\d{2})?)'),
+    ('monto', r'monto\s+(?:facturado|acumulado)[^.]*(?:s/?\.?\s*)?([\d,]+(?:\.\d{2})?)'),
+    ('experiencia', r'acreditaci[óo]n\s+de\s+experiencia[^.]*(?:s/?\.?\s*)?([\d,]+(?:\.\d{2})?)'),
+    ('contratos', r'contratos\s+(?:equivalentes|por\s+un\s+monto)[^.]*(?:s/?\.?\s*)?([\d,]+(?:\.\d{2})?)'),
+    ('experiencia', r'experiencia[^.]*(?:igual\s+o\s+mayor\s+a|no\s+menor\s+a)[^.]*(?:s/?\.?\s*)?([\d,]+(?:\.\d{2})?)'),
+    ('referencial', r'(?:una|1)\s+(?:\(1\)\s+)?vez\s+el\s+valor\s+referencial'),  # Caso especial: 1x VR
+    ('referencial', r'(?:dos|2)\s+(?:\(2\)\s+)?veces?\s+el\s+valor\s+referencial'),  # 2x VR
+])
+
+_CUANT_PATRONES_PERSONAL = _compilar_con_literal([
+    ('experiencia', r'(?:profesional|personal|residente|especialista)[^.]{0,50}([\d]+)\s*a[ñn]os?\s+(?:de\s+)?experiencia'),
+    ('experiencia', r'experiencia[^.]{0,30}([\d]+)\s*a[ñn]os?[^.]*(?:profesional|titulado|colegiado)'),
+    ('experiencia', r'(?:m[íi]nimo\s+)?([\d]+)\s*a[ñn]os?\s+(?:de\s+)?experiencia[^.]*(?:profesional|espec[íi]fica)'),
+    ('haber', r'haber\s+(?:ejercido|trabajado)[^.]{0,30}([\d]+)\s*a[ñn]os?'),
+])
+
+_CUANT_PATRONES_PENALIDAD = _compilar_con_literal([
+    ('penalidad', r'penalidad[^.]*?([\d]+(?:[.,]\d+)?)\s*%'),
+    ('penalidad', r'([\d]+(?:[.,]\d+)?)\s*%[^.]*penalidad\s+diaria'),
+    ('penalidad', r'penalidad\s+por\s+mora[^.]*?([\d]+(?:[.,]\d+)?)\s*%'),
+])
+
+_CUANT_PATRONES_PLAZO = _compilar_con_literal([
+    ('plazo', r'plazo\s+(?:de\s+)?ejecuci[óo]n[:\s]+([\d]+)\s*d[íi]as?'),
+    ('plazo', r'plazo[:\s]+([\d]+)\s*d[íi]as?\s*(?:calendario|h[áa]biles)?'),
+    ('duraci', r'duraci[óo]n[:\s]+([\d]+)\s*d[íi]as?'),
+    (None, r'(?:en\s+un\s+plazo\s+de|en|dentro\s+de)[:\s]+([\d]+)\s*d[íi]as?'),
+    ('plazo', r'([\d]+)\s*d[íi]as?\s*(?:calendario|h[áa]biles)?[^.]*plazo'),
+])
+
+_CUANT_PATRONES_GARANTIA = _compilar_con_literal([
+    ('fiel', r'garant[íi]a\s+(?:de\s+)?fiel\s+cumplimiento[^.]*?([\d]+)\s*%'),
+    ('fiel', r'([\d]+)\s*%[^.]*garant[íi]a\s+(?:de\s+)?fiel'),
+])
+
+
+# --- _detectar_vicios_por_reglas (sobre el texto en minúsculas, salvo marcas) ---
+# Se pasa el documento a minúsculas una vez en lugar de compilar con IGNORECASE:
+# sre compara cada carácter plegándolo y las reglas corren unas 4 veces más
+# lento, mientras que texto.lower() cuesta milisegundos y sirve a los filtros
+# por palabra clave (`in`), que no saben ignorar mayúsculas
+# Los capítulos se buscan en el texto original de la página: los títulos
+# numerados se reconocen por ir en mayúsculas (sin IGNORECASE, "d. texto"
+# o "1.5 días" en minúsculas pasarían por título)
+_CAPITULO_PATRONES = _compilar([
+    r'(capítulo\s+[ivxlcd]+[^\n]*)',
+    r'(cap[íi]tulo\s+\d+[^\n]*)',
+    r'(secci[óo]n\s+[ivxlcd]+[^\n]*)',
+], re.IGNORECASE) + _compilar([
+    r'(\d+\.\d+\.?\s*[A-ZÁÉÍÓÚ][^\n]+)',  # 3.1 REQUISITOS...
+    r'([IVXLCD]+\.\s*[A-ZÁÉÍÓÚ][^\n]+)',  # III. FACTORES...
+])
+
+_CAPITULO_EN_PAGINA = _compilar_patron(r'(capítulo\s+[ivxlcd\d]+[^\n]*|[\d\.]+\s*[A-ZÁÉÍÓÚ][^\n]{0,50})', re.IGNORECASE)
+
+# En las reglas el tramo entre palabras clave es [^.]{0,300} y no [^.]*: sin
+# punto (listas, tablas) el retroceso crecía con el cuadrado del párrafo
+# (no se parte el texto en oraciones: los "s/." y "n°." también son puntos,
+# y recorrer las oraciones en Python por cada regla sale más caro que el tope)
+# 1. Direccionamiento por marcas
+_VICIOS_MARCA = _compilar_con_literal([
+    ('marca', r'marca\s*[:\s]\s*([A-Za-z0-9]+)'),
+    ('modelo', r'modelo\s*[:\s]\s*([A-Za-z0-9\-]+)'),
+    ('fabricante', r'fabricante\s*[:\s]\s*([A-Za-z]+)'),
+    ('tipo', r'tipo\s*[:\s]\s*([A-Za-z]+\s+[A-Za-z]+)'),
+], re.IGNORECASE)
+# Caracteres tras la marca en los que se busca "o equivalente" (si la oración no termina antes)
+_MARCA_VENTANA = 300
+
+# 2. Experiencia excesiva del postor
+_VICIOS_EXP_POSTOR = _compilar([
+    r'experiencia\s+(?:del\s+)?postor[:\s]+(?:s/?\.?\s*)?(\d[\d,\.]+)',
+    r'experiencia\s+m[íi]nima[:\s]+(?:s/?\.?\s*)?(\d[\d,\.]+)',
+    r'monto\s+(?:facturado|acumulado)[^.]{0,300}?(?:s/?\.?\s*)?(\d[\d,\.]+)',
+    r'(\d[\d,\.]+)\s*(?:soles|s/\.?)\s*(?:de\s+)?experiencia',
+])
+
+# 3. Experiencia excesiva del personal
+_VICIOS_EXP_PERSONAL = _compilar([
+    r'experiencia\s+(?:del\s+)?(?:profesional|personal|residente|especialista)[^.]{0,300}?(\d+)\s*a[ñn]os',
+    r'profesional[^.]{0,300}?(?:m[íi]nimo\s+)?(\d+)\s*a[ñn]os',
+    r'(?:ingeniero|arquitecto|abogado|contador)[^.]{0,300}?(\d+)\s*a[ñn]os\s*(?:de\s+)?experiencia',
+    r'experiencia[^.]{0,300}?(\d+)\s*a[ñn]os[^.]{0,300}(?:profesional|titulado)',
+])
+
+# 4. Profesiones específicas restrictivas
+_VICIOS_PROFESIONES = _compilar_etiquetados([
+    (r'(?:colegiatura|colegiado)\s+(?:activo|vigente|hábil)', "colegiatura activa"),
+    (r'(?:maestr[íi]a|doctorado)\s+(?:en|de)', "grado académico avanzado"),
+    (r'(?:diplomado|especialización)\s+(?:en|de)', "diplomado/especialización"),
+    (r'(?:certificación|certificado)\s+(?:de|en|como)\s+(?!calidad)', "certificación profesional específica"),
+])
+
+# 5. Restricciones a consorcios
+_VICIOS_CONSORCIO = _compilar_con_literal([
+    ('consorcio', r'no\s+(?:se\s+)?permite[n]?\s+consorcio'),
+    ('consorcio', r'prohibi(?:do|da|ción)[^.]{0,300}consorcio'),
+    ('consorcio', r'consorcio[^.]{0,300}(?:no|prohib)'),
+    (None, r'(?:únicamente|solo)\s+(?:personas?\s+)?(?:natural|jurídica)'),
+    ('presentarse', r'presentarse\s+(?:de\s+)?manera\s+(?:individual|independiente)'),
+])
+
+# 6. Plazos irreales
+_VICIOS_PLAZO = _compilar([
+    r'plazo\s+(?:de\s+)?(?:ejecuci[óo]n|entrega|prestaci[óo]n)[:\s]+(\d+)\s*(?:d[íi]as)',
+    r'(?:en\s+)?(\d+)\s*(?:d[íi]as)\s*(?:calendario|h[áa]biles)?\s*(?:de\s+)?(?:plazo|ejecución)',
+    r'duraci[óo]n[:\s]+(\d+)\s*(?:d[íi]as)',
+])
+
+# 7. Penalidades excesivas
+_VICIO_PENALIDAD = _compilar_patron(r'penalidad[^.]{0,300}?(\d+(?:[,\.]\d+)?)\s*%')
+
+# 8. Certificaciones como requisito obligatorio
+# (toda coincidencia contiene el número de la norma, que es la última palabra de la etiqueta)
+_VICIOS_CERTIFICACION = _compilar_etiquetados([
+    (r'iso\s*9001[^.]{0,300}', "ISO 9001"),
+    (r'iso\s*14001[^.]{0,300}', "ISO 14001"),
+    (r'iso\s*45001[^.]{0,300}', "ISO 45001"),
+    (r'ohsas\s*18001[^.]{0,300}', "OHSAS 18001"),
+    (r'iso\s*27001[^.]{0,300}', "ISO 27001"),
+])
+
+# 9. Restricciones geográficas
+_VICIOS_GEO = _compilar([
+    r'domicili(?:o|ado)\s+(?:en|dentro\s+de)\s+([A-Za-záéíóúñ\s]+)',
+    r'(?:oficina|local|establecimiento)\s+(?:en|dentro\s+de)\s+([A-Za-záéíóúñ\s]+)',
+    r'sede\s+(?:en|dentro\s+de)\s+([A-Za-záéíóúñ\s]+)',
+    r'ubicad[oa]\s+(?:en|dentro\s+de)\s+([A-Za-záéíóúñ\s]+)',
+])
+
+# 10. Factores de evaluación subjetivos
+_VICIOS_SUBJETIVOS = _compilar_etiquetados([
+    (r'(?:criterio|factor)\s+(?:de\s+)?(?:evaluación|calificación)[^.]{0,300}(?:subjetiv|discrecional|a\s+criterio)', "factor subjetivo"),
+    (r'(?:comité|evaluador)[^.]{0,300}(?:considerar[áa]|valorar[áa]|determinar[áa])', "discrecionalidad del evaluador"),
+    (r'(?:mejor|mayor)\s+(?:propuesta|presentación|creatividad)', "criterio de creatividad/presentación"),
+])
+
+# 11. Documentación excesiva
+_VICIOS_DOCS_INNECESARIOS = _compilar_etiquetados([
+    (r'carta\s+(?:de\s+)?(?:recomendación|referencia)', "cartas de recomendación"),
+    (r'fotos?\s+(?:del\s+)?(?:local|establecimiento|oficina)', "fotos del establecimiento"),
+    (r'(?:original|legalizad[oa])\s+(?:de|del)\s+(?:contrato|documento)', "documentos legalizados"),
+    (r'constancia\s+(?:de\s+)?(?:no\s+)?(?:adeudo|deuda)', "constancia de no adeudo"),
+])
+
+# 12. Equipamiento específico
+_VICIO_EQUIPAMIENTO = _compilar_patron(r'(?:equipamiento|maquinaria|veh[íi]culo)[^.]{0,300}(?:propio|propiedad|a\s+nombre)')
+
+# 13. Capacidad financiera excesiva (ratios)
+_VICIOS_FINANCIEROS = _compilar_etiquetados([
+    (r'(?:ratio|índice)\s+(?:de\s+)?liquidez[^.]{0,300}(?:mayor|superior|mínimo)\s+(?:a\s+)?(\d+(?:[.,]\d+)?)', "ratio de liquidez"),
+    (r'(?:ratio|índice)\s+(?:de\s+)?solvencia[^.]{0,300}(?:mayor|superior|mínimo)\s+(?:a\s+)?(\d+(?:[.,]\d+)?)', "ratio de solvencia"),
+    (r'(?:ratio|índice)\s+(?:de\s+)?endeudamiento[^.]{0,300}(?:menor|inferior|máximo)\s+(?:a\s+)?(\d+(?:[.,]\d+)?)', "ratio de endeudamiento"),
+    (r'capital\s+(?:social|de\s+trabajo)[^.]{0,300}(?:mayor|superior|mínimo)[^.]{0,300}s/?\.?\s*(\d[\d,\.]+)', "capital mínimo"),
+    (r'patrimonio\s+neto[^.]{0,300}(?:mayor|superior|mínimo)[^.]{0,300}s/?\.?\s*(\d[\d,\.]+)', "patrimonio mínimo"),
+])
+
+# 14. Condiciones leoninas o abusivas en contrato
+_VICIOS_LEONINAS = _compilar_etiquetados([
+    (r'renuncia[^.]{0,300}(?:derecho|reclam|demand)', "renuncia a derechos"),
+    (r'(?:no\s+procede|improcedente)[^.]{0,300}(?:ampliación|adicional|reclamo)', "exclusión de derechos de ampliación"),
+    (r'asume[^.]{0,300}(?:todo|cualquier)[^.]{0,300}riesgo', "asunción total de riesgos"),
+    (r'(?:sin\s+derecho|no\s+corresponde)[^.]{0,300}(?:gastos\s+generales|utilidad)', "exclusión de gastos generales"),
+    (r'bajo\s+(?:su\s+)?(?:exclusiva\s+)?responsabilidad', "responsabilidad exclusiva del contratista"),
+])
+
+# 15. Adelantos excesivos o condiciones
+_VICIO_ADELANTO = _compilar_patron(r'adelanto[^.]{0,300}?(\d+)\s*%')
+
+# 16. Garantías desproporcionadas
+_VICIO_GARANTIA = _compilar_patron(r'garantía[^.]{0,300}?(\d+)\s*%')
+
+# 17. Carta fianza de banco específico
+_VICIOS_BANCO = _compilar([
+    r'carta\s+fianza[^.]{0,300}(?:únicamente|solo|exclusivamente)[^.]{0,300}(?:banco|entidad)',
+    r'(?:banco|entidad\s+financiera)[^.]{0,300}(?:clase\s+a|primer\s+orden|rating)',
+    r'fianza[^.]{0,300}(?:emitida\s+por|de)[^.]{0,300}(?:banco\s+específico|determinado\s+banco)',
+])
+
+# 18. Seguro CAR/póliza excesiva
+_VICIO_SEGURO = _compilar_patron(r'(?:seguro|póliza)[^.]{0,300}?(\d+)\s*%[^.]{0,300}(?:monto|valor)')
+
+# 19. Subcontratación prohibida o restringida
+_VICIOS_SUBCONTRATO = _compilar([
+    r'(?:no\s+se\s+permite|prohib)[^.]{0,300}subcontrat',
+    r'subcontrat[^.]{0,300}(?:prohib|no\s+permit)',
+    r'ejecutar[^.]{0,300}(?:íntegramente|totalmente|directamente)[^.]{0,300}(?:sin|no)[^.]{0,300}subcontrat',
+])
+
+# 20. Condiciones de pago leoninas
+_VICIOS_PAGO = _compilar([
+    r'pago[^.]{0,300}(?:contra\s+)?conformidad[^.]{0,300}?(\d+)\s*días',
+    r'(\d+)\s*días[^.]{0,300}(?:para\s+)?pago',
+    r'pago[^.]{0,300}(?:previa|posterior)\s+a\s+la\s+liquidación',
+])
+
+# 21. Modificación unilateral del contrato
+_VICIOS_MODIFICACION = _compilar([
+    r'entidad[^.]{0,300}(?:podrá|puede)[^.]{0,300}modificar[^.]{0,300}(?:unilateral|sin\s+consentimiento)',
+    r'modificaci[óo]n[^.]{0,300}(?:a\s+criterio|discreción)[^.]{0,300}entidad',
+    r'reserva[^.]{0,300}(?:derecho|facultad)[^.]{0,300}modificar',
+])
+
+# 22. Causales de resolución excesivas
+_VICIOS_RESOLUCION = _compilar([
+    r'resoluci[óo]n[^.]{0,300}(?:automática|ipso\s+facto|de\s+pleno\s+derecho)',
+    r'(?:cualquier|todo)[^.]{0,300}incumplimiento[^.]{0,300}resoluci[óo]n',
+    r'resoluci[óo]n[^.]{0,300}sin\s+(?:previo\s+)?(?:aviso|requerimiento)',
+])
+
+# 23. Personal residente/clave excesivo
+_VICIO_PERSONAL = _compilar_patron(r'(?:personal\s+(?:clave|técnico|profesional)|staff)[^.]{0,300}?(\d+)\s*(?:profesionales|personas|integrantes)')
+
+# 24. Plazo de consultas/observaciones muy corto
+_VICIOS_CONSULTAS = _compilar([
+    r'(?:consultas|observaciones)[^.]{0,300}?(\d+)\s*(?:días?\s+)?(?:calendario|hábil)',
+    r'(\d+)\s*(?:días?\s+)?(?:calendario|hábil)[^.]{0,300}(?:consultas|observaciones)',
+])
+
+# 25. Forma de presentación restrictiva
+_VICIOS_PRESENTACION = _compilar([
+    r'(?:únicamente|solo|exclusivamente)[^.]{0,300}(?:físico|presencial|impreso)',
+    r'no\s+(?:se\s+)?acepta[^.]{0,300}(?:electrónico|digital|virtual)',
+    r'(?:original|fedatead)[^.]{0,300}obligatori',
+])
+
+# 26. Anticorrupción/compliance excesivo
+_VICIOS_COMPLIANCE = _compilar([
+    r'(?:certificación|certificado)[^.]{0,300}(?:anticorrupción|compliance|integridad)',
+    r'(?:programa|sistema)[^.]{0,300}(?:compliance|anticorrupción)[^.]{0,300}(?:obligatori|requisito)',
+    r'(?:obligatori|exig)[^.]{0,300}(?:código\s+de\s+ética|norma\s+ética)',
+])
+
+# 27. Valorización única o condicionada
+_VICIOS_VALORIZACION = _compilar([
+    r'valorización[^.]{0,300}(?:única|final|al\s+término)',
+    r'pago[^.]{0,300}(?:único|contra\s+entrega\s+total)',
+    r'no\s+(?:se\s+)?(?:procede|acepta)[^.]{0,300}valorización[^.]{0,300}(?:parcial|mensual)',
+])
+
+# 28. Requerimientos técnicos mínimos (RTM) excesivos
+_VICIOS_RTM = _compilar_etiquetados([
+    (r'(?:rtm|requerimiento\s+técnico\s+mínimo)[^.]{0,300}(?:capacidad|rendimiento)[^.]{0,300}?([\d,]+)\s*(?:gb|tb|ghz|mb)', "especificaciones técnicas altas"),
+    (r'(?:rtm|especificaci[óo]n)[^.]{0,300}(?:marca|modelo)\s+(?:específic|únic)', "marca/modelo específico en RTM"),
+    (r'(?:rtm|requerimiento)[^.]{0,300}(?:nuevo|sin\s+uso|reciente)', "producto nuevo obligatorio"),
+    (r'(?:rtm|requerimiento)[^.]{0,300}(?:original|no\s+compatible|genuino)', "original/genuino obligatorio"),
+])
+
+# 29. Requisitos de admisibilidad excesivos
+_VICIOS_ADMISIBILIDAD = _compilar_etiquetados([
+    (r'requisito\s+(?:de\s+)?admisibilidad[^.]{0,300}(?:carta\s+fianza|garantía\s+de\s+seriedad)', "garantía de seriedad como admisibilidad"),
+    (r'admisi[óo]n[^.]{0,300}(?:constancia|certificado)[^.]{0,300}(?:vigente|actualizado)', "documentos actualizados para admisión"),
+    (r'admisibilidad[^.]{0,300}(?:balance|estado\s+financiero)', "balance/estados financieros para admisión"),
+    (r'(?:no\s+ser\s+admitid|exclu)[^.]{0,300}(?:por\s+)?(?:error|omisión)\s+(?:formal|subsanable)', "exclusión por errores formales"),
+    (r'admisibilidad[^.]{0,300}(?:notarial|legalizado)', "documentos notariales para admisión"),
+])
+
+# 30. Factores de evaluación subjetivos o mal diseñados
+_VICIOS_FACTORES = _compilar_etiquetados([
+    (r'factor\s+(?:de\s+)?evaluación[^.]{0,300}(?:a\s+criterio|discreción|consideración)', "factor subjetivo"),
+    (r'puntaje[^.]{0,300}(?:calidad|presentación|creatividad)', "criterio de calidad subjetivo"),
+    (r'(?:metodología|plan\s+de\s+trabajo)[^.]{0,300}(?:mejor|más\s+completo)', "metodología sin criterios claros"),
+    (r'factor[^.]{0,300}(?:100|90|80)\s*(?:puntos|%)[^.]{0,300}experiencia', "peso excesivo en experiencia"),
+    (r'evalua(?:ción|rá)[^.]{0,300}(?:presentación|formato|estética)', "evaluación de presentación"),
+])
+
+# 31. Metodología de evaluación técnica defectuosa
+_VICIOS_METODOLOGIA = _compilar_etiquetados([
+    (r'puntaje\s+técnico[^.]{0,300}(?:mínimo|aprobatorio)[^.]{0,300}?([\d]+)', "puntaje mínimo alto"),
+    (r'evalua(?:ción|rá)\s+técnic[^.]{0,300}(?:eliminatori|excluyente)', "evaluación técnica eliminatoria"),
+    (r'propuesta\s+técnica[^.]{0,300}(?:descartad|rechazad)[^.]{0,300}(?:por|si)', "descarte técnico estricto"),
+])
+
+# 32. Términos de referencia (TDR) mal definidos
+_VICIOS_TDR = _compilar_etiquetados([
+    (r't[ée]rminos\s+de\s+referencia[^.]{0,300}(?:según|conforme)[^.]{0,300}entidad', "TDR a criterio de entidad"),
+    (r'(?:alcance|prestaci[óo]n)[^.]{0,300}(?:y/o\s+)?(?:otros|adicionales)\s+que\s+(?:la\s+entidad|se)', "alcance abierto"),
+    (r'(?:podr[áa]|podr[íi]a)[^.]{0,300}(?:solicitar|requerir)[^.]{0,300}(?:adicional|otros)', "prestaciones adicionales indefinidas"),
+    (r'(?:actividades|trabajos)[^.]{0,300}(?:no\s+previst|complement)', "actividades no previstas"),
+])
+
+# 33. Capacidad técnica y profesional excesiva
+_VICIOS_CAPACIDAD = _compilar_etiquetados([
+    (r'capacidad\s+técnica[^.]{0,300}?([\d]+)\s*(?:obras|servicios|contratos)[^.]{0,300}similar', "cantidad de contratos similares alta"),
+    (r'(?:igual|idéntico)[^.]{0,300}(?:servicio|obra|bien)', "experiencia idéntica requerida"),
+    (r'(?:mismo\s+)?(?:sector|rubro|giro)[^.]{0,300}(?:obligatori|requerid)', "mismo sector obligatorio"),
+    (r'(?:cliente|entidad)[^.]{0,300}(?:público|estatal)[^.]{0,300}(?:obligatori|únicamente)', "solo clientes públicos"),
+])
+
+# 34. Documentos de presentación obligatoria excesivos
+_VICIOS_DOCUMENTOS = _compilar_etiquetados([
+    (r'(?:obligatori|present)[^.]{0,300}(?:curriculum|cv|hoja\s+de\s+vida)', "CV obligatorio"),
+    (r'(?:obligatori|present)[^.]{0,300}(?:brochure|catálogo|portafolio)', "catálogo/brochure obligatorio"),
+    (r'(?:copia|fotocopia)[^.]{0,300}(?:legalizada|certificada|notarial)', "copias legalizadas"),
+    (r'(?:documento|constancia)[^.]{0,300}(?:apostillad)', "apostilla requerida"),
+    (r'(?:traducción\s+)?(?:oficial|certificada)', "traducción oficial"),
+])
+
+# 35. Criterios de desempate no claros
+_VICIOS_DESEMPATE = _compilar_etiquetados([
+    (r'desempate[^.]{0,300}(?:a\s+criterio|discreción|sorteo)', "desempate subjetivo"),
+    (r'(?:empate|igualdad)[^.]{0,300}(?:no\s+se\s+establece|sin\s+criterio)', "sin criterio de desempate"),
+])
+
+# 36. Objeto contractual mal definido
+_VICIOS_OBJETO = _compilar_etiquetados([
+    (r'objeto[^.]{0,300}(?:y/o|u\s+otros|entre\s+otros)', "objeto contractual ambiguo"),
+    (r'(?:incluye|comprende)[^.]{0,300}(?:todo|cualquier)[^.]{0,300}(?:necesari|requerid)', "alcance abierto"),
+    (r'(?:prestaciones|actividades)[^.]{0,300}(?:complement|adicional|conexas)', "prestaciones conexas indefinidas"),
+])
+
+# 37. Habilitación profesional excesiva
+_VICIOS_HABILITACION = _compilar_etiquetados([
+    (r'habilitaci[óo]n[^.]{0,300}(?:vigente|activa)[^.]{0,300}(?:colegio|institución)', "habilitación profesional específica"),
+    (r'(?:inscripci[óo]n|registro)[^.]{0,300}(?:obligatori|requerid)[^.]{0,300}(?:cámar|asociación|gremio)', "inscripción en gremio"),
+    (r'(?:rne|rnp|sunat)[^.]{0,300}(?:específic|determinad)', "registro específico no necesario"),
+])
+
+# 38. Ponderación técnica/económica desequilibrada
+# El lookahead descarta de entrada los "peso" sin un "%" en la misma oración: sin él,
+# cada uno recorría sus tres tramos aunque la regla no pudiera coincidir
+_VICIO_PONDERACION = _compilar_patron(r'(?:ponderaci[óo]n|peso)(?=[^.%]{0,1000}%)[^.]{0,300}(?:técnic|económic)[^.]{0,300}?(\d+)[^.]{0,300}%')
+
+# 39. Visita técnica obligatoria
+_VICIOS_VISITA = _compilar([
+    r'visita\s+(?:técnica|de\s+campo)[^.]{0,300}(?:obligatori|indispensable)',
+    r'(?:obligatori|indispensable)[^.]{0,300}visita\s+(?:al\s+)?(?:lugar|sitio|obra)',
+    r'no\s+(?:se\s+)?admitir[áa][^.]{0,300}(?:sin|que\s+no)[^.]{0,300}visita',
+])
+
+# 40. Muestras físicas obligatorias
+_VICIOS_MUESTRAS = _compilar([
+    r'muestra\s+(?:física|original)[^.]{0,300}(?:obligatori|present)',
+    r'prototipo[^.]{0,300}(?:obligatori|present|entregar)',
+    r'(?:obligatori|present)[^.]{0,300}(?:muestra|prototipo|ejemplar)',
+])
+
+# 41. Plazo de validez de oferta excesivo
+_VICIO_VALIDEZ = _compilar_patron(r'(?:validez|vigencia)\s+(?:de\s+)?(?:la\s+)?(?:oferta|propuesta)[^.]{0,300}?(\d+)\s*(?:días|meses)')
+
+# 42. Cronograma con plazos insuficientes
+_VICIOS_CRONOGRAMA = _compilar_etiquetados([
+    (r'(?:registro|inscripción)\s+(?:de\s+)?participantes[^.]{0,300}?(\d+)\s*días?', "registro de participantes"),
+    (r'presentaci[óo]n\s+(?:de\s+)?(?:propuestas|ofertas)[^.]{0,300}?(\d+)\s*días?', "presentación de propuestas"),
+])
+
+
+def _solo_patrones(grupo) -> List:
+    """Extrae los patrones de un grupo (patrón suelto, tupla de patrones o de pares con etiqueta/literal)"""
+    if not isinstance(grupo, tuple):
+        return [grupo]
+    return [
+        parte
+        for item in grupo
+        for parte in (item if isinstance(item, tuple) else (item,))
+        if not isinstance(parte, str) and parte is not None
+    ]
+
+
+# Todas las reglas que se evalúan sobre texto_lower (la de marcas va sobre el texto original)
+# No se funden en una sola alternancia de `re`: finditer devuelve matches no
+# solapados (una regla tapa a otra en el mismo tramo) y sre prueba cada rama
+# en cada posición, así que no es una pasada única y resulta más lenta
+_VICIOS_SOBRE_MINUSCULAS = tuple(
+    patron
+    for grupo in (
+        _VICIOS_EXP_POSTOR, _VICIOS_EXP_PERSONAL, _VICIOS_PROFESIONES, _VICIOS_CONSORCIO,
+        _VICIOS_PLAZO, _VICIO_PENALIDAD, _VICIOS_CERTIFICACION, _VICIOS_GEO,
+        _VICIOS_SUBJETIVOS, _VICIOS_DOCS_INNECESARIOS, _VICIO_EQUIPAMIENTO, _VICIOS_FINANCIEROS,
+        _VICIOS_LEONINAS, _VICIO_ADELANTO, _VICIO_GARANTIA, _VICIOS_BANCO, _VICIO_SEGURO,
+        _VICIOS_SUBCONTRATO, _VICIOS_PAGO, _VICIOS_MODIFICACION, _VICIOS_RESOLUCION,
+        _VICIO_PERSONAL, _VICIOS_CONSULTAS, _VICIOS_PRESENTACION, _VICIOS_COMPLIANCE,
+        _VICIOS_VALORIZACION, _VICIOS_RTM, _VICIOS_ADMISIBILIDAD, _VICIOS_FACTORES,
+        _VICIOS_METODOLOGIA, _VICIOS_TDR, _VICIOS_CAPACIDAD, _VICIOS_DOCUMENTOS,
+        _VICIOS_DESEMPATE, _VICIOS_OBJETO, _VICIOS_HABILITACION, _VICIO_PONDERACION,
+        _VICIOS_VISITA, _VICIOS_MUESTRAS, _VICIO_VALIDEZ, _VICIOS_CRONOGRAMA,
+    )
+    for patron in _solo_patrones(grupo)
+)
+
+
+def _armar_conjunto_vicios():
+    """
+    Con RE2 arma un re2.Set con todas las reglas: una sola pasada por el texto
+    dice qué patrones tienen match, y solo esos se vuelven a ejecutar para
+    obtener grupos. Los patrones que quedaron en `re` no entran al conjunto y
+    se ejecutan siempre. Sin RE2 devuelve None y se evalúan todas las reglas.
+    """
+    if not _USAR_RE2:
+        return None
+    conjunto = re2.Set.SearchSet()
+    indexados = []
+    siempre = []
+    for patron in _VICIOS_SOBRE_MINUSCULAS:
+        if isinstance(patron, re.Pattern):
+            siempre.append(patron)
+            continue
+        try:
+            conjunto.Add(patron.pattern)
+            indexados.append(patron)
+        except re2.error:
+            siempre.append(patron)
+    conjunto.Compile()
+    return conjunto, tuple(indexados), frozenset(siempre)
+
+
+_CONJUNTO_VICIOS = _armar_conjunto_vicios()
+
+
+def _vicios_posibles(texto_lower: str) -> Optional[frozenset]:
+    """Patrones de _VICIOS_SOBRE_MINUSCULAS que pueden tener match (None = todos)"""
+    if _CONJUNTO_VICIOS is None:
+        return None
+    conjunto, indexados, siempre = _CONJUNTO_VICIOS
+    return siempre.union(indexados[i] for i in conjunto.Match(texto_lower))
+
+
+# Palabras de las que toda coincidencia del grupo contiene al menos una: si
+# ninguna está en el texto, el grupo entero se salta sin ejecutar sus patrones
+_VICIOS_DISPARADORES = (
+    (("experiencia", "monto"), _VICIOS_EXP_POSTOR),
+    (("experiencia", "profesional"), _VICIOS_EXP_PERSONAL),
+    (("colegia", "maestr", "doctorado", "diplomado", "especialización", "certifica"), _VICIOS_PROFESIONES),
+    (("días", "dias"), _VICIOS_PLAZO),
+    (("penalidad",), _VICIO_PENALIDAD),
+    (("domicili", "oficina", "local", "establecimiento", "sede", "ubicad"), _VICIOS_GEO),
+    (("criterio", "factor", "comité", "evaluador", "mejor", "mayor"), _VICIOS_SUBJETIVOS),
+    (("carta", "foto", "original", "legalizad", "constancia"), _VICIOS_DOCS_INNECESARIOS),
+    (("equipamiento", "maquinaria", "vehículo", "vehiculo"), _VICIO_EQUIPAMIENTO),
+    (("ratio", "índice", "capital", "patrimonio"), _VICIOS_FINANCIEROS),
+    (("renuncia", "procede", "asume", "derecho", "corresponde", "responsabilidad"), _VICIOS_LEONINAS),
+    (("adelanto",), _VICIO_ADELANTO),
+    (("garantía",), _VICIO_GARANTIA),
+    (("fianza", "banco", "financiera"), _VICIOS_BANCO),
+    (("seguro", "póliza"), _VICIO_SEGURO),
+    (("subcontrat",), _VICIOS_SUBCONTRATO),
+    (("pago",), _VICIOS_PAGO),
+    (("modifica",), _VICIOS_MODIFICACION),
+    (("resoluci",), _VICIOS_RESOLUCION),
+    (("personal", "staff"), _VICIO_PERSONAL),
+    (("consultas", "observaciones"), _VICIOS_CONSULTAS),
+    (("únicamente", "solo", "exclusivamente", "acepta", "original", "fedatead"), _VICIOS_PRESENTACION),
+    (("anticorrupción", "compliance", "integridad", "ética"), _VICIOS_COMPLIANCE),
+    (("valorización", "pago"), _VICIOS_VALORIZACION),
+    (("rtm", "requerimiento", "especificaci"), _VICIOS_RTM),
+    (("admisi", "admitid", "exclu"), _VICIOS_ADMISIBILIDAD),
+    (("factor", "puntaje", "metodología", "plan", "evalua"), _VICIOS_FACTORES),
+    (("puntaje", "evalua", "propuesta"), _VICIOS_METODOLOGIA),
+    (("referencia", "alcance", "prestaci", "podr", "actividades", "trabajos"), _VICIOS_TDR),
+    (("capacidad", "igual", "idéntico", "sector", "rubro", "giro", "cliente", "entidad"), _VICIOS_CAPACIDAD),
+    (("obligatori", "present", "copia", "documento", "constancia", "oficial", "certificada"), _VICIOS_DOCUMENTOS),
+    (("empate", "igualdad"), _VICIOS_DESEMPATE),
+    (("objeto", "incluye", "comprende", "prestaciones", "actividades"), _VICIOS_OBJETO),
+    (("habilitaci", "inscripci", "registro", "rne", "rnp", "sunat"), _VICIOS_HABILITACION),
+    (("ponderaci", "peso"), _VICIO_PONDERACION),
+    (("visita",), _VICIOS_VISITA),
+    (("muestra", "prototipo", "ejemplar"), _VICIOS_MUESTRAS),
+    (("validez", "vigencia"), _VICIO_VALIDEZ),
+    (("participantes", "presentaci"), _VICIOS_CRONOGRAMA),
+)
+
+
+# Palabras de todos los grupos, sin repetir (varias se comparten entre grupos).
+# Sin Hyperscan, cada `in` ya es un recorrido en C (fastsearch de CPython): un
+# bucle propio por bytes no lo mejoraría
+_PALABRAS_DISPARADORAS = tuple(dict.fromkeys(
+    palabra for disparadores, _ in _VICIOS_DISPARADORES for palabra in disparadores
+))
+
+
+def _armar_base_disparadores():
+    """
+    Con Hyperscan compila todas las palabras clave en una sola base: un recorrido
+    del texto dice cuáles aparecen, en vez de un `in` por palabra. Sin Hyperscan
+    devuelve None.
+    """
+    if not HYPERSCAN_AVAILABLE:
+        return None
+    base = hyperscan.Database()
+    base.compile(
+        expressions=[re.escape(palabra).encode('utf-8') for palabra in _PALABRAS_DISPARADORAS],
+        ids=list(range(len(_PALABRAS_DISPARADORAS))),
+        elements=len(_PALABRAS_DISPARADORAS),
+        flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(_PALABRAS_DISPARADORAS),
+    )
+    return base
+
+
+_BASE_DISPARADORES = _armar_base_disparadores()
+
+
+def _palabras_presentes(texto_lower: str) -> set:
+    """Palabras de _PALABRAS_DISPARADORAS que aparecen en el texto en minúsculas"""
+    if _BASE_DISPARADORES is None:
+        return {palabra for palabra in _PALABRAS_DISPARADORAS if palabra in texto_lower}
+    presentes = set()
+    
+    def registrar(id_palabra, desde, hasta, flags, contexto):
+        presentes.add(_PALABRAS_DISPARADORAS[id_palabra])
+    
+    _BASE_DISPARADORES.scan(texto_lower.encode('utf-8'), match_event_handler=registrar)
+    return presentes
+
+
+def _vicios_descartados(texto_lower: str) -> set:
+    """Patrones de los grupos de _VICIOS_DISPARADORES sin ninguna palabra en el texto"""
+    presentes = _palabras_presentes(texto_lower)
+    return {
+        patron
+        for disparadores, grupo in _VICIOS_DISPARADORES
+        if presentes.isdisjoint(disparadores)
+        for patron in _solo_patrones(grupo)
+    }
+
+
+# Caracteres a partir de los cuales un patrón deja de ser texto literal
+_METACARACTERES = frozenset('\\[](){}.*+?|^$')
+
+
+def _prefijo_literal(patron: str) -> str:
+    """Texto literal con el que empieza el patrón (sin el último carácter si lleva cuantificador)"""
+    fin = 0
+    while fin < len(patron) and patron[fin] not in _METACARACTERES:
+        fin += 1
+    if fin < len(patron) and patron[fin] in '?*{':
+        fin -= 1
+    return patron[:fin]
+
+
+def _estructura(patron: str):
+    """(posición, carácter, nivel) de cada paréntesis y '|' del patrón, saltando clases y escapes"""
+    nivel = 0
+    i = 0
+    while i < len(patron):
+        c = patron[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c == '[':
+            i = patron.index(']', i + 2) + 1
+            continue
+        if c == '(':
+            yield i, c, nivel
+            nivel += 1
+        elif c == ')':
+            nivel -= 1
+            yield i, c, nivel
+        elif c == '|':
+            yield i, c, nivel
+        i += 1
+
+
+def _literales_iniciales(patron: str) -> Optional[Tuple[str, ...]]:
+    """
+    Literales con los que empieza toda coincidencia del patrón: su texto inicial
+    o el de cada alternativa de un '(?:a|b|c)' inicial. None si alguno es muy
+    corto (aparecería en todas partes) o si el patrón no tiene esa forma.
+    """
+    marcas = list(_estructura(patron))
+    if any(c == '|' and nivel == 0 for _, c, nivel in marcas):
+        return None
+    if patron.startswith('(?:'):
+        cierre = next(i for i, c, nivel in marcas if c == ')' and nivel == 0)
+        if patron[cierre + 1:cierre + 2] in ('?', '*', '{'):
+            return None
+        cortes = [2] + [i for i, c, nivel in marcas if c == '|' and nivel == 1 and i < cierre] + [cierre]
+        literales = tuple(_prefijo_literal(patron[a + 1:b]) for a, b in zip(cortes, cortes[1:]))
+    else:
+        literales = (_prefijo_literal(patron),)
+    if min(len(literal) for literal in literales) < 3:
+        return None
+    return tuple(dict.fromkeys(literales))
+
+
+# Reglas cuyas coincidencias empiezan siempre por un literal: en vez de probar
+# el patrón en cada posición se salta con str.find a donde aparece el literal
+# (con RE2 no hace falta: ya recorre el texto en tiempo lineal)
+_VICIOS_INICIOS = {} if _USAR_RE2 else {
+    patron: literales
+    for patron in _VICIOS_SOBRE_MINUSCULAS
+    for literales in (_literales_iniciales(patron.pattern),)
+    if literales is not None and not patron.flags & re.IGNORECASE
+}
+
+
+def _buscar_desde_literales(patron: re.Pattern, literales: Tuple[str, ...], texto_lower: str):
+    """patron.search(texto_lower), probando el patrón solo donde empieza alguno de sus literales"""
+    pendientes = []
+    for literal in literales:
+        posicion = texto_lower.find(literal)
+        if posicion != -1:
+            pendientes.append((posicion, literal))
+    heapq.heapify(pendientes)
+    while pendientes:
+        posicion, literal = pendientes[0]
+        match = patron.match(texto_lower, posicion)
+        if match:
+            return match
+        siguiente = texto_lower.find(literal, posicion + 1)
+        if siguiente == -1:
+            heapq.heappop(pendientes)
+        else:
+            heapq.heapreplace(pendientes, (siguiente, literal))
+    return None
+
+
+# =============================================================================
+# INDICADORES DE TIPO DE DOCUMENTO
+# =============================================================================
+
+# Indicadores ampliados con pesos (más específicos = mayor peso)
+_INDICADORES_TIPO = {
+    "bases": {
+        "alto": [  # Peso 3
+            "bases integradas", "bases del procedimiento", "bases estándar",
+            "licitación pública", "procedimiento abreviado", "adjudicación simplificada",
+            "concurso público", "selección de consultores",
+        ],
+        "medio": [  # Peso 2
+            "términos de referencia", "especificaciones técnicas", "tdr",
+            "requisitos de calificación", "factores de evaluación",
+            "valor referencial", "cronograma del procedimiento",
+            "capítulo i", "capítulo ii", "capítulo iii",
+        ],
+        "bajo": [  # Peso 1
+            "objeto de la contratación", "sistema de contratación",
+            "modalidad de ejecución", "plazo de ejecución",
+            "forma de pago", "penalidades", "garantías",
+            "osce", "seace", "ley 32069", "reglamento",
+            "postor", "contratista", "entidad",
+        ]
+    },
+    "acta_buena_pro": {
+        "alto": [
+            "acta de otorgamiento", "buena pro", "se otorga la buena pro",
+            "acta de adjudicación",
+        ],
+        "medio": [
+            "orden de prelación", "puntaje total", "adjudicado",
+            "ganador del proceso", "primer lugar",
+        ],
+        "bajo": [
+            "comité de selección", "resultado final",
+        ]
+    },
+    "cuadro_evaluacion": {
+        "alto": [
+            "cuadro comparativo", "cuadro de evaluación",
+            "evaluación de propuestas", "calificación de propuestas",
+        ],
+        "medio": [
+            "puntaje técnico", "puntaje económico", 
+            "propuesta técnica", "propuesta económica",
+            "evaluación técnica", "evaluación económica",
+        ],
+        "bajo": [
+            "postor 1", "postor 2", "monto ofertado",
+        ]
+    },
+    "propuesta": {
+        "alto": [
+            "propuesta técnica del postor", "propuesta económica del postor",
+            "sobre n° 1", "sobre n° 2", "sobre nº 1", "sobre nº 2",
+        ],
+        "medio": [
+            "carta de presentación", "declaración jurada",
+            "experiencia del postor", "promesa de consorcio",
+        ],
+        "bajo": [
+            "anexo", "formato", "cv documentado",
+        ]
+    },
+    "contrato": {
+        "alto": [
+            "contrato n°", "contrato de", "contratación de servicio",
+            "cláusula primera", "cláusula segunda",
+        ],
+        "medio": [
+            "obligaciones de las partes", "obligaciones del contratista",
+            "garantía de fiel cumplimiento", "resolución del contrato",
+        ],
+        "bajo": [
+            "vigencia del contrato", "conformidad del servicio",
+        ]
+    },
+    "resolucion": {
+        "alto": [
+            "resolución de", "resolución n°", "resuelve:",
+            "se resuelve:", "artículo primero",
+        ],
+        "medio": [
+            "visto:", "considerando:", "que,",
+        ],
+        "bajo": [
+            "fundamentación", "decisión",
+        ]
+    }
+}
+
+_PESOS_NIVEL = (("alto", 3, "A"), ("medio", 2, "M"), ("bajo", 1, "B"))
+
+# Por tipo: (tipo, ((peso, etiqueta, palabra), ...)) en el orden en que se reportan.
+# Casi todo el tiempo del puntaje se va en `palabra in texto` (búsqueda en C);
+# el bucle de Python que la rodea pesa poco, así que no compensa compilarlo.
+# Tampoco se pasa a bytes: encode() copiaría todo el texto en cada llamada, y el
+# texto real de los PDF (comillas tipográficas, guiones, viñetas) sale de Latin-1,
+# así que str ya lo guarda a 2 bytes por carácter y bytes UTF-8 no lo achica.
+_TABLA_INDICADORES = tuple(
+    (tipo, tuple(
+        (peso, f"[{letra}]{palabra}", palabra)
+        for nivel, peso, letra in _PESOS_NIVEL
+        for palabra in niveles.get(nivel, [])
+    ))
+    for tipo, niveles in _INDICADORES_TIPO.items()
+)
+
+# Con esta puntuación la confianza ya es 100%
+_UMBRAL_CONFIANZA_100 = 20
+
+# Puntuación máxima que podría alcanzar alguna de las categorías posteriores a cada una
+_MAXIMO_RESTANTE = tuple(
+    max((sum(peso for peso, _, _ in indicadores) for _, indicadores in _TABLA_INDICADORES[i + 1:]), default=0)
+    for i in range(len(_TABLA_INDICADORES))
+)
+
+
+# =============================================================================
+# PROMPTS DE GEMINI
+# =============================================================================
+
+# Instrucciones por tipo de análisis; el texto del documento se agrega al final
+# (analizar_documento_gemini / encolar_analisis)
+_PROMPTS_ASYNC = {
+    "bases": """Analiza las siguientes bases de un procedimiento de selección de Perú 
+y extrae en formato JSON:
+{
+  "numero_proceso": "string",
+  "entidad": "string",
+  "objeto": "string",
+  "valor_referencial": number,
+  "tipo_procedimiento": "LP|PA|CD|AS",
+  "requisitos_calificacion": [
+    {"tipo": "string", "descripcion": "string", "monto_o_tiempo": "string"}
+  ],
+  "factores_evaluacion": [
+    {"nombre": "string", "puntaje_maximo": number}
+  ],
+  "plazo_ejecucion_dias": number,
+  "penalidad_diaria_porcentaje": number,
+  "garantia_fiel_cumplimiento": number
+}
+
+TEXTO DE BASES:
+""",
+    "evaluacion": """Analiza el siguiente cuadro de evaluación de propuestas y extrae en JSON:
+{
+  "propuestas": [
+    {
+      "postor": "string",
+      "precio": number,
+      "puntaje_tecnico": number,
+      "puntaje_economico": number,
+      "puntaje_total": number,
+      "calificado": boolean
+    }
+  ],
+  "orden_prelacion": ["string"],
+  "ganador": "string",
+  "precio_menor": number
+}
+
+TEXTO:
+""",
+    "vicios": """Analiza las siguientes bases y detecta posibles vicios legales según 
+la Ley 32069 y su Reglamento. Responde en JSON:
+{
+  "vicios_detectados": [
+    {
+      "tipo": "string",
+      "descripcion": "string",
+      "severidad": "ALTA|MEDIA|BAJA",
+      "base_legal": "string",
+      "recomendacion": "string"
+    }
+  ],
+  "procede_observacion": boolean,
+  "resumen": "string"
+}
+
+TEXTO:
+"""
+}
+
+# analizar_documento_gemini_sync: rol de abogado litigante, con más texto de contexto
+_PROMPTS_SYNC = {
+    "bases": """Eres un ABOGADO LITIGANTE con 20 años de experiencia GANANDO CASOS ante el OECE y Tribunal de Contrataciones del Perú.
+
+TU MISIÓN: Encontrar TODOS los vicios para que tu cliente GANE la observación a las bases.
+
+⚠️ REGLA DE ORO: Si la experiencia del postor es >= al valor referencial, ES UN VICIO AUTOMÁTICO (Art. 45).
+
+PASO 1 - EXTRAE PRIMERO ESTOS DATOS (OBLIGATORIO):
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+1. VALOR REFERENCIAL (VR): Busca "Valor Referencial", "V.R.", "Presupuesto Base" → S/ ____
+2. EXPERIENCIA DEL POSTOR: Busca "Experiencia mínima", "Monto facturado" → S/ ____
+3. RATIO = EXPERIENCIA / VR = ____ (Si > 1.0 = VICIO CONFIRMADO ALTA SEVERIDAD)
+4. PLAZO DE EJECUCIÓN: Busca "Plazo de ejecución", "Duración" → ____ días
+5. EXPERIENCIA PERSONAL: Busca "años de experiencia" del personal → ____ años
+
+PASO 2 - CHECKLIST OBLIGATORIO (marca SÍ/NO mentalmente):
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+□ ¿Experiencia del postor >= VR? → VICIO ALTA (Art. 45)
+□ ¿Experiencia personal > 10 años? → VICIO ALTA  
+□ ¿Experiencia personal > 5 años? → VICIO MEDIA
+□ ¿Hay marcas sin "o equivalente"? → VICIO ALTA (Art. 16)
+□ ¿Plazo < 15 días? → VICIO ALTA
+□ ¿Plazo < 30 días para obra/servicio complejo? → VICIO MEDIA
+□ ¿Penalidad > 0.10%? → VICIO ALTA (Art. 163)
+□ ¿Garantía > 10%? → VICIO ALTA (Art. 33)
+□ ¿Se exigen certificaciones ISO obligatorias? → VICIO MEDIA
+□ ¿Se prohíbe consorcio sin justificación? → VICIO ALTA (Art. 13)
+□ ¿Hay restricciones geográficas? → VICIO ALTA
+
+PASO 3 - RESPUESTA EN JSON (estricto, sin texto adicional):
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+{
+  "numero_proceso": "string",
+  "entidad": "string", 
+  "objeto": "string",
+  "valor_referencial": number,
+  "experiencia_postor": number,
+  "ratio_experiencia_vr": number,
+  "plazo_ejecucion": number,
+  "experiencia_personal_anios": number,
+  "tipo_procedimiento": "LP/PA/CD/AS",
+  "posibles_vicios": [
+    {
+      "tipo": "experiencia_excesiva/direccionamiento/plazo_irreal/penalidad_excesiva/garantia_excesiva/requisito_innecesario/factor_subjetivo/otro",
+      "descripcion": "descripción detallada",
+      "ubicacion": "sección de las bases",
+      "base_legal": "Art. XX de Ley 32069 / Reglamento",
+      "severidad": "ALTA/MEDIA/BAJA",
+      "fundamento": "argumentación legal"
+    }
+  ],
+  "requisitos_calificacion": [],
+  "factores_evaluacion": [],
+  "resumen_ejecutivo": "string",
+  "recomendacion": "string"
+}
+
+⚠️ IMPORTANTE: 
+- En Perú, TODAS las bases tienen vicios. Encuentra MÍNIMO 5.
+- Si el ratio experiencia/VR > 1.0, SIEMPRE es un vicio ALTA.
+- Sé AGRESIVO buscando vicios, como un abogado que quiere ganar.
+
+TEXTO DE LAS BASES:
+""",
+    "vicios": """Eres un ABOGADO LITIGANTE EXPERTO EN IMPUGNACIONES DE CONTRATACIONES PÚBLICAS.
+Tu cliente quiere OBSERVAR estas bases. Tu trabajo es encontrar TODOS los vicios posibles.
+
+BUSCA ESPECÍFICAMENTE:
+- Experiencia del postor superior al VR (Art. 45 Reglamento - máximo 1 vez el VR)
+- Experiencia del personal clave excesiva (más de lo técnicamente necesario)
+- Mención de marcas sin "o equivalente" (Art. 16 Ley 32069)
+- Especificaciones técnicas direccionadas
+- Requisitos que limitan la libre competencia (Art. 2 Ley 32069)
+- Penalidades que exceden la fórmula del Art. 163 Reglamento
+- Plazos de ejecución irreales
+- Factores de evaluación subjetivos (deben ser objetivos según Art. 28)
+- Restricciones arbitrarias de participación
+- Documentación innecesaria para calificación
+
+Responde ÚNICAMENTE con un JSON válido (sin texto adicional):
+{
+  "vicios_detectados": [
+    {
+      "tipo": "tipo de vicio",
+      "descripcion": "descripción detallada",
+      "ubicacion": "numeral de las bases",
+      "base_legal": "Art. XX de Ley 32069 / Art. XX Reglamento",
+      "severidad": "ALTA/MEDIA/BAJA",
+      "probabilidad_acogimiento": 0.0 a 1.0,
+      "fundamento_juridico": "argumentación legal completa"
+    }
+  ],
+  "total_vicios": number,
+  "procede_observacion": true/false,
+  "resumen": "string"
+}
+
+TEXTO:
+"""
+}
+
+# Cadenas JSON (con sus escapes) y llaves: lo único que importa para equilibrar
+_JSON_CADENA_O_LLAVE = _compilar_patron(r'"(?:[^"\\]|\\.)*"|[{}]', re.DOTALL)
+
+
+def _cierre_primer_objeto_json(texto: str, inicio: int) -> int:
+    """Posición siguiente a la '}' que cierra el objeto abierto en `inicio` (-1 si no cierra)"""
+    profundidad = 0
+    for token in _JSON_CADENA_O_LLAVE.finditer(texto, inicio):
+        simbolo = token.group()
+        if simbolo == '{':
+            profundidad += 1
+        elif simbolo == '}':
+            profundidad -= 1
+            if profundidad == 0:
+                return token.end()
+    return -1
+
+
+def _primer_objeto_json(texto: str) -> Optional[str]:
+    """
+    Primer objeto {...} equilibrado de una respuesta de Gemini, aunque le siga
+    más texto. Las llaves dentro de cadenas no cuentan. Si las llaves no llegan
+    a cerrarse (respuesta cortada), devuelve hasta la última '}' como antes.
+    """
+    inicio = texto.find('{')
+    if inicio < 0:
+        return None
+    
+    fin = _cierre_primer_objeto_json(texto, inicio)
+    if fin >= 0:
+        return texto[inicio:fin]
+    
+    fin = texto.rfind('}')
+    return texto[inicio:fin + 1] if fin > inicio else None
+
+
+def _tiene_objeto_json(texto: str) -> bool:
+    """True si el primer objeto {...} de la respuesta se puede decodificar como JSON"""
+    objeto = _primer_objeto_json(texto)
+    if not objeto:
+        return False
+    try:
+        json.loads(objeto)
+    except ValueError:
+        return False
+    return True
+
+
+def _recortar_para_prompt(texto: str, limite: int) -> str:
+    """
+    Primeros `limite` caracteres del texto, sin cortar la última palabra por la
+    mitad: media palabra se tokeniza en pedazos que se pagan y no aportan.
+    Se retrocede como mucho 100 caracteres buscando un espacio o salto de línea.
+    """
+    if len(texto) <= limite or texto[limite].isspace():
+        return texto[:limite]
+    
+    desde = max(0, limite - 100)
+    corte = max(texto.rfind(' ', desde, limite), texto.rfind('\n', desde, limite))
+    return texto[:corte] if corte > 0 else texto[:limite]
 
 
 class PDFProcessor:
@@ -22,86 +1202,143 @@ class PDFProcessor:
     """
     
     def __init__(self):
-        # Configurar Gemini para analisis con nueva API
-        self.client = genai.Client(api_key=Config.GEMINI_API_KEY)
+        # El cliente de Gemini se crea en el primer uso (los procesos que solo
+        # extraen texto no pagan su inicialización)
+        self._client = None
         self.model_name = 'gemini-2.0-flash'
+        # Análisis encolados con encolar_analisis: (id_documento, prompt)
+        self._pendientes: List[Tuple[str, str]] = []
+        # Último (texto, resultado) de _extraer_datos_cuantificables
+        self._ultimo_cuantificable: Optional[Tuple[str, Dict]] = None
+        # Último (texto, texto en minúsculas): extracción y reglas lo comparten
+        self._ultimo_lower: Optional[Tuple[str, str]] = None
+    
+    def _en_minusculas(self, texto: str) -> str:
+        """texto.lower(), reutilizado mientras se siga trabajando con el mismo texto"""
+        # Una sola lectura del atributo: la instancia se comparte entre hilos de Flask
+        # y otra petición puede reemplazar la tupla entre la comprobación y el return
+        ultimo = self._ultimo_lower
+        if ultimo is None or ultimo[0] is not texto:
+            ultimo = (texto, texto.lower())
+            self._ultimo_lower = ultimo
+        return ultimo[1]
+    
+    def _get_client(self):
+        """Obtiene (y crea la primera vez) el cliente de Gemini con la nueva API"""
+        if self._client is None:
+            self._client = genai.Client(api_key=Config.GEMINI_API_KEY)
+        return self._client
     
     # =========================================================================
     # EXTRACCIÓN DE TEXTO
     # =========================================================================
     
-    def extraer_texto_pdf(self, pdf_path: str) -> Dict:
+    def extraer_texto_pdf(self, pdf_path: str, paralelo: bool = False, usar_cache: bool = False) -> Dict:
         """
         Extrae todo el texto de un PDF
         
         Args:
             pdf_path: Ruta al archivo PDF
+            paralelo: Reparte las páginas de un PDF grande entre procesos. Por
+                defecto se extrae en el mismo proceso: así lo hacen las peticiones
+                del servidor y los workers de procesar_lote, que ya van en paralelo
+            usar_cache: Memoriza el texto por ruta para volver a leer el mismo archivo
+                (scripts que recorren PDFs en disco). Las subidas del servidor son
+                archivos temporales que se borran al terminar: no se cachean
             
         Returns:
             Dict con texto por página y metadatos
         """
         try:
-            doc = fitz.open(pdf_path)
-            
-            resultado = {
-                "archivo": os.path.basename(pdf_path),
-                "paginas": doc.page_count,
-                "texto_completo": "",
-                "texto_por_pagina": [],
-                "metadata": doc.metadata
-            }
-            
-            for num_pagina, pagina in enumerate(doc, 1):
-                texto = pagina.get_text("text")
-                resultado["texto_por_pagina"].append({
-                    "pagina": num_pagina,
-                    "texto": texto
-                })
-                resultado["texto_completo"] += texto + "\n\n"
+            if usar_cache:
+                # Se memoriza por (ruta, fecha de modificación, tamaño): si el
+                # archivo cambia en disco, la clave cambia y se vuelve a leer
+                ruta = os.path.abspath(pdf_path)
+                st = os.stat(ruta)
+                paginas, metadata, textos = _leer_texto_pdf_cacheado(ruta, st.st_mtime_ns, st.st_size, paralelo)
+            else:
+                paginas, metadata, textos = _leer_texto_pdf(pdf_path, paralelo)
             
-            doc.close()
-            return resultado
+            return _armar_resultado_texto(pdf_path, paginas, metadata, textos)
             
         except Exception as e:
             return {"error": str(e)}
     
+    def procesar_lote(self, pdf_paths: List[str], max_workers: Optional[int] = None) -> List[Dict]:
+        """
+        Extrae el texto de varios PDFs en paralelo, un proceso por núcleo.
+        Se paraleliza en un solo nivel: entre archivos, o entre las páginas
+        si el lote trae un único PDF
+        
+        Args:
+            pdf_paths: Rutas a los archivos PDF
+            max_workers: Procesos a usar (por defecto, os.cpu_count())
+            
+        Returns:
+            Lista con el resultado de extraer_texto_pdf de cada archivo, en el mismo orden
+        """
+        if len(pdf_paths) < 2:
+            return [self.extraer_texto_pdf(pdf_path, paralelo=True) for pdf_path in pdf_paths]
+        
+        max_workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, min(4, len(pdf_paths) // max_workers))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_extraer_texto_worker, pdf_paths, chunksize=chunksize))
+    
+    def detectar_vicios_lote(self, textos: List[str], max_workers: Optional[int] = None) -> List[List[Dict]]:
+        """
+        Aplica el motor de reglas a varios documentos en paralelo, un proceso por núcleo
+        (las reglas de un mismo documento van en serie: `re` no suelta el GIL)
+        
+        Args:
+            textos: Texto completo de cada documento
+            max_workers: Procesos a usar (por defecto, os.cpu_count())
+            
+        Returns:
+            Lista con los vicios de cada documento, en el mismo orden
+        """
+        if len(textos) < 2:
+            return [self._detectar_vicios_por_reglas(texto) for texto in textos]
+        
+        max_workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, min(4, len(textos) // max_workers))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_detectar_vicios_worker, textos, chunksize=chunksize))
+    
     def extraer_tablas_pdf(self, pdf_path: str) -> List[Dict]:
         """
         Extrae tablas de un PDF (para cuadros comparativos)
         """
         try:
             doc = fitz.open(pdf_path)
-            tablas = []
-            
-            for num_pagina, pagina in enumerate(doc, 1):
-                # Buscar tablas usando análisis de bloques
-                bloques = pagina.get_text("dict")["blocks"]
-                
-                for bloque in bloques:
-                    if "lines" in bloque:
-                        # Detectar si parece tabla (múltiples columnas alineadas)
-                        lineas = bloque["lines"]
-                        if len(lineas) > 2:
-                            tabla_texto = []
-                            for linea in lineas:
-                                fila = " | ".join([
-                                    span["text"] for span in linea.get("spans", [])
-                                ])
-                                if fila.strip():
-                                    tabla_texto.append(fila)
-                            
-                            if tabla_texto:
-                                tablas.append({
-                                    "pagina": num_pagina,
-                                    "contenido": tabla_texto
-                                })
-            
-            doc.close()
-            return tablas
+            try:
+                return _tablas_de_documento(doc)
+            finally:
+                doc.close()
             
         except Exception as e:
             return [{"error": str(e)}]
     
+    def extraer_texto_y_tablas(self, pdf_path: str) -> Tuple[Dict, List[Dict]]:
+        """
+        Extrae texto y tablas abriendo el PDF una sola vez
+        (equivale a extraer_texto_pdf + extraer_tablas_pdf)
+        
+        Returns:
+            (resultado de extraer_texto_pdf, resultado de extraer_tablas_pdf)
+        """
+        try:
+            doc = fitz.open(pdf_path)
+            try:
+                textos = _textos_de_paginas(doc, 0, doc.page_count)
+                texto = _armar_resultado_texto(pdf_path, doc.page_count, doc.metadata, textos)
+                return texto, _tablas_de_documento(doc)
+            finally:
+                doc.close()
+            
+        except Exception as e:
+            return {"error": str(e)}, [{"error": str(e)}]
+    
     # =========================================================================
     # IDENTIFICACIÓN DE TIPO DE DOCUMENTO
     # =========================================================================
@@ -114,130 +1351,40 @@ class PDFProcessor:
         Returns:
             Dict con tipo identificado y confianza
         """
-        texto_lower = texto.lower()[:15000]  # Primeras 15000 chars para mejor detección
-        
-        # Indicadores ampliados con pesos (más específicos = mayor peso)
-        indicadores = {
-            "bases": {
-                "alto": [  # Peso 3
-                    "bases integradas", "bases del procedimiento", "bases estándar",
-                    "licitación pública", "procedimiento abreviado", "adjudicación simplificada",
-                    "concurso público", "selección de consultores",
-                ],
-                "medio": [  # Peso 2
-                    "términos de referencia", "especificaciones técnicas", "tdr",
-                    "requisitos de calificación", "factores de evaluación",
-                    "valor referencial", "cronograma del procedimiento",
-                    "capítulo i", "capítulo ii", "capítulo iii",
-                ],
-                "bajo": [  # Peso 1
-                    "objeto de la contratación", "sistema de contratación",
-                    "modalidad de ejecución", "plazo de ejecución",
-                    "forma de pago", "penalidades", "garantías",
-                    "osce", "seace", "ley 32069", "reglamento",
-                    "postor", "contratista", "entidad",
-                ]
-            },
-            "acta_buena_pro": {
-                "alto": [
-                    "acta de otorgamiento", "buena pro", "se otorga la buena pro",
-                    "acta de adjudicación",
-                ],
-                "medio": [
-                    "orden de prelación", "puntaje total", "adjudicado",
-                    "ganador del proceso", "primer lugar",
-                ],
-                "bajo": [
-                    "comité de selección", "resultado final",
-                ]
-            },
-            "cuadro_evaluacion": {
-                "alto": [
-                    "cuadro comparativo", "cuadro de evaluación",
-                    "evaluación de propuestas", "calificación de propuestas",
-                ],
-                "medio": [
-                    "puntaje técnico", "puntaje económico", 
-                    "propuesta técnica", "propuesta económica",
-                    "evaluación técnica", "evaluación económica",
-                ],
-                "bajo": [
-                    "postor 1", "postor 2", "monto ofertado",
-                ]
-            },
-            "propuesta": {
-                "alto": [
-                    "propuesta técnica del postor", "propuesta económica del postor",
-                    "sobre n° 1", "sobre n° 2", "sobre nº 1", "sobre nº 2",
-                ],
-                "medio": [
-                    "carta de presentación", "declaración jurada",
-                    "experiencia del postor", "promesa de consorcio",
-                ],
-                "bajo": [
-                    "anexo", "formato", "cv documentado",
-                ]
-            },
-            "contrato": {
-                "alto": [
-                    "contrato n°", "contrato de", "contratación de servicio",
-                    "cláusula primera", "cláusula segunda",
-                ],
-                "medio": [
-                    "obligaciones de las partes", "obligaciones del contratista",
-                    "garantía de fiel cumplimiento", "resolución del contrato",
-                ],
-                "bajo": [
-                    "vigencia del contrato", "conformidad del servicio",
-                ]
-            },
-            "resolucion": {
-                "alto": [
-                    "resolución de", "resolución n°", "resuelve:",
-                    "se resuelve:", "artículo primero",
-                ],
-                "medio": [
-                    "visto:", "considerando:", "que,",
-                ],
-                "bajo": [
-                    "fundamentación", "decisión",
-                ]
-            }
-        }
+        # Primeras 15000 chars para mejor detección. El texto en minúsculas sale de
+        # _en_minusculas, que lo deja listo para las reglas que se aplican después
+        texto_lower = self._en_minusculas(texto)[:15000]
         
         puntuaciones = {}
-        detalles = {}
+        # Líder en una sola pasada; ante empate gana la categoría anterior
+        tipo_identificado = None
+        puntuacion_max = -1
+        indicadores_lider = []
         
-        for tipo, niveles in indicadores.items():
+        for i, (tipo, indicadores) in enumerate(_TABLA_INDICADORES):
             puntuacion_total = 0
             encontrados = []
-            
-            # Contar indicadores por nivel con pesos
-            for palabra in niveles.get("alto", []):
-                if palabra in texto_lower:
-                    puntuacion_total += 3
-                    encontrados.append(f"[A]{palabra}")
-                    
-            for palabra in niveles.get("medio", []):
-                if palabra in texto_lower:
-                    puntuacion_total += 2
-                    encontrados.append(f"[M]{palabra}")
-                    
-            for palabra in niveles.get("bajo", []):
+            
+            # Pesos y etiquetas precalculados por nivel
+            for peso, etiqueta, palabra in indicadores:
                 if palabra in texto_lower:
-                    puntuacion_total += 1
-                    encontrados.append(f"[B]{palabra}")
+                    puntuacion_total += peso
+                    encontrados.append(etiqueta)
             
             puntuaciones[tipo] = puntuacion_total
-            detalles[tipo] = encontrados
-        
-        # Identificar tipo con mayor puntuación
-        tipo_identificado = max(puntuaciones, key=puntuaciones.get)
-        puntuacion_max = puntuaciones[tipo_identificado]
+            if puntuacion_total > puntuacion_max:
+                tipo_identificado = tipo
+                puntuacion_max = puntuacion_total
+                indicadores_lider = encontrados
+            
+            # Corte temprano: ya hay 100% de confianza y ninguna categoría
+            # restante podría superar al líder (esas no figuran en puntuaciones)
+            if puntuacion_max >= _UMBRAL_CONFIANZA_100 and puntuacion_max >= _MAXIMO_RESTANTE[i]:
+                break
         
         # Calcular confianza basada en puntuación absoluta
         # Umbral de puntuación para 100% confianza
-        umbral_100 = 20  # Con 20+ puntos = 100% confianza
+        umbral_100 = _UMBRAL_CONFIANZA_100  # Con 20+ puntos = 100% confianza
         confianza = min(100, (puntuacion_max / umbral_100) * 100)
         
         # Ajustar mínimo de confianza si hay coincidencias
@@ -245,13 +1392,13 @@ class PDFProcessor:
             confianza = 40 + (puntuacion_max * 5)  # Mínimo 40% si hay algo
         
         print(f"📊 Tipo detectado: {tipo_identificado} (puntuación: {puntuacion_max}, confianza: {confianza:.1f}%)")
-        print(f"   Indicadores encontrados: {detalles[tipo_identificado][:5]}...")  # Solo primeros 5
+        print(f"   Indicadores encontrados: {indicadores_lider[:5]}...")  # Solo primeros 5
         
         return {
             "tipo": tipo_identificado,
             "confianza": round(min(confianza, 100), 1),
             "puntuaciones": puntuaciones,
-            "indicadores_encontrados": detalles[tipo_identificado]
+            "indicadores_encontrados": indicadores_lider
         }
     
     # =========================================================================
@@ -282,50 +1429,21 @@ class PDFProcessor:
             "secciones_identificadas": []
         }
         
+        # Solo para descartar patrones cuyo literal obligatorio no aparece;
+        # los patrones (IGNORECASE) se siguen aplicando sobre el texto original
+        texto_lower = self._en_minusculas(texto)
+        
         # =====================================================================
         # PATRONES MEJORADOS PARA VALOR REFERENCIAL
         # =====================================================================
-        patrones_vr = [
-            # Formato: "VALOR REFERENCIAL: S/ 1,234,567.89"
-            r'VALOR\s+REFERENCIAL[:\s]+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)',
-            # Formato: "V.R.: S/. 1,234,567.89"
-            r'V\.?R\.?[:\s]+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)',
-            # Formato con soles al final
-            r'VALOR\s+REFERENCIAL[:\s]+([\d,]+(?:\.\d{2})?)\s*(?:SOLES|NUEVOS SOLES)',
-            # Formato tabla: "Valor Referencial   S/ 1,234,567.89"
-            r'(?:VALOR|Valor)\s+(?:REFERENCIAL|Referencial)\s+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)',
-            # Formato: "El valor referencial es de S/ 1,234,567.89"
-            r'valor\s+referencial\s+(?:es\s+(?:de\s+)?)?S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)',
-            # Formato corto: "VR S/ 1,234,567.89"
-            r'\bVR\b[:\s]+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)',
-            # Formato: "monto referencial S/ 1,234,567.89"
-            r'[Mm]onto\s+[Rr]eferencial[:\s]+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)',
-            # Formato: "PRESUPUESTO REFERENCIAL: S/ 1,234,567.89"
-            r'PRESUPUESTO\s+REFERENCIAL[:\s]+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)',
-            # Formato con punto de miles y coma decimal (peruano)
-            r'VALOR\s+REFERENCIAL[:\s]+S/?\s*\.?\s*([\d.]+,\d{2})',
-            # Buscar montos grandes con S/ antes (más de 100,000)
-            r'\bS/?\s*\.?\s*(\d{1,3}(?:,\d{3}){2,}(?:\.\d{2})?)\b',
-            # Formato: "1,234,567.89 (VALOR REFERENCIAL)"
-            r'([\d,]+(?:\.\d{2})?)\s*\(?VALOR\s+REFERENCIAL\)?',
-            # Formato: "S/. 1'234,567.89" (con apóstrofe para millones)
-            r"S/?\s*\.?\s*(\d{1,3}'\d{3},\d{3}(?:\.\d{2})?)",
-            # Formato: buscar en contexto de "presupuesto" o "monto"
-            r'(?:presupuesto|monto)\s+(?:total|base)?[:\s]+S/?\s*\.?\s*([\d,]+(?:\.\d{2})?)',
-        ]
-        
-        for patron in patrones_vr:
-            match = re.search(patron, texto, re.IGNORECASE)
+        for patron in _candidatos(_BASES_PATRONES_VR, texto_lower):
+            match = patron.search(texto)
             if match:
                 try:
-                    valor_str = match.group(1).replace(',', '').replace("'", '').replace('.', '', match.group(1).count('.') - 1)
-                    # Si tiene coma como decimal, convertir
-                    if ',' in match.group(1) and '.' not in match.group(1):
-                        valor_str = match.group(1).replace('.', '').replace(',', '.')
-                    valor = float(valor_str.replace(',', ''))
+                    valor = _parsear_monto(match.group(1))
                     if valor > 1000:  # Validar que sea un monto razonable
                         datos["valor_referencial"] = valor
-                        print(f"💰 VR encontrado: S/ {valor:,.2f} (patrón: {patron[:40]}...)")
+                        logger.debug("💰 VR encontrado: S/ %.2f (patrón: %.40s...)", valor, patron.pattern)
                         break
                 except (ValueError, IndexError):
                     continue
@@ -333,19 +1451,8 @@ class PDFProcessor:
         # =====================================================================
         # PATRONES PARA NÚMERO DE PROCESO
         # =====================================================================
-        patrones_proceso = [
-            r'(?:LP|PA|CD|AS|SIE|CP|AMC)\s*N[°º]?\s*([\d\-]+\s*-\s*\d{4})',
-            r'(?:LICITACI[ÓO]N|PROCEDIMIENTO)\s+(?:P[ÚU]BLICA|ABREVIADO)\s*N[°º]?\s*([\d\-]+(?:-\d{4})?)',
-            r'PROCESO\s*N[°º]?\s*([\d\-]+(?:-\d{4})?)',
-            r'(?:ADJUDICACI[ÓO]N)\s+(?:SIMPLIFICADA|DIRECTA)\s*N[°º]?\s*([\d\-]+)',
-            r'N[°º]\s*([\d]+\s*-\s*\d{4})\s*-?\s*(?:LP|PA|AS|CD|SIE)',
-            r'PROCEDIMIENTO\s+DE\s+SELECCI[ÓO]N\s*N[°º]?\s*([\d\-]+)',
-            r'CONCURSO\s+P[ÚU]BLICO\s*N[°º]?\s*([\d\-]+)',
-            r'([A-Z]{2,3}-\d+-\d{4}-[A-Z]+)',  # Formato: AS-001-2025-ENTIDAD
-        ]
-        
-        for patron in patrones_proceso:
-            match = re.search(patron, texto, re.IGNORECASE)
+        for patron in _candidatos(_BASES_PATRONES_PROCESO, texto_lower):
+            match = patron.search(texto)
             if match:
                 datos["numero_proceso"] = match.group(0) if match.group(0) else match.group(1)
                 break
@@ -353,17 +1460,8 @@ class PDFProcessor:
         # =====================================================================
         # PATRONES PARA PLAZO DE EJECUCIÓN
         # =====================================================================
-        patrones_plazo = [
-            r'PLAZO\s+(?:DE\s+)?EJECUCI[ÓO]N[:\s]+(\d+)\s*(?:D[ÍI]AS)',
-            r'PLAZO\s+(?:DE\s+)?(?:ENTREGA|PRESTACI[ÓO]N)[:\s]+(\d+)\s*(?:D[ÍI]AS)',
-            r'(?:PLAZO|Plazo)[:\s]+(\d+)\s*(?:d[íi]as\s+)?(?:calendario|h[áa]biles)',
-            r'(?:plazo|PLAZO)\s+(?:m[áa]ximo|total)[:\s]+(\d+)\s*(?:d[íi]as)',
-            r'duraci[óo]n[:\s]+(\d+)\s*(?:d[íi]as)',
-            r'(?:en\s+un\s+plazo\s+de|dentro\s+de)\s+(\d+)\s*(?:d[íi]as)',
-        ]
-        
-        for patron in patrones_plazo:
-            match = re.search(patron, texto, re.IGNORECASE)
+        for patron in _candidatos(_BASES_PATRONES_PLAZO, texto_lower):
+            match = patron.search(texto)
             if match:
                 try:
                     datos["plazo_ejecucion"] = int(match.group(1))
@@ -375,19 +1473,11 @@ class PDFProcessor:
         # =====================================================================
         # PATRONES PARA EXPERIENCIA DEL POSTOR
         # =====================================================================
-        patrones_exp = [
-            r'[Ee]xperiencia\s+(?:del\s+)?[Pp]ostor[:\s]+(?:S/?\s*\.?\s*)?([\d,]+(?:\.\d{2})?)',
-            r'[Ee]xperiencia\s+m[íi]nima[:\s]+(?:S/?\s*\.?\s*)?([\d,]+(?:\.\d{2})?)',
-            r'[Mm]onto\s+(?:facturado|acumulado)\s+(?:m[íi]nimo)?[:\s]+(?:S/?\s*\.?\s*)?([\d,]+(?:\.\d{2})?)',
-            r'acreditar\s+experiencia[^.]*(?:S/?\s*\.?\s*)([\d,]+(?:\.\d{2})?)',
-            r'(?:hasta|por)\s+(?:un\s+)?(?:monto|valor)\s+acumulado[^.]*(?:S/?\s*\.?\s*)([\d,]+(?:\.\d{2})?)',
-        ]
-        
-        for patron in patrones_exp:
-            match = re.search(patron, texto, re.IGNORECASE | re.DOTALL)
+        for patron in _candidatos(_BASES_PATRONES_EXP, texto_lower):
+            match = patron.search(texto)
             if match:
                 try:
-                    exp_valor = float(match.group(1).replace(',', ''))
+                    exp_valor = _parsear_monto(match.group(1))
                     if exp_valor > 1000:  # Validar monto razonable
                         datos["experiencia_postor"] = exp_valor
                         break
@@ -397,15 +1487,8 @@ class PDFProcessor:
         # =====================================================================
         # PATRONES PARA PENALIDAD
         # =====================================================================
-        patrones_pen = [
-            r'[Pp]enalidad\s+(?:diaria|por\s+mora)?[:\s]+([\d.]+)\s*%',
-            r'([\d.]+)\s*%\s*(?:diario|por\s+d[íi]a)\s*(?:de\s+)?(?:penalidad|mora)',
-            r'penalidad[^.]*([\d.]+)\s*%\s*(?:del\s+monto)',
-            r'multa\s+(?:diaria)?[:\s]+([\d.]+)\s*%',
-        ]
-        
-        for patron in patrones_pen:
-            match = re.search(patron, texto, re.IGNORECASE)
+        for patron in _candidatos(_BASES_PATRONES_PEN, texto_lower):
+            match = patron.search(texto)
             if match:
                 try:
                     datos["penalidad_diaria"] = float(match.group(1))
@@ -416,22 +1499,13 @@ class PDFProcessor:
         # =====================================================================
         # IDENTIFICAR Y ANALIZAR SECCIONES CLAVE
         # =====================================================================
-        secciones_clave = [
-            ("terminos_referencia", [r'T[ÉE]RMINOS\s+DE\s+REFERENCIA', r'TDR', r'TÉRMINOS DE REFERENCIA']),
-            ("especificaciones_tecnicas", [r'ESPECIFICACIONES\s+T[ÉE]CNICAS', r'EETT', r'E\.E\.T\.T']),
-            ("requisitos_calificacion", [r'REQUISITOS\s+DE\s+CALIFICACI[ÓO]N', r'CAP[ÍI]TULO\s+III']),
-            ("factores_evaluacion", [r'FACTORES\s+DE\s+EVALUACI[ÓO]N', r'CAP[ÍI]TULO\s+IV']),
-            ("penalidades", [r'PENALIDADES', r'CAP[ÍI]TULO.*PENALIDADES']),
-            ("garantias", [r'GARANT[ÍI]AS', r'GARANT[ÍI]A\s+DE\s+FIEL']),
-        ]
-        
-        for seccion, patrones in secciones_clave:
-            for patron in patrones:
-                if re.search(patron, texto, re.IGNORECASE):
+        for seccion, patrones in _BASES_SECCIONES_CLAVE:
+            for patron in _candidatos(patrones, texto_lower):
+                if patron.search(texto):
                     datos["secciones_identificadas"].append(seccion)
                     break
         
-        print(f"📋 Secciones identificadas: {datos['secciones_identificadas']}")
+        logger.debug("📋 Secciones identificadas: %s", datos['secciones_identificadas'])
         
         # Extraer requisitos de calificación
         datos["requisitos_calificacion"] = self._extraer_requisitos(texto)
@@ -457,6 +1531,21 @@ class PDFProcessor:
         Returns:
             Dict con datos numéricos extraídos y validados
         """
+        # El mismo texto suele pasar dos veces (extraer_datos_bases y luego la
+        # detección de vicios): se reutiliza el último resultado
+        # (una sola lectura del atributo: otro hilo puede reemplazarlo entre medio)
+        ultimo = self._ultimo_cuantificable
+        if ultimo is not None and ultimo[0] is texto:
+            datos = ultimo[1]
+        else:
+            datos = self._calcular_datos_cuantificables(texto)
+            self._ultimo_cuantificable = (texto, datos)
+        
+        # Copia: quien la reciba puede modificarla sin alterar la guardada
+        return {**datos, "experiencia_personal": list(datos["experiencia_personal"])}
+    
+    def _calcular_datos_cuantificables(self, texto: str) -> Dict:
+        """Recorre los patrones de _extraer_datos_cuantificables sobre el texto"""
         datos = {
             "valor_referencial": None,
             "experiencia_postor": None,
@@ -468,31 +1557,19 @@ class PDFProcessor:
             "excede_limite_experiencia": False
         }
         
-        texto_lower = texto.lower()
+        texto_lower = self._en_minusculas(texto)
         
         # =====================================================================
         # 1. VALOR REFERENCIAL - Múltiples formatos
         # =====================================================================
-        patrones_vr = [
-            r'valor\s+referencial[:\s]+s/?\\.?\s*([\d,]+(?:\.\d{2})?)',
-            r'v\.?\s*r\.?[:\s]+s/?\\.?\s*([\d,]+(?:\.\d{2})?)',
-            r'presupuesto\s+(?:base|referencial)[:\s]+s/?\\.?\s*([\d,]+(?:\.\d{2})?)',
-            r'monto\s+referencial[:\s]+s/?\\.?\s*([\d,]+(?:\.\d{2})?)',
-            r'valor\s+estimado[:\s]+s/?\\.?\s*([\d,]+(?:\.\d{2})?)',
-            r's/\\.?\s*([\d,]+(?:\.\d{2})?)\s+(?:\(|soles).*valor\s+referencial',
-            # Patrones con formato diferente
-            r'referencial[:\s]+(?:s/?\\.?\s*)?([\d]{1,3}(?:,\d{3})+(?:\.\d{2})?)',
-        ]
-        
-        for patron in patrones_vr:
-            match = re.search(patron, texto_lower)
+        for patron in _candidatos(_CUANT_PATRONES_VR, texto_lower):
+            match = patron.search(texto_lower)
             if match:
                 try:
-                    monto_str = match.group(1).replace(',', '').replace(' ', '')
-                    monto = float(monto_str)
+                    monto = _parsear_monto(match.group(1))
                     if monto > 1000:  # VR debe ser > 1000 soles para ser válido
                         datos["valor_referencial"] = monto
-                        print(f"💰 VR detectado: S/ {monto:,.2f}")
+                        logger.debug("💰 VR detectado: S/ %.2f", monto)
                         break
                 except (ValueError, AttributeError):
                     continue
@@ -500,33 +1577,21 @@ class PDFProcessor:
         # =====================================================================
         # 2. EXPERIENCIA DEL POSTOR - Múltiples formatos
         # =====================================================================
-        patrones_exp_postor = [
-            r'experiencia\s+(?:del\s+)?postor[:\s]+(?:s/?\\.?\s*)?([\d,]+(?:\.\d{2})?)',
-            r'experiencia\s+m[íi]nima[:\s]+(?:s/?\\.?\s*)?([\d,]+(?:\.\d{2})?)',
-            r'monto\s+(?:facturado|acumulado)[^.]*(?:s/?\\.?\s*)?([\d,]+(?:\.\d{2})?)',
-            r'acreditaci[óo]n\s+de\s+experiencia[^.]*(?:s/?\\.?\s*)?([\d,]+(?:\.\d{2})?)',
-            r'contratos\s+(?:equivalentes|por\s+un\s+monto)[^.]*(?:s/?\\.?\s*)?([\d,]+(?:\.\d{2})?)',
-            r'experiencia[^.]*(?:igual\s+o\s+mayor\s+a|no\s+menor\s+a)[^.]*(?:s/?\\.?\s*)?([\d,]+(?:\.\d{2})?)',
-            r'(?:una|1)\s+(?:\(1\)\s+)?vez\s+el\s+valor\s+referencial',  # Caso especial: 1x VR
-            r'(?:dos|2)\s+(?:\(2\)\s+)?veces?\s+el\s+valor\s+referencial',  # 2x VR
-        ]
-        
-        for patron in patrones_exp_postor:
-            match = re.search(patron, texto_lower)
+        for patron in _candidatos(_CUANT_PATRONES_EXP_POSTOR, texto_lower):
+            match = patron.search(texto_lower)
             if match:
                 try:
                     # Caso especial: "1 vez el VR" o "2 veces el VR"
-                    if 'vez' in patron:
+                    if 'vez' in patron.pattern:
                         if datos["valor_referencial"]:
                             multiplicador = 2 if 'dos' in match.group(0) or '2' in match.group(0) else 1
                             datos["experiencia_postor"] = datos["valor_referencial"] * multiplicador
-                            print(f"📊 Experiencia postor (calculada): S/ {datos['experiencia_postor']:,.2f} ({multiplicador}x VR)")
+                            logger.debug("📊 Experiencia postor (calculada): S/ %.2f (%sx VR)", datos['experiencia_postor'], multiplicador)
                     else:
-                        monto_str = match.group(1).replace(',', '').replace(' ', '')
-                        monto = float(monto_str)
+                        monto = _parsear_monto(match.group(1))
                         if monto > 10000:  # Debe ser monto significativo
                             datos["experiencia_postor"] = monto
-                            print(f"📊 Experiencia postor: S/ {monto:,.2f}")
+                            logger.debug("📊 Experiencia postor: S/ %.2f", monto)
                     break
                 except (ValueError, AttributeError, IndexError):
                     continue
@@ -540,55 +1605,39 @@ class PDFProcessor:
             datos["excede_limite_experiencia"] = ratio > 1.0
             
             if ratio > 1.0:
-                print(f"⚠️ VICIO DETECTADO: Experiencia ({ratio:.2f}x) EXCEDE el VR")
+                logger.debug("⚠️ VICIO DETECTADO: Experiencia (%.2fx) EXCEDE el VR", ratio)
             else:
-                print(f"✅ Ratio experiencia/VR: {ratio:.2f}x (dentro del límite)")
+                logger.debug("✅ Ratio experiencia/VR: %.2fx (dentro del límite)", ratio)
         
         # =====================================================================
         # 4. EXPERIENCIA DEL PERSONAL CLAVE
         # =====================================================================
-        patrones_personal = [
-            r'(?:profesional|personal|residente|especialista)[^.]{0,50}([\d]+)\s*a[ñn]os?\s+(?:de\s+)?experiencia',
-            r'experiencia[^.]{0,30}([\d]+)\s*a[ñn]os?[^.]*(?:profesional|titulado|colegiado)',
-            r'(?:m[íi]nimo\s+)?([\d]+)\s*a[ñn]os?\s+(?:de\s+)?experiencia[^.]*(?:profesional|espec[íi]fica)',
-            r'haber\s+(?:ejercido|trabajado)[^.]{0,30}([\d]+)\s*a[ñn]os?',
-        ]
-        
-        for patron in patrones_personal:
-            matches = re.findall(patron, texto_lower)
-            for match in matches:
-                try:
-                    anios = int(match)
-                    if 1 <= anios <= 30:  # Rango válido
-                        datos["experiencia_personal"].append(anios)
-                except ValueError:
-                    continue
+        # Los grupos son solo dígitos, así que int() no falla; se filtra el rango válido
+        experiencia_personal = datos["experiencia_personal"]
+        for patron in _candidatos(_CUANT_PATRONES_PERSONAL, texto_lower):
+            experiencia_personal.extend(
+                anios for anios in map(int, patron.findall(texto_lower)) if 1 <= anios <= 30
+            )
         
-        if datos["experiencia_personal"]:
-            max_anios = max(datos["experiencia_personal"])
-            print(f"👤 Experiencia personal máxima: {max_anios} años")
+        if experiencia_personal:
+            max_anios = max(experiencia_personal)
+            logger.debug("👤 Experiencia personal máxima: %s años", max_anios)
             if max_anios > 10:
-                print(f"⚠️ POSIBLE VICIO: Experiencia personal > 10 años")
+                logger.debug("⚠️ POSIBLE VICIO: Experiencia personal > 10 años")
         
         # =====================================================================
         # 5. PENALIDAD DIARIA
         # =====================================================================
-        patrones_penalidad = [
-            r'penalidad[^.]*?([\d]+(?:[.,]\d+)?)\s*%',
-            r'([\d]+(?:[.,]\d+)?)\s*%[^.]*penalidad\s+diaria',
-            r'penalidad\s+por\s+mora[^.]*?([\d]+(?:[.,]\d+)?)\s*%',
-        ]
-        
-        for patron in patrones_penalidad:
-            match = re.search(patron, texto_lower)
+        for patron in _candidatos(_CUANT_PATRONES_PENALIDAD, texto_lower):
+            match = patron.search(texto_lower)
             if match:
                 try:
                     penalidad = float(match.group(1).replace(',', '.'))
                     if penalidad < 10:  # Penalidad razonable < 10%
                         datos["penalidad_diaria"] = penalidad
-                        print(f"📉 Penalidad diaria: {penalidad}%")
+                        logger.debug("📉 Penalidad diaria: %s%%", penalidad)
                         if penalidad > 0.10:
-                            print(f"⚠️ POSIBLE VICIO: Penalidad > 0.10%")
+                            logger.debug("⚠️ POSIBLE VICIO: Penalidad > 0.10%")
                         break
                 except ValueError:
                     continue
@@ -596,24 +1645,16 @@ class PDFProcessor:
         # =====================================================================
         # 6. PLAZO DE EJECUCIÓN
         # =====================================================================
-        patrones_plazo = [
-            r'plazo\s+(?:de\s+)?ejecuci[óo]n[:\s]+([\d]+)\s*d[íi]as?',
-            r'plazo[:\s]+([\d]+)\s*d[íi]as?\s*(?:calendario|h[áa]biles)?',
-            r'duraci[óo]n[:\s]+([\d]+)\s*d[íi]as?',
-            r'(?:en\s+un\s+plazo\s+de|en|dentro\s+de)[:\s]+([\d]+)\s*d[íi]as?',
-            r'([\d]+)\s*d[íi]as?\s*(?:calendario|h[áa]biles)?[^.]*plazo',
-        ]
-        
-        for patron in patrones_plazo:
-            match = re.search(patron, texto_lower)
+        for patron in _candidatos(_CUANT_PATRONES_PLAZO, texto_lower):
+            match = patron.search(texto_lower)
             if match:
                 try:
                     plazo = int(match.group(1))
                     if 1 <= plazo <= 1000:  # Rango válido
                         datos["plazo_ejecucion"] = plazo
-                        print(f"📅 Plazo de ejecución: {plazo} días")
+                        logger.debug("📅 Plazo de ejecución: %s días", plazo)
                         if plazo < 15:
-                            print(f"⚠️ POSIBLE VICIO: Plazo muy corto ({plazo} días)")
+                            logger.debug("⚠️ POSIBLE VICIO: Plazo muy corto (%s días)", plazo)
                         break
                 except ValueError:
                     continue
@@ -621,21 +1662,16 @@ class PDFProcessor:
         # =====================================================================
         # 7. GARANTÍA
         # =====================================================================
-        patrones_garantia = [
-            r'garant[íi]a\s+(?:de\s+)?fiel\s+cumplimiento[^.]*?([\d]+)\s*%',
-            r'([\d]+)\s*%[^.]*garant[íi]a\s+(?:de\s+)?fiel',
-        ]
-        
-        for patron in patrones_garantia:
-            match = re.search(patron, texto_lower)
+        for patron in _candidatos(_CUANT_PATRONES_GARANTIA, texto_lower):
+            match = patron.search(texto_lower)
             if match:
                 try:
                     garantia = int(match.group(1))
                     if 1 <= garantia <= 100:
                         datos["garantia_porcentaje"] = garantia
-                        print(f"🔒 Garantía: {garantia}%")
+                        logger.debug("🔒 Garantía: %s%%", garantia)
                         if garantia > 10:
-                            print(f"⚠️ VICIO DETECTADO: Garantía > 10%")
+                            logger.debug("⚠️ VICIO DETECTADO: Garantía > 10%")
                         break
                 except ValueError:
                     continue
@@ -646,16 +1682,18 @@ class PDFProcessor:
         """Extrae requisitos de calificación"""
         requisitos = []
         
-        # Buscar sección de requisitos
-        patron_seccion = r'REQUISITOS\s+DE\s+CALIFICACI[ÓO]N(.*?)(?:FACTORES|CAP[ÍI]TULO|$)'
-        match = re.search(patron_seccion, texto, re.IGNORECASE | re.DOTALL)
+        # Buscar sección de requisitos: desde el encabezado hasta FACTORES/CAPÍTULO,
+        # sin pasar de una ventana acotada (no se recorre el resto del documento)
+        encabezado = _REQ_ENCABEZADO.search(texto)
         
-        if match:
-            seccion = match.group(1)
+        if encabezado:
+            inicio = encabezado.end()
+            limite = min(len(texto), inicio + _REQ_VENTANA)
+            fin = _REQ_FIN_SECCION.search(texto, inicio, limite)
+            seccion = texto[inicio:fin.start() if fin else limite]
             
             # Buscar experiencia del postor
-            patron_exp = r'EXPERIENCIA\s+DEL\s+POSTOR.*?(?:S/?\.?\s*([\d,]+)|(\d+)\s*(?:contratos|servicios))'
-            match_exp = re.search(patron_exp, seccion, re.IGNORECASE | re.DOTALL)
+            match_exp = _REQ_EXP_POSTOR.search(seccion)
             if match_exp:
                 requisitos.append({
                     "tipo": "experiencia_postor",
@@ -664,8 +1702,7 @@ class PDFProcessor:
                 })
             
             # Buscar experiencia del personal
-            patron_pers = r'PERSONAL\s+(?:CLAVE|T[ÉE]CNICO).*?(\d+)\s*(?:a[ñn]os|meses)'
-            match_pers = re.search(patron_pers, seccion, re.IGNORECASE | re.DOTALL)
+            match_pers = _REQ_PERSONAL.search(seccion)
             if match_pers:
                 requisitos.append({
                     "tipo": "experiencia_personal",
@@ -679,8 +1716,7 @@ class PDFProcessor:
         factores = []
         
         # Buscar patrones de factores con puntaje
-        patron = r'(?:FACTOR|CRITERIO)\s+(?:DE\s+)?([A-Z\s]+)[:\s]+(?:HASTA\s+)?(\d+)\s*(?:PUNTOS|PTS)'
-        matches = re.findall(patron, texto, re.IGNORECASE)
+        matches = _FACTORES_PATRON.findall(texto)
         
         for nombre, puntaje in matches:
             factores.append({
@@ -705,8 +1741,7 @@ class PDFProcessor:
         }
         
         # Buscar patrones de postores con precios
-        patron_postor = r'(?:POSTOR|EMPRESA|CONSORCIO)[:\s]+([A-Z\s\.]+).*?(?:PRECIO|MONTO)[:\s]+S/?\.?\s*([\d,]+(?:\.\d{2})?)'
-        matches = re.findall(patron_postor, texto, re.IGNORECASE | re.DOTALL)
+        matches = _CUADRO_POSTOR.findall(texto)
         
         for nombre, precio in matches:
             resultado["propuestas"].append({
@@ -719,8 +1754,7 @@ class PDFProcessor:
             resultado["precio_menor"] = min(precios)
         
         # Buscar ganador
-        patron_ganador = r'(?:BUENA\s+PRO|ADJUDICADO|GANADOR)[:\s]+([A-Z\s\.]+)'
-        match = re.search(patron_ganador, texto, re.IGNORECASE)
+        match = _CUADRO_GANADOR.search(texto)
         if match:
             resultado["ganador"] = match.group(1).strip()
         
@@ -730,6 +1764,55 @@ class PDFProcessor:
     # ANÁLISIS INTELIGENTE CON GEMINI
     # =========================================================================
     
+    def _consultar_gemini(self, prompt: str) -> Optional[str]:
+        """
+        Envía el prompt a Gemini pasando por la caché de respuestas (modelo + prompt).
+        Devuelve el texto de la respuesta, o None si la API no devolvió texto.
+        Las respuestas sin un objeto JSON completo no se guardan, para reintentarlas.
+        
+        La respuesta se recibe en streaming: Gemini escribe el JSON de izquierda a
+        derecha y todos los que llaman se quedan con el primer objeto, así que en
+        cuanto ese objeto se cierra se deja de esperar el resto.
+        """
+        cache = get_gemini_cache()
+        texto_respuesta = cache.get(self.model_name, prompt)
+        if texto_respuesta is not None:
+            return texto_respuesta
+        
+        partes = []
+        inicio_json = -1
+        objeto_cerrado = False
+        stream = self._get_client().models.generate_content_stream(model=self.model_name, contents=prompt)
+        try:
+            for fragmento in stream:
+                texto_fragmento = getattr(fragmento, 'text', None)
+                if not texto_fragmento:
+                    continue
+                partes.append(texto_fragmento)
+                if '}' in texto_fragmento:
+                    acumulado = "".join(partes)
+                    if inicio_json < 0:
+                        inicio_json = acumulado.find('{')
+                    if inicio_json >= 0 and _cierre_primer_objeto_json(acumulado, inicio_json) >= 0:
+                        objeto_cerrado = True
+                        break
+        finally:
+            # Al cortar antes de tiempo se cierra el stream para liberar la conexión HTTP
+            cerrar = getattr(stream, 'close', None)
+            if cerrar is not None:
+                cerrar()
+        
+        texto_respuesta = "".join(partes) or None
+        # Solo se guarda una respuesta cuyo primer objeto JSON llegó completo y es
+        # válido: una respuesta cortada, en prosa o malformada se vuelve a pedir
+        if objeto_cerrado and _tiene_objeto_json(texto_respuesta):
+            cache.set(self.model_name, prompt, texto_respuesta)
+        return texto_respuesta
+    
+    def _armar_prompt_analisis(self, texto: str, tipo_analisis: str) -> str:
+        """Prompt de analizar_documento_gemini: instrucciones del tipo + primeros 15000 caracteres"""
+        return _PROMPTS_ASYNC.get(tipo_analisis, _PROMPTS_ASYNC["bases"]) + _recortar_para_prompt(texto, 15000)
+    
     async def analizar_documento_gemini(self, texto: str, tipo_analisis: str) -> Dict:
         """
         Usa Gemini para análisis profundo del documento
@@ -738,251 +1821,170 @@ class PDFProcessor:
             texto: Texto extraído del PDF
             tipo_analisis: 'bases', 'evaluacion', 'vicios', 'apelacion'
         """
-        prompts = {
-            "bases": """Analiza las siguientes bases de un procedimiento de selección de Perú 
-y extrae en formato JSON:
-{
-  "numero_proceso": "string",
-  "entidad": "string",
-  "objeto": "string",
-  "valor_referencial": number,
-  "tipo_procedimiento": "LP|PA|CD|AS",
-  "requisitos_calificacion": [
-    {"tipo": "string", "descripcion": "string", "monto_o_tiempo": "string"}
-  ],
-  "factores_evaluacion": [
-    {"nombre": "string", "puntaje_maximo": number}
-  ],
-  "plazo_ejecucion_dias": number,
-  "penalidad_diaria_porcentaje": number,
-  "garantia_fiel_cumplimiento": number
-}
-
-TEXTO DE BASES:
-""",
-            "evaluacion": """Analiza el siguiente cuadro de evaluación de propuestas y extrae en JSON:
-{
-  "propuestas": [
-    {
-      "postor": "string",
-      "precio": number,
-      "puntaje_tecnico": number,
-      "puntaje_economico": number,
-      "puntaje_total": number,
-      "calificado": boolean
-    }
-  ],
-  "orden_prelacion": ["string"],
-  "ganador": "string",
-  "precio_menor": number
-}
-
-TEXTO:
-""",
-            "vicios": """Analiza las siguientes bases y detecta posibles vicios legales según 
-la Ley 32069 y su Reglamento. Responde en JSON:
-{
-  "vicios_detectados": [
-    {
-      "tipo": "string",
-      "descripcion": "string",
-      "severidad": "ALTA|MEDIA|BAJA",
-      "base_legal": "string",
-      "recomendacion": "string"
-    }
-  ],
-  "procede_observacion": boolean,
-  "resumen": "string"
-}
-
-TEXTO:
-"""
-        }
-        
-        prompt = prompts.get(tipo_analisis, prompts["bases"]) + texto[:15000]
+        prompt = self._armar_prompt_analisis(texto, tipo_analisis)
         
         try:
-            response = self.client.models.generate_content(model=self.model_name, contents=prompt)
-            
             # Extraer JSON de la respuesta
-            texto_respuesta = response.text
+            texto_respuesta = self._consultar_gemini(prompt)
             
             # Buscar JSON en la respuesta
-            match = re.search(r'\{.*\}', texto_respuesta, re.DOTALL)
-            if match:
-                return json.loads(match.group())
+            objeto = _primer_objeto_json(texto_respuesta)
+            if objeto:
+                return json.loads(objeto)
             
             return {"respuesta_texto": texto_respuesta}
             
         except Exception as e:
             return {"error": str(e)}
     
+    def encolar_analisis(self, id_documento: str, texto: str, tipo_analisis: str):
+        """
+        Deja un análisis pendiente para enviarlo junto con otros en una sola
+        llamada a Gemini (ver enviar_analisis_pendientes)
+        """
+        self._pendientes.append((str(id_documento), self._armar_prompt_analisis(texto, tipo_analisis)))
+    
+    def enviar_analisis_pendientes(self) -> Dict[str, Dict]:
+        """
+        Envía todos los análisis encolados en una única llamada a Gemini.
+        
+        Returns:
+            Dict {id_documento: resultado}. Cada resultado tiene la misma forma
+            que el de analizar_documento_gemini; si falta o falla, {"error": ...}
+        """
+        pendientes, self._pendientes = self._pendientes, []
+        if not pendientes:
+            return {}
+        
+        partes = [
+            "Vas a recibir varios documentos, cada uno con sus propias instrucciones.\n"
+            "Responde ÚNICAMENTE con un JSON cuyas claves sean los ID de documento y "
+            "cuyos valores sean el JSON pedido para ese documento:\n"
+            '{"<id>": { ... }, ...}\n'
+        ]
+        for id_documento, prompt in pendientes:
+            partes.append(f"\n===== DOCUMENTO ID: {id_documento} =====\n{prompt}\n")
+        
+        try:
+            texto_respuesta = self._consultar_gemini("".join(partes))
+            
+            objeto = _primer_objeto_json(texto_respuesta)
+            resultados = json.loads(objeto) if objeto else {}
+            if not isinstance(resultados, dict):
+                resultados = {}
+        except Exception as e:
+            return {id_documento: {"error": str(e)} for id_documento, _ in pendientes}
+        
+        return {
+            id_documento: resultados.get(id_documento) or {"error": "Sin resultado para el documento en la respuesta del lote"}
+            for id_documento, _ in pendientes
+        }
+    
+    def analizar_documento_gemini_lote(self, texto: str, tipos_analisis: List[str]) -> Dict[str, Dict]:
+        """
+        Varios análisis del mismo documento en una sola llamada a Gemini: el texto
+        se envía una vez y la respuesta es un JSON con una clave por tipo.
+        
+        Returns:
+            Dict {tipo_analisis: resultado}, con la misma forma que el de
+            analizar_documento_gemini; si falta o falla, {"error": ...}
+        """
+        tipos = list(dict.fromkeys(tipos_analisis))
+        if not tipos:
+            return {}
+        
+        partes = [
+            "Vas a analizar un mismo documento de varias formas.\n"
+            "Responde ÚNICAMENTE con un JSON cuyas claves sean los tipos de análisis "
+            "y cuyos valores sean el JSON pedido para cada uno:\n"
+            '{"<tipo>": { ... }, ...}\n'
+        ]
+        for tipo in tipos:
+            # Instrucciones sin la línea final "TEXTO:", el texto va una sola vez al final
+            instrucciones = _PROMPTS_ASYNC.get(tipo, _PROMPTS_ASYNC["bases"]).rsplit("\n\n", 1)[0]
+            partes.append(f"\n===== ANÁLISIS: {tipo} =====\n{instrucciones}\n")
+        partes.append(f"\nTEXTO:\n{_recortar_para_prompt(texto, 15000)}")
+        
+        try:
+            texto_respuesta = self._consultar_gemini("".join(partes))
+        
+            objeto = _primer_objeto_json(texto_respuesta)
+            resultados = json.loads(objeto) if objeto else {}
+            if not isinstance(resultados, dict):
+                resultados = {}
+        except Exception as e:
+            return {tipo: {"error": str(e)} for tipo in tipos}
+        
+        return {
+            tipo: resultados.get(tipo) or {"error": "Sin resultado para el análisis en la respuesta del lote"}
+            for tipo in tipos
+        }
+    
     def analizar_documento_gemini_sync(self, texto: str, tipo_analisis: str) -> Dict:
         """
         Versión síncrona del análisis con Gemini.
         Actúa como un abogado experto en contrataciones públicas.
         Incluye manejo robusto de errores y fallback con análisis basado en reglas.
         """
-        prompts = {
-            "bases": """Eres un ABOGADO LITIGANTE con 20 años de experiencia GANANDO CASOS ante el OECE y Tribunal de Contrataciones del Perú.
-
-TU MISIÓN: Encontrar TODOS los vicios para que tu cliente GANE la observación a las bases.
-
-⚠️ REGLA DE ORO: Si la experiencia del postor es >= al valor referencial, ES UN VICIO AUTOMÁTICO (Art. 45).
-
-PASO 1 - EXTRAE PRIMERO ESTOS DATOS (OBLIGATORIO):
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-1. VALOR REFERENCIAL (VR): Busca "Valor Referencial", "V.R.", "Presupuesto Base" → S/ ____
-2. EXPERIENCIA DEL POSTOR: Busca "Experiencia mínima", "Monto facturado" → S/ ____
-3. RATIO = EXPERIENCIA / VR = ____ (Si > 1.0 = VICIO CONFIRMADO ALTA SEVERIDAD)
-4. PLAZO DE EJECUCIÓN: Busca "Plazo de ejecución", "Duración" → ____ días
-5. EXPERIENCIA PERSONAL: Busca "años de experiencia" del personal → ____ años
-
-PASO 2 - CHECKLIST OBLIGATORIO (marca SÍ/NO mentalmente):
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-□ ¿Experiencia del postor >= VR? → VICIO ALTA (Art. 45)
-□ ¿Experiencia personal > 10 años? → VICIO ALTA  
-□ ¿Experiencia personal > 5 años? → VICIO MEDIA
-□ ¿Hay marcas sin "o equivalente"? → VICIO ALTA (Art. 16)
-□ ¿Plazo < 15 días? → VICIO ALTA
-□ ¿Plazo < 30 días para obra/servicio complejo? → VICIO MEDIA
-□ ¿Penalidad > 0.10%? → VICIO ALTA (Art. 163)
-□ ¿Garantía > 10%? → VICIO ALTA (Art. 33)
-□ ¿Se exigen certificaciones ISO obligatorias? → VICIO MEDIA
-□ ¿Se prohíbe consorcio sin justificación? → VICIO ALTA (Art. 13)
-□ ¿Hay restricciones geográficas? → VICIO ALTA
-
-PASO 3 - RESPUESTA EN JSON (estricto, sin texto adicional):
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-{
-  "numero_proceso": "string",
-  "entidad": "string", 
-  "objeto": "string",
-  "valor_referencial": number,
-  "experiencia_postor": number,
-  "ratio_experiencia_vr": number,
-  "plazo_ejecucion": number,
-  "experiencia_personal_anios": number,
-  "tipo_procedimiento": "LP/PA/CD/AS",
-  "posibles_vicios": [
-    {
-      "tipo": "experiencia_excesiva/direccionamiento/plazo_irreal/penalidad_excesiva/garantia_excesiva/requisito_innecesario/factor_subjetivo/otro",
-      "descripcion": "descripción detallada",
-      "ubicacion": "sección de las bases",
-      "base_legal": "Art. XX de Ley 32069 / Reglamento",
-      "severidad": "ALTA/MEDIA/BAJA",
-      "fundamento": "argumentación legal"
-    }
-  ],
-  "requisitos_calificacion": [],
-  "factores_evaluacion": [],
-  "resumen_ejecutivo": "string",
-  "recomendacion": "string"
-}
-
-⚠️ IMPORTANTE: 
-- En Perú, TODAS las bases tienen vicios. Encuentra MÍNIMO 5.
-- Si el ratio experiencia/VR > 1.0, SIEMPRE es un vicio ALTA.
-- Sé AGRESIVO buscando vicios, como un abogado que quiere ganar.
-
-TEXTO DE LAS BASES:
-""",
-            "vicios": """Eres un ABOGADO LITIGANTE EXPERTO EN IMPUGNACIONES DE CONTRATACIONES PÚBLICAS.
-Tu cliente quiere OBSERVAR estas bases. Tu trabajo es encontrar TODOS los vicios posibles.
-
-BUSCA ESPECÍFICAMENTE:
-- Experiencia del postor superior al VR (Art. 45 Reglamento - máximo 1 vez el VR)
-- Experiencia del personal clave excesiva (más de lo técnicamente necesario)
-- Mención de marcas sin "o equivalente" (Art. 16 Ley 32069)
-- Especificaciones técnicas direccionadas
-- Requisitos que limitan la libre competencia (Art. 2 Ley 32069)
-- Penalidades que exceden la fórmula del Art. 163 Reglamento
-- Plazos de ejecución irreales
-- Factores de evaluación subjetivos (deben ser objetivos según Art. 28)
-- Restricciones arbitrarias de participación
-- Documentación innecesaria para calificación
-
-Responde ÚNICAMENTE con un JSON válido (sin texto adicional):
-{
-  "vicios_detectados": [
-    {
-      "tipo": "tipo de vicio",
-      "descripcion": "descripción detallada",
-      "ubicacion": "numeral de las bases",
-      "base_legal": "Art. XX de Ley 32069 / Art. XX Reglamento",
-      "severidad": "ALTA/MEDIA/BAJA",
-      "probabilidad_acogimiento": 0.0 a 1.0,
-      "fundamento_juridico": "argumentación legal completa"
-    }
-  ],
-  "total_vicios": number,
-  "procede_observacion": true/false,
-  "resumen": "string"
-}
-
-TEXTO:
-"""
-        }
-        
         # Usamos más texto para tener mejor contexto (hasta 25000 caracteres)
-        prompt = prompts.get(tipo_analisis, prompts["bases"]) + texto[:25000]
+        prompt = _PROMPTS_SYNC.get(tipo_analisis, _PROMPTS_SYNC["bases"]) + _recortar_para_prompt(texto, 25000)
         texto_limpio = ""
         
         try:
-            print(f"🤖 Enviando a Gemini API... ({len(texto)} caracteres de texto)")
-            response = self.client.models.generate_content(model=self.model_name, contents=prompt)
+            logger.info("🤖 Enviando a Gemini API... (%d caracteres de texto)", len(texto))
+            texto_respuesta = self._consultar_gemini(prompt)
             
             # Verificar si hay respuesta válida
-            if not response or not hasattr(response, 'text'):
-                print(f"⚠️ Respuesta de Gemini vacía o inválida")
+            if texto_respuesta is None:
+                logger.warning("⚠️ Respuesta de Gemini vacía o inválida")
                 return self._generar_analisis_fallback(texto, "Respuesta vacía de la API")
             
-            texto_respuesta = response.text
-            print(f"📝 Respuesta Gemini recibida: {len(texto_respuesta)} caracteres")
+            logger.info("📝 Respuesta Gemini recibida: %d caracteres", len(texto_respuesta))
             
             # Verificar si la respuesta está vacía
             if not texto_respuesta or len(texto_respuesta.strip()) < 10:
-                print(f"⚠️ Respuesta de Gemini muy corta o vacía")
+                logger.warning("⚠️ Respuesta de Gemini muy corta o vacía")
                 return self._generar_analisis_fallback(texto, "Respuesta muy corta")
             
             # Limpiar y parsear JSON
             texto_limpio = texto_respuesta.replace("```json", "").replace("```", "").strip()
-            match = re.search(r'\{.*\}', texto_limpio, re.DOTALL)
+            objeto = _primer_objeto_json(texto_limpio)
             
-            if match:
-                resultado = json.loads(match.group())
-                print(f"✅ JSON parseado correctamente: {list(resultado.keys())}")
+            if objeto:
+                resultado = json.loads(objeto)
+                logger.info("✅ JSON parseado correctamente: %s", list(resultado.keys()))
                 
                 # Verificar que tenga vicios detectados
                 vicios = resultado.get('posibles_vicios', resultado.get('vicios_detectados', []))
                 if not vicios:
-                    print(f"⚠️ Gemini no detectó vicios, complementando con análisis de reglas...")
-                    vicios_reglas = self._detectar_vicios_por_reglas(texto)
+                    logger.warning("⚠️ Gemini no detectó vicios, complementando con análisis de reglas...")
+                    # Solo complementa: alcanza con los primeros 10, no hace falta recorrer todas las reglas
+                    vicios_reglas = self._detectar_vicios_por_reglas(texto, max_vicios=10)
                     if vicios_reglas:
                         resultado['posibles_vicios'] = vicios_reglas
-                        print(f"✅ Añadidos {len(vicios_reglas)} vicios detectados por reglas")
+                        logger.info("✅ Añadidos %d vicios detectados por reglas", len(vicios_reglas))
                 
                 return resultado
             
-            print(f"⚠️ No se encontró JSON en la respuesta: {texto_limpio[:200]}...")
+            logger.warning("⚠️ No se encontró JSON en la respuesta: %.200s...", texto_limpio)
             return self._generar_analisis_fallback(texto, "JSON no encontrado en respuesta")
             
         except json.JSONDecodeError as e:
-            print(f"❌ Error de JSON: {str(e)}")
-            print(f"   Texto recibido: {texto_limpio[:200] if texto_limpio else 'N/A'}...")
+            logger.error("❌ Error de JSON: %s", e)
+            logger.error("   Texto recibido: %.200s...", texto_limpio or 'N/A')
             return self._generar_analisis_fallback(texto, f"Error parseando JSON: {str(e)}")
         except Exception as e:
             error_type = type(e).__name__
             error_msg = str(e)
-            print(f"❌ Error de Gemini API: {error_type}: {error_msg}")
+            logger.error("❌ Error de Gemini API: %s: %s", error_type, error_msg)
             
             # Detectar errores comunes de la API de Gemini
             if "blocked" in error_msg.lower() or "safety" in error_msg.lower():
-                print(f"   🛡️ Contenido bloqueado por filtros de seguridad")
+                logger.error("   🛡️ Contenido bloqueado por filtros de seguridad")
             elif "quota" in error_msg.lower() or "rate" in error_msg.lower():
-                print(f"   ⏱️ Límite de tasa excedido")
+                logger.error("   ⏱️ Límite de tasa excedido")
             elif "api_key" in error_msg.lower() or "authentication" in error_msg.lower():
-                print(f"   🔑 Error de autenticación con API Key")
+                logger.error("   🔑 Error de autenticación con API Key")
             
             return self._generar_analisis_fallback(texto, f"{error_type}: {error_msg}")
     
@@ -991,7 +1993,7 @@ TEXTO:
         Genera un análisis de fallback basado en reglas cuando Gemini falla.
         Esto asegura que siempre se detecten vicios potenciales.
         """
-        print(f"🔄 Generando análisis de fallback (motivo: {motivo_error})")
+        logger.info("🔄 Generando análisis de fallback (motivo: %s)", motivo_error)
         
         vicios = self._detectar_vicios_por_reglas(texto)
         
@@ -1010,7 +2012,7 @@ TEXTO:
             "recomendacion": "Revisar los vicios detectados y complementar con análisis manual detallado."
         }
     
-    def _detectar_vicios_por_reglas(self, texto: str, texto_por_pagina: List[Dict] = None) -> List[Dict]:
+    def _detectar_vicios_por_reglas(self, texto: str, texto_por_pagina: List[Dict] = None, max_vicios: Optional[int] = None) -> List[Dict]:
         """
         Detecta vicios usando patrones de texto y reglas legales.
         VERSIÓN MEJORADA: 
@@ -1022,47 +2024,109 @@ TEXTO:
             texto: Texto completo del documento
             texto_por_pagina: Lista de dicts con {"pagina": int, "texto": str}
                               Si se provee, se busca en qué página está cada vicio
+            max_vicios: Si se indica, se deja de evaluar reglas al llegar a esa
+                        cantidad de vicios (y se devuelven como mucho esos)
+        
+        Returns:
+            Lista de vicios como dicts (tipo, descripcion, ubicacion, base_legal,
+            severidad, fundamento y, si se ubicaron, pagina/capitulo/cita_textual). Los
+            textos fijos de cada regla son constantes del código: todos los
+            dicts comparten el mismo objeto str, no se copian por vicio.
         """
         vicios = []
-        texto_lower = texto.lower()
+        # (tipo, valor) ya reportados: las reglas con cifras reportan cada valor
+        # distinto una sola vez, en vez de quedarse con el primero que aparece
+        vistos = set()
+        texto_lower = self._en_minusculas(texto)
+        # Cada página se pasa a minúsculas una sola vez para todas las búsquedas
+        paginas_lower = [(d["pagina"], d["texto"].lower()) for d in (texto_por_pagina or [])]
+        
+        # Con RE2, una sola pasada decide qué reglas vale la pena ejecutar.
+        # Las reglas se evalúan en serie a propósito: `re` no suelta el GIL
+        # mientras busca, así que repartirlas en hilos no acorta el tiempo
+        # (medido: 8 búsquedas sobre ~5 MB tardan lo mismo con ThreadPoolExecutor)
+        posibles = _vicios_posibles(texto_lower)
+        # Grupos cuyas palabras clave no aparecen en el texto (no pueden tener match)
+        descartados = _vicios_descartados(texto_lower)
+        
+        def buscar(patron):
+            if patron in descartados or (posibles is not None and patron not in posibles):
+                return None
+            literales = _VICIOS_INICIOS.get(patron)
+            if literales is not None:
+                return _buscar_desde_literales(patron, literales, texto_lower)
+            return patron.search(texto_lower)
+        
+        def hallar(patron):
+            if patron in descartados or (posibles is not None and patron not in posibles):
+                return []
+            return patron.findall(texto_lower)
+        
+        def completo():
+            return max_vicios is not None and len(vicios) >= max_vicios
+        
+        def terminar():
+            if max_vicios is not None:
+                del vicios[max_vicios:]
+            logger.info("🔍 Análisis exhaustivo por reglas: %d vicios detectados", len(vicios))
+            self._ubicar_vicios_en_paginas(vicios, paginas_lower)
+            return vicios
         
         # Función auxiliar para encontrar página y capítulo
         def encontrar_ubicacion(patron):
             """Busca en qué página y sección está el match"""
             resultado = {"pagina": None, "capitulo": None, "cita_textual": None}
+            if not paginas_lower:
+                return resultado
             
-            if texto_por_pagina:
-                for pagina_data in texto_por_pagina:
-                    num_pagina = pagina_data["pagina"]
-                    texto_pagina = pagina_data["texto"].lower()
-                    match = re.search(patron, texto_pagina, re.IGNORECASE)
+            # Una sola búsqueda sobre las páginas unidas; la página sale de su
+            # posición (bisect sobre el inicio de cada página). Si ninguna página
+            # tiene match, el texto unido tampoco lo tiene
+            inicios = []
+            posicion = 0
+            for _, texto_pagina in paginas_lower:
+                inicios.append(posicion)
+                posicion += len(texto_pagina) + 1
+            match = patron.search("\n".join(texto_pagina for _, texto_pagina in paginas_lower))
+            if not match:
+                return resultado
+            
+            indice = bisect.bisect_right(inicios, match.start()) - 1
+            num_pagina, texto_pagina = paginas_lower[indice]
+            inicio, fin = match.start() - inicios[indice], match.end() - inicios[indice]
+            if fin > len(texto_pagina):
+                # El match cruza el salto entre páginas: se busca página por página
+                # desde ahí, como match dentro de una sola página
+                for indice, (num_pagina, texto_pagina) in enumerate(paginas_lower[indice:], indice):
+                    match = patron.search(texto_pagina)
                     if match:
-                        resultado["pagina"] = num_pagina
-                        # Extraer cita textual (contexto alrededor del match)
-                        start = max(0, match.start() - 50)
-                        end = min(len(texto_pagina), match.end() + 100)
-                        resultado["cita_textual"] = texto_pagina[start:end].strip()
-                        
-                        # Identificar capítulo
-                        capitulo = identificar_capitulo(texto_pagina[:match.start()])
-                        if capitulo:
-                            resultado["capitulo"] = capitulo
+                        inicio, fin = match.span()
                         break
+                else:
+                    return resultado
+            
+            resultado["pagina"] = num_pagina
+            # Extraer cita textual (contexto alrededor del match)
+            start = max(0, inicio - 50)
+            end = min(len(texto_pagina), fin + 100)
+            resultado["cita_textual"] = texto_pagina[start:end].strip()
+            
+            # Identificar capítulo (en el texto original; si al pasar a minúsculas
+            # cambió el largo, las posiciones no coinciden y se usa la versión en minúsculas)
+            texto_original = texto_por_pagina[indice]["texto"]
+            if len(texto_original) == len(texto_pagina):
+                capitulo = identificar_capitulo(texto_original[:inicio])
+            else:
+                capitulo = identificar_capitulo(texto_pagina[:inicio])
+            if capitulo:
+                resultado["capitulo"] = capitulo
             
             return resultado
         
         def identificar_capitulo(texto_previo):
             """Identifica el último capítulo/sección mencionado antes de un texto"""
-            patrones = [
-                r'(capítulo\s+[ivxlcd]+[^\n]*)',
-                r'(cap[íi]tulo\s+\d+[^\n]*)',
-                r'(secci[óo]n\s+[ivxlcd]+[^\n]*)',
-                r'(\d+\.\d+\.?\s*[A-ZÁÉÍÓÚ][^\n]+)',  # 3.1 REQUISITOS...
-                r'([IVXLCD]+\.\s*[A-ZÁÉÍÓÚ][^\n]+)',  # III. FACTORES...
-            ]
-            
-            for patron in patrones:
-                matches = re.findall(patron, texto_previo, re.IGNORECASE)
+            for patron in _CAPITULO_PATRONES:
+                matches = patron.findall(texto_previo)
                 if matches:
                     return matches[-1].strip()[:100]  # Último match, max 100 chars
             return None
@@ -1070,31 +2134,26 @@ TEXTO:
         # =====================================================================
         # 1. DETECTAR DIRECCIONAMIENTO POR MARCAS
         # =====================================================================
-        patrones_marca = [
-            r'marca\s*[:\s]\s*([A-Za-z0-9]+)',
-            r'modelo\s*[:\s]\s*([A-Za-z0-9\-]+)',
-            r'fabricante\s*[:\s]\s*([A-Za-z]+)',
-            r'tipo\s*[:\s]\s*([A-Za-z]+\s+[A-Za-z]+)',
-        ]
-        
+        # (marca, posición donde termina la mención)
         marcas_detectadas = []
-        for patron in patrones_marca:
-            matches = re.findall(patron, texto, re.IGNORECASE)
-            marcas_detectadas.extend(matches)
+        for patron in _candidatos(_VICIOS_MARCA, texto_lower):
+            marcas_detectadas.extend((match.group(1), match.end()) for match in patron.finditer(texto))
         
         # Verificar si hay marcas sin "o equivalente" cerca
         if marcas_detectadas:
-            # Buscar contextos donde no aparece "equivalente"
+            # Buscar contextos donde no aparece "equivalente": el resto de la
+            # oración que sigue a cada mención, hasta _MARCA_VENTANA caracteres
             contextos_sin_equiv = 0
-            for marca in marcas_detectadas[:5]:  # Solo revisar las primeras 5
-                patron_contexto = rf'{re.escape(marca)}[^.]*'
-                match = re.search(patron_contexto, texto, re.IGNORECASE)
-                if match and 'equivalente' not in match.group(0).lower():
+            for _, fin in marcas_detectadas[:5]:  # Solo revisar las primeras 5
+                limite = fin + _MARCA_VENTANA
+                fin_oracion = texto.find('.', fin, limite)
+                contexto = texto[fin:fin_oracion if fin_oracion >= 0 else limite]
+                if 'equivalente' not in contexto.lower():
                     contextos_sin_equiv += 1
             
             if contextos_sin_equiv > 0:
                 # Buscar ubicación del primer match
-                ubicacion_info = encontrar_ubicacion(patrones_marca[0])
+                ubicacion_info = encontrar_ubicacion(_VICIOS_MARCA[0][1])
                 vicio = {
                     "tipo": "direccionamiento",
                     "descripcion": f"Se detectaron {len(marcas_detectadas)} referencias a marcas/modelos específicos sin 'o equivalente'",
@@ -1113,23 +2172,20 @@ TEXTO:
                     vicio["cita_textual"] = ubicacion_info["cita_textual"]
                 vicios.append(vicio)
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 2. DETECTAR EXPERIENCIA EXCESIVA DEL POSTOR
         # =====================================================================
-        patrones_exp_postor = [
-            r'experiencia\s+(?:del\s+)?postor[:\s]+(?:s/?\.?\s*)?(\d[\d,\.]+)',
-            r'experiencia\s+m[íi]nima[:\s]+(?:s/?\.?\s*)?(\d[\d,\.]+)',
-            r'monto\s+(?:facturado|acumulado)[^.]*(?:s/?\.?\s*)?(\d[\d,\.]+)',
-            r'(\d[\d,\.]+)\s*(?:soles|s/\.?)\s*(?:de\s+)?experiencia',
-        ]
-        
-        for patron in patrones_exp_postor:
-            match = re.search(patron, texto_lower)
+        for patron in _VICIOS_EXP_POSTOR:
+            match = buscar(patron)
             if match:
                 try:
-                    monto_str = match.group(1).replace(',', '').replace('.', '', match.group(1).count('.') - 1)
-                    monto = float(monto_str)
-                    if monto > 50000:  # Monto significativo
+                    monto = _parsear_monto(match.group(1))
+                    clave = ("experiencia_excesiva", round(monto))
+                    if monto > 50000 and clave not in vistos:  # Monto significativo
+                        vistos.add(clave)
                         vicios.append({
                             "tipo": "experiencia_excesiva",
                             "descripcion": f"Experiencia mínima requerida: S/ {monto:,.2f} - Verificar si excede el valor referencial",
@@ -1138,50 +2194,39 @@ TEXTO:
                             "severidad": "ALTA",
                             "fundamento": "La experiencia del postor no debe exceder 1 vez el valor referencial (Art. 45). Verificar proporcionalidad."
                         })
-                        break
-                except:
+                except ValueError:
                     pass
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 3. DETECTAR EXPERIENCIA EXCESIVA DEL PERSONAL
         # =====================================================================
-        patrones_exp_personal = [
-            r'experiencia\s+(?:del\s+)?(?:profesional|personal|residente|especialista)[^.]*(\d+)\s*a[ñn]os',
-            r'profesional[^.]*(?:m[íi]nimo\s+)?(\d+)\s*a[ñn]os',
-            r'(?:ingeniero|arquitecto|abogado|contador)[^.]*(\d+)\s*a[ñn]os\s*(?:de\s+)?experiencia',
-            r'experiencia[^.]*(\d+)\s*a[ñn]os[^.]*(?:profesional|titulado)',
-        ]
-        
-        for patron in patrones_exp_personal:
-            match = re.search(patron, texto_lower)
+        for patron in _VICIOS_EXP_PERSONAL:
+            match = buscar(patron)
             if match:
-                try:
-                    anios = int(match.group(1))
-                    if anios > 5:  # Más de 5 años puede ser excesivo
-                        vicios.append({
-                            "tipo": "experiencia_personal_excesiva",
-                            "descripcion": f"Se requiere {anios} años de experiencia para personal clave - Posible requisito excesivo",
-                            "ubicacion": "Requisitos de calificación - Personal",
-                            "base_legal": "Art. 16 y 29 del Reglamento D.S. 009-2025-EF",
-                            "severidad": "ALTA" if anios > 10 else "MEDIA",
-                            "fundamento": "Exigir experiencia excesiva del personal limita la participación de postores calificados"
-                        })
-                        break
-                except:
-                    pass
+                anios = int(match.group(1))
+                clave = ("experiencia_personal_excesiva", anios)
+                if anios > 5 and clave not in vistos:  # Más de 5 años puede ser excesivo
+                    vistos.add(clave)
+                    vicios.append({
+                        "tipo": "experiencia_personal_excesiva",
+                        "descripcion": f"Se requiere {anios} años de experiencia para personal clave - Posible requisito excesivo",
+                        "ubicacion": "Requisitos de calificación - Personal",
+                        "base_legal": "Art. 16 y 29 del Reglamento D.S. 009-2025-EF",
+                        "severidad": "ALTA" if anios > 10 else "MEDIA",
+                        "fundamento": "Exigir experiencia excesiva del personal limita la participación de postores calificados"
+                    })
+        
+        if completo():
+            return terminar()
         
         # =====================================================================
         # 4. DETECTAR PROFESIONES ESPECÍFICAS RESTRICTIVAS
         # =====================================================================
-        profesiones_especificas = [
-            (r'(?:colegiatura|colegiado)\s+(?:activo|vigente|hábil)', "colegiatura activa"),
-            (r'(?:maestr[íi]a|doctorado)\s+(?:en|de)', "grado académico avanzado"),
-            (r'(?:diplomado|especialización)\s+(?:en|de)', "diplomado/especialización"),
-            (r'(?:certificación|certificado)\s+(?:de|en|como)\s+(?!calidad)', "certificación profesional específica"),
-        ]
-        
-        for patron, descripcion in profesiones_especificas:
-            if re.search(patron, texto_lower):
+        for patron, descripcion in _VICIOS_PROFESIONES:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "requisito_profesional_restrictivo",
                     "descripcion": f"Se exige {descripcion} que puede limitar la competencia",
@@ -1192,19 +2237,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 5. DETECTAR RESTRICCIONES A CONSORCIOS
         # =====================================================================
-        patrones_consorcio = [
-            r'no\s+(?:se\s+)?permite[n]?\s+consorcio',
-            r'prohibi(?:do|da|ción)[^.]*consorcio',
-            r'consorcio[^.]*(?:no|prohib)',
-            r'(?:únicamente|solo)\s+(?:personas?\s+)?(?:natural|jurídica)',
-            r'presentarse\s+(?:de\s+)?manera\s+(?:individual|independiente)',
-        ]
-        
-        for patron in patrones_consorcio:
-            if re.search(patron, texto_lower):
+        for patron in _candidatos(_VICIOS_CONSORCIO, texto_lower):
+            if buscar(patron):
                 vicios.append({
                     "tipo": "restriccion_consorcio",
                     "descripcion": "Las bases restringen o prohíben la participación en consorcio",
@@ -1215,104 +2255,91 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 6. DETECTAR PLAZOS IRREALES
         # =====================================================================
-        patrones_plazo = [
-            r'plazo\s+(?:de\s+)?(?:ejecuci[óo]n|entrega|prestaci[óo]n)[:\s]+(\d+)\s*(?:d[íi]as)',
-            r'(?:en\s+)?(\d+)\s*(?:d[íi]as)\s*(?:calendario|h[áa]biles)?\s*(?:de\s+)?(?:plazo|ejecución)',
-            r'duraci[óo]n[:\s]+(\d+)\s*(?:d[íi]as)',
-        ]
-        
-        for patron in patrones_plazo:
-            matches = re.findall(patron, texto_lower)
+        for patron in _VICIOS_PLAZO:
+            matches = hallar(patron)
             for plazo_str in matches:
-                try:
-                    plazo = int(plazo_str)
-                    if plazo <= 7:
-                        vicios.append({
-                            "tipo": "plazo_irreal",
-                            "descripcion": f"Plazo de ejecución de {plazo} días es técnicamente inviable",
-                            "ubicacion": "Condiciones del servicio / TDR",
-                            "base_legal": "Art. 16 de la Ley 32069 (Razonabilidad)",
-                            "severidad": "ALTA",
-                            "fundamento": "Plazos muy cortos limitan la competencia y comprometen la calidad del servicio"
-                        })
-                        break
-                    elif plazo <= 15:
-                        vicios.append({
-                            "tipo": "plazo_ajustado",
-                            "descripcion": f"Plazo de ejecución de {plazo} días puede ser ajustado para algunos postores",
-                            "ubicacion": "Condiciones del servicio / TDR",
-                            "base_legal": "Art. 16 de la Ley 32069",
-                            "severidad": "MEDIA",
-                            "fundamento": "Verificar si el plazo es técnicamente viable para la prestación requerida"
-                        })
-                        break
-                except:
-                    pass
+                plazo = int(plazo_str)
+                if ("plazo", plazo) in vistos:
+                    continue
+                vistos.add(("plazo", plazo))
+                if plazo <= 7:
+                    vicios.append({
+                        "tipo": "plazo_irreal",
+                        "descripcion": f"Plazo de ejecución de {plazo} días es técnicamente inviable",
+                        "ubicacion": "Condiciones del servicio / TDR",
+                        "base_legal": "Art. 16 de la Ley 32069 (Razonabilidad)",
+                        "severidad": "ALTA",
+                        "fundamento": "Plazos muy cortos limitan la competencia y comprometen la calidad del servicio"
+                    })
+                elif plazo <= 15:
+                    vicios.append({
+                        "tipo": "plazo_ajustado",
+                        "descripcion": f"Plazo de ejecución de {plazo} días puede ser ajustado para algunos postores",
+                        "ubicacion": "Condiciones del servicio / TDR",
+                        "base_legal": "Art. 16 de la Ley 32069",
+                        "severidad": "MEDIA",
+                        "fundamento": "Verificar si el plazo es técnicamente viable para la prestación requerida"
+                    })
+        
+        if completo():
+            return terminar()
         
         # =====================================================================
         # 7. DETECTAR PENALIDADES EXCESIVAS
         # =====================================================================
-        patron_pen = r'penalidad[^.]*?(\d+(?:[,\.]\d+)?)\s*%'
-        matches_pen = re.findall(patron_pen, texto_lower)
+        matches_pen = hallar(_VICIO_PENALIDAD)
         for pen_str in matches_pen:
-            try:
-                penalidad = float(pen_str.replace(',', '.'))
-                if penalidad > 0.5:  # Mayor a 0.5% es excesiva
-                    vicios.append({
-                        "tipo": "penalidad_excesiva",
-                        "descripcion": f"Penalidad del {penalidad}% puede exceder los límites del Art. 163",
-                        "ubicacion": "Cláusula de penalidades",
-                        "base_legal": "Art. 163 del Reglamento D.S. 009-2025-EF",
-                        "severidad": "ALTA" if penalidad > 1 else "MEDIA",
-                        "fundamento": "Las penalidades deben calcularse según la fórmula: Penalidad = (0.10 x Monto) / (F x Plazo)"
-                    })
-                    break
-            except:
-                pass
+            penalidad = float(pen_str.replace(',', '.'))
+            clave = ("penalidad_excesiva", penalidad)
+            if penalidad > 0.5 and clave not in vistos:  # Mayor a 0.5% es excesiva
+                vistos.add(clave)
+                vicios.append({
+                    "tipo": "penalidad_excesiva",
+                    "descripcion": f"Penalidad del {penalidad}% puede exceder los límites del Art. 163",
+                    "ubicacion": "Cláusula de penalidades",
+                    "base_legal": "Art. 163 del Reglamento D.S. 009-2025-EF",
+                    "severidad": "ALTA" if penalidad > 1 else "MEDIA",
+                    "fundamento": "Las penalidades deben calcularse según la fórmula: Penalidad = (0.10 x Monto) / (F x Plazo)"
+                })
+        
+        if completo():
+            return terminar()
         
         # =====================================================================
         # 8. DETECTAR CERTIFICACIONES COMO REQUISITO OBLIGATORIO
         # =====================================================================
-        certif_patterns = [
-            (r'iso\s*9001', "ISO 9001"),
-            (r'iso\s*14001', "ISO 14001"),
-            (r'iso\s*45001', "ISO 45001"),
-            (r'ohsas\s*18001', "OHSAS 18001"),
-            (r'iso\s*27001', "ISO 27001"),
-        ]
+        for patron, nombre_cert in _VICIOS_CERTIFICACION:
+            if nombre_cert.split()[-1] not in texto_lower:
+                continue
+            # Verificar si es obligatoria (el patrón ya incluye el contexto hasta el punto)
+            contexto = buscar(patron)
+            if contexto:
+                contexto_str = contexto.group(0)
+                if any(word in contexto_str for word in ['obligatori', 'requisito', 'indispensable', 'acreditar']):
+                    vicios.append({
+                        "tipo": "certificacion_restrictiva",
+                        "descripcion": f"Se exige certificación {nombre_cert} como requisito obligatorio",
+                        "ubicacion": "Requisitos de calificación",
+                        "base_legal": "Art. 2 numeral 8 de la Ley 32069 (Libertad de Concurrencia)",
+                        "severidad": "MEDIA",
+                        "fundamento": "Las certificaciones ISO deben ser factor de evaluación, no requisito de calificación"
+                    })
+                    break
         
-        for patron, nombre_cert in certif_patterns:
-            if re.search(patron, texto_lower):
-                # Verificar si es obligatoria
-                contexto = re.search(rf'{patron}[^.]*', texto_lower)
-                if contexto:
-                    contexto_str = contexto.group(0)
-                    if any(word in contexto_str for word in ['obligatori', 'requisito', 'indispensable', 'acreditar']):
-                        vicios.append({
-                            "tipo": "certificacion_restrictiva",
-                            "descripcion": f"Se exige certificación {nombre_cert} como requisito obligatorio",
-                            "ubicacion": "Requisitos de calificación",
-                            "base_legal": "Art. 2 numeral 8 de la Ley 32069 (Libertad de Concurrencia)",
-                            "severidad": "MEDIA",
-                            "fundamento": "Las certificaciones ISO deben ser factor de evaluación, no requisito de calificación"
-                        })
-                        break
+        if completo():
+            return terminar()
         
         # =====================================================================
         # 9. DETECTAR RESTRICCIONES GEOGRÁFICAS
         # =====================================================================
-        patrones_geo = [
-            r'domicili(?:o|ado)\s+(?:en|dentro\s+de)\s+([A-Za-záéíóúñ\s]+)',
-            r'(?:oficina|local|establecimiento)\s+(?:en|dentro\s+de)\s+([A-Za-záéíóúñ\s]+)',
-            r'sede\s+(?:en|dentro\s+de)\s+([A-Za-záéíóúñ\s]+)',
-            r'ubicad[oa]\s+(?:en|dentro\s+de)\s+([A-Za-záéíóúñ\s]+)',
-        ]
-        
-        for patron in patrones_geo:
-            match = re.search(patron, texto_lower)
+        for patron in _VICIOS_GEO:
+            match = buscar(patron)
             if match:
                 vicios.append({
                     "tipo": "restriccion_geografica",
@@ -1324,17 +2351,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 10. DETECTAR FACTORES DE EVALUACIÓN SUBJETIVOS
         # =====================================================================
-        patrones_subjetivos = [
-            (r'(?:criterio|factor)\s+(?:de\s+)?(?:evaluación|calificación)[^.]*(?:subjetiv|discrecional|a\s+criterio)', "factor subjetivo"),
-            (r'(?:comité|evaluador)[^.]*(?:considerar[áa]|valorar[áa]|determinar[áa])', "discrecionalidad del evaluador"),
-            (r'(?:mejor|mayor)\s+(?:propuesta|presentación|creatividad)', "criterio de creatividad/presentación"),
-        ]
-        
-        for patron, tipo in patrones_subjetivos:
-            if re.search(patron, texto_lower):
+        for patron, tipo in _VICIOS_SUBJETIVOS:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "factor_subjetivo",
                     "descripcion": f"Se detectó posible {tipo} en los criterios de evaluación",
@@ -1345,18 +2369,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 11. DETECTAR DOCUMENTACIÓN EXCESIVA
         # =====================================================================
-        docs_innecesarios = [
-            (r'carta\s+(?:de\s+)?(?:recomendación|referencia)', "cartas de recomendación"),
-            (r'fotos?\s+(?:del\s+)?(?:local|establecimiento|oficina)', "fotos del establecimiento"),
-            (r'(?:original|legalizad[oa])\s+(?:de|del)\s+(?:contrato|documento)', "documentos legalizados"),
-            (r'constancia\s+(?:de\s+)?(?:no\s+)?(?:adeudo|deuda)', "constancia de no adeudo"),
-        ]
-        
-        for patron, doc_tipo in docs_innecesarios:
-            if re.search(patron, texto_lower):
+        for patron, doc_tipo in _VICIOS_DOCS_INNECESARIOS:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "documentacion_excesiva",
                     "descripcion": f"Se exige {doc_tipo} que no es requisito legal obligatorio",
@@ -1367,11 +2387,13 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 12. DETECTAR EQUIPAMIENTO ESPECÍFICO
         # =====================================================================
-        patron_equipamiento = r'(?:equipamiento|maquinaria|veh[íi]culo)[^.]*(?:propio|propiedad|a\s+nombre)'
-        if re.search(patron_equipamiento, texto_lower):
+        if buscar(_VICIO_EQUIPAMIENTO):
             vicios.append({
                 "tipo": "equipamiento_restrictivo",
                 "descripcion": "Se exige equipamiento propio como requisito de calificación",
@@ -1381,19 +2403,14 @@ TEXTO:
                 "fundamento": "El equipamiento puede ser propio, alquilado o mediante compromiso. No se puede exigir propiedad."
             })
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 13. CAPACIDAD FINANCIERA EXCESIVA (Ratios)
         # =====================================================================
-        patrones_financ = [
-            (r'(?:ratio|índice)\s+(?:de\s+)?liquidez[^.]*(?:mayor|superior|mínimo)\s+(?:a\s+)?(\d+(?:[.,]\d+)?)', "ratio de liquidez"),
-            (r'(?:ratio|índice)\s+(?:de\s+)?solvencia[^.]*(?:mayor|superior|mínimo)\s+(?:a\s+)?(\d+(?:[.,]\d+)?)', "ratio de solvencia"),
-            (r'(?:ratio|índice)\s+(?:de\s+)?endeudamiento[^.]*(?:menor|inferior|máximo)\s+(?:a\s+)?(\d+(?:[.,]\d+)?)', "ratio de endeudamiento"),
-            (r'capital\s+(?:social|de\s+trabajo)[^.]*(?:mayor|superior|mínimo)[^.]*s/?\.?\s*(\d[\d,\.]+)', "capital mínimo"),
-            (r'patrimonio\s+neto[^.]*(?:mayor|superior|mínimo)[^.]*s/?\.?\s*(\d[\d,\.]+)', "patrimonio mínimo"),
-        ]
-        
-        for patron, tipo_ratio in patrones_financ:
-            match = re.search(patron, texto_lower)
+        for patron, tipo_ratio in _VICIOS_FINANCIEROS:
+            match = buscar(patron)
             if match:
                 vicios.append({
                     "tipo": "capacidad_financiera_excesiva",
@@ -1405,19 +2422,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 14. CONDICIONES LEONINAS O ABUSIVAS EN CONTRATO
         # =====================================================================
-        condiciones_leoninas = [
-            (r'renuncia[^.]*(?:derecho|reclam|demand)', "renuncia a derechos"),
-            (r'(?:no\s+procede|improcedente)[^.]*(?:ampliación|adicional|reclamo)', "exclusión de derechos de ampliación"),
-            (r'asume[^.]*(?:todo|cualquier)[^.]*riesgo', "asunción total de riesgos"),
-            (r'(?:sin\s+derecho|no\s+corresponde)[^.]*(?:gastos\s+generales|utilidad)', "exclusión de gastos generales"),
-            (r'bajo\s+(?:su\s+)?(?:exclusiva\s+)?responsabilidad', "responsabilidad exclusiva del contratista"),
-        ]
-        
-        for patron, tipo_cond in condiciones_leoninas:
-            if re.search(patron, texto_lower):
+        for patron, tipo_cond in _VICIOS_LEONINAS:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "condicion_leonina",
                     "descripcion": f"Posible cláusula abusiva: {tipo_cond}",
@@ -1428,58 +2440,53 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 15. ADELANTOS EXCESIVOS O CONDICIONES
         # =====================================================================
-        patron_adelanto = r'adelanto[^.]*(\d+)\s*%'
-        match_adel = re.search(patron_adelanto, texto_lower)
+        match_adel = buscar(_VICIO_ADELANTO)
         if match_adel:
-            try:
-                adelanto = int(match_adel.group(1))
-                if adelanto > 30:  # Más del 30% puede ser excesivo
-                    vicios.append({
-                        "tipo": "adelanto_excesivo",
-                        "descripcion": f"Se establece adelanto del {adelanto}% que puede exceder límites razonables",
-                        "ubicacion": "Condiciones económicas",
-                        "base_legal": "Art. 156-157 del Reglamento D.S. 009-2025-EF",
-                        "severidad": "MEDIA",
-                        "fundamento": "El adelanto directo no debe exceder el 30% del monto del contrato"
-                    })
-            except:
-                pass
+            adelanto = int(match_adel.group(1))
+            if adelanto > 30:  # Más del 30% puede ser excesivo
+                vicios.append({
+                    "tipo": "adelanto_excesivo",
+                    "descripcion": f"Se establece adelanto del {adelanto}% que puede exceder límites razonables",
+                    "ubicacion": "Condiciones económicas",
+                    "base_legal": "Art. 156-157 del Reglamento D.S. 009-2025-EF",
+                    "severidad": "MEDIA",
+                    "fundamento": "El adelanto directo no debe exceder el 30% del monto del contrato"
+                })
+        
+        if completo():
+            return terminar()
         
         # =====================================================================
         # 16. GARANTÍAS DESPROPORCIONADAS
         # =====================================================================
-        patron_garantia = r'garantía[^.]*(\d+)\s*%'
-        matches_gar = re.findall(patron_garantia, texto_lower)
+        matches_gar = hallar(_VICIO_GARANTIA)
         for gar_str in matches_gar:
-            try:
-                garantia = int(gar_str)
-                if garantia > 10 and garantia < 100:  # Mayor a 10% (fiel cumplimiento)
-                    vicios.append({
-                        "tipo": "garantia_excesiva",
-                        "descripcion": f"Se exige garantía del {garantia}% que excede el límite legal del 10%",
-                        "ubicacion": "Requisitos de garantías",
-                        "base_legal": "Art. 33 de la Ley 32069 y Art. 162 del Reglamento",
-                        "severidad": "ALTA",
-                        "fundamento": "La garantía de fiel cumplimiento es equivalente al 10% del monto del contrato"
-                    })
-                    break
-            except:
-                pass
+            garantia = int(gar_str)
+            if garantia > 10 and garantia < 100:  # Mayor a 10% (fiel cumplimiento)
+                vicios.append({
+                    "tipo": "garantia_excesiva",
+                    "descripcion": f"Se exige garantía del {garantia}% que excede el límite legal del 10%",
+                    "ubicacion": "Requisitos de garantías",
+                    "base_legal": "Art. 33 de la Ley 32069 y Art. 162 del Reglamento",
+                    "severidad": "ALTA",
+                    "fundamento": "La garantía de fiel cumplimiento es equivalente al 10% del monto del contrato"
+                })
+                break
+        
+        if completo():
+            return terminar()
         
         # =====================================================================
         # 17. CARTA FIANZA DE BANCO ESPECÍFICO
         # =====================================================================
-        patrones_banco = [
-            r'carta\s+fianza[^.]*(?:únicamente|solo|exclusivamente)[^.]*(?:banco|entidad)',
-            r'(?:banco|entidad\s+financiera)[^.]*(?:clase\s+a|primer\s+orden|rating)',
-            r'fianza[^.]*(?:emitida\s+por|de)[^.]*(?:banco\s+específico|determinado\s+banco)',
-        ]
-        
-        for patron in patrones_banco:
-            if re.search(patron, texto_lower):
+        for patron in _VICIOS_BANCO:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "fianza_restrictiva",
                     "descripcion": "Se exige carta fianza de banco específico o con restricciones excesivas",
@@ -1490,37 +2497,33 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 18. SEGURO CAR/POLIZA EXCESIVA
         # =====================================================================
-        patron_seguro = r'(?:seguro|póliza)[^.]*(\d+)\s*%[^.]*(?:monto|valor)'
-        match_seg = re.search(patron_seguro, texto_lower)
+        match_seg = buscar(_VICIO_SEGURO)
         if match_seg:
-            try:
-                seguro = int(match_seg.group(1))
-                if seguro > 100:  # Mayor al 100% del monto
-                    vicios.append({
-                        "tipo": "seguro_excesivo",
-                        "descripcion": f"Se exige cobertura de seguro del {seguro}% que puede ser desproporcionada",
-                        "ubicacion": "Requisitos de seguros",
-                        "base_legal": "Art. 2 de la Ley 32069 (Proporcionalidad)",
-                        "severidad": "MEDIA",
-                        "fundamento": "Los requisitos de seguro deben ser proporcionales al riesgo de la contratación"
-                    })
-            except:
-                pass
+            seguro = int(match_seg.group(1))
+            if seguro > 100:  # Mayor al 100% del monto
+                vicios.append({
+                    "tipo": "seguro_excesivo",
+                    "descripcion": f"Se exige cobertura de seguro del {seguro}% que puede ser desproporcionada",
+                    "ubicacion": "Requisitos de seguros",
+                    "base_legal": "Art. 2 de la Ley 32069 (Proporcionalidad)",
+                    "severidad": "MEDIA",
+                    "fundamento": "Los requisitos de seguro deben ser proporcionales al riesgo de la contratación"
+                })
+        
+        if completo():
+            return terminar()
         
         # =====================================================================
         # 19. SUBCONTRATACIÓN PROHIBIDA O RESTRINGIDA
         # =====================================================================
-        patrones_subcontrato = [
-            r'(?:no\s+se\s+permite|prohib)[^.]*subcontrat',
-            r'subcontrat[^.]*(?:prohib|no\s+permit)',
-            r'ejecutar[^.]*(?:íntegramente|totalmente|directamente)[^.]*(?:sin|no)[^.]*subcontrat',
-        ]
-        
-        for patron in patrones_subcontrato:
-            if re.search(patron, texto_lower):
+        for patron in _VICIOS_SUBCONTRATO:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "subcontratacion_prohibida",
                     "descripcion": "Se prohíbe la subcontratación sin justificación técnica",
@@ -1531,45 +2534,36 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 20. CONDICIONES DE PAGO LEONINAS
         # =====================================================================
-        patrones_pago = [
-            r'pago[^.]*(?:contra\s+)?conformidad[^.]*(\d+)\s*días',
-            r'(\d+)\s*días[^.]*(?:para\s+)?pago',
-            r'pago[^.]*(?:previa|posterior)\s+a\s+la\s+liquidación',
-        ]
-        
-        for patron in patrones_pago:
-            match = re.search(patron, texto_lower)
+        for patron in _VICIOS_PAGO:
+            match = buscar(patron)
             if match:
-                try:
-                    if match.groups():
-                        dias = int(match.group(1))
-                        if dias > 30:  # Más de 30 días para pago
-                            vicios.append({
-                                "tipo": "condicion_pago_excesiva",
-                                "descripcion": f"Plazo de pago de {dias} días excede lo razonable (máximo 30 días)",
-                                "ubicacion": "Condiciones de pago",
-                                "base_legal": "Art. 171 del Reglamento D.S. 009-2025-EF",
-                                "severidad": "MEDIA",
-                                "fundamento": "El plazo de pago debe ser razonable para no afectar la liquidez del contratista"
-                            })
-                            break
-                except:
-                    pass
+                if match.groups():
+                    dias = int(match.group(1))
+                    if dias > 30:  # Más de 30 días para pago
+                        vicios.append({
+                            "tipo": "condicion_pago_excesiva",
+                            "descripcion": f"Plazo de pago de {dias} días excede lo razonable (máximo 30 días)",
+                            "ubicacion": "Condiciones de pago",
+                            "base_legal": "Art. 171 del Reglamento D.S. 009-2025-EF",
+                            "severidad": "MEDIA",
+                            "fundamento": "El plazo de pago debe ser razonable para no afectar la liquidez del contratista"
+                        })
+                        break
+        
+        if completo():
+            return terminar()
         
         # =====================================================================
         # 21. MODIFICACIÓN UNILATERAL DEL CONTRATO
         # =====================================================================
-        patrones_modif = [
-            r'entidad[^.]*(?:podrá|puede)[^.]*modificar[^.]*(?:unilateral|sin\s+consentimiento)',
-            r'modificaci[óo]n[^.]*(?:a\s+criterio|discreción)[^.]*entidad',
-            r'reserva[^.]*(?:derecho|facultad)[^.]*modificar',
-        ]
-        
-        for patron in patrones_modif:
-            if re.search(patron, texto_lower):
+        for patron in _VICIOS_MODIFICACION:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "modificacion_unilateral",
                     "descripcion": "Se reserva derecho de modificación unilateral del contrato",
@@ -1580,17 +2574,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 22. CAUSALES DE RESOLUCIÓN EXCESIVAS
         # =====================================================================
-        patrones_resol = [
-            r'resoluci[óo]n[^.]*(?:automática|ipso\s+facto|de\s+pleno\s+derecho)',
-            r'(?:cualquier|todo)[^.]*incumplimiento[^.]*resoluci[óo]n',
-            r'resoluci[óo]n[^.]*sin\s+(?:previo\s+)?(?:aviso|requerimiento)',
-        ]
-        
-        for patron in patrones_resol:
-            if re.search(patron, texto_lower):
+        for patron in _VICIOS_RESOLUCION:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "resolucion_excesiva",
                     "descripcion": "Se establecen causales de resolución automática o desproporcionadas",
@@ -1601,63 +2592,54 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 23. PERSONAL RESIDENTE/CLAVE EXCESIVO
         # =====================================================================
-        patron_personal = r'(?:personal\s+(?:clave|técnico|profesional)|staff)[^.]*(\d+)\s*(?:profesionales|personas|integrantes)'
-        match_pers = re.search(patron_personal, texto_lower)
+        match_pers = buscar(_VICIO_PERSONAL)
         if match_pers:
-            try:
-                num_personal = int(match_pers.group(1))
-                if num_personal > 10:  # Más de 10 profesionales puede ser excesivo
-                    vicios.append({
-                        "tipo": "personal_excesivo",
-                        "descripcion": f"Se exige {num_personal} profesionales como personal clave - Posible sobredimensionamiento",
-                        "ubicacion": "Requisitos de calificación - Personal",
-                        "base_legal": "Art. 29 del Reglamento D.S. 009-2025-EF",
-                        "severidad": "MEDIA",
-                        "fundamento": "El personal exigido debe ser proporcional al objeto de la contratación"
-                    })
-            except:
-                pass
+            num_personal = int(match_pers.group(1))
+            if num_personal > 10:  # Más de 10 profesionales puede ser excesivo
+                vicios.append({
+                    "tipo": "personal_excesivo",
+                    "descripcion": f"Se exige {num_personal} profesionales como personal clave - Posible sobredimensionamiento",
+                    "ubicacion": "Requisitos de calificación - Personal",
+                    "base_legal": "Art. 29 del Reglamento D.S. 009-2025-EF",
+                    "severidad": "MEDIA",
+                    "fundamento": "El personal exigido debe ser proporcional al objeto de la contratación"
+                })
+        
+        if completo():
+            return terminar()
         
         # =====================================================================
         # 24. PLAZO DE CONSULTAS/OBSERVACIONES MUY CORTO
         # =====================================================================
-        patrones_consultas = [
-            r'(?:consultas|observaciones)[^.]*(\d+)\s*(?:días?\s+)?(?:calendario|hábil)',
-            r'(\d+)\s*(?:días?\s+)?(?:calendario|hábil)[^.]*(?:consultas|observaciones)',
-        ]
-        
-        for patron in patrones_consultas:
-            match = re.search(patron, texto_lower)
+        for patron in _VICIOS_CONSULTAS:
+            match = buscar(patron)
             if match:
-                try:
-                    dias = int(match.group(1))
-                    if dias < 3:  # Menos de 3 días es muy poco
-                        vicios.append({
-                            "tipo": "plazo_consultas_corto",
-                            "descripcion": f"Plazo de {dias} días para consultas/observaciones es insuficiente",
-                            "ubicacion": "Cronograma del procedimiento",
-                            "base_legal": "Art. 51 del Reglamento D.S. 009-2025-EF",
-                            "severidad": "MEDIA",
-                            "fundamento": "El plazo para formular observaciones debe ser razonable para analizar las bases"
-                        })
-                        break
-                except:
-                    pass
+                dias = int(match.group(1))
+                if dias < 3:  # Menos de 3 días es muy poco
+                    vicios.append({
+                        "tipo": "plazo_consultas_corto",
+                        "descripcion": f"Plazo de {dias} días para consultas/observaciones es insuficiente",
+                        "ubicacion": "Cronograma del procedimiento",
+                        "base_legal": "Art. 51 del Reglamento D.S. 009-2025-EF",
+                        "severidad": "MEDIA",
+                        "fundamento": "El plazo para formular observaciones debe ser razonable para analizar las bases"
+                    })
+                    break
+        
+        if completo():
+            return terminar()
         
         # =====================================================================
         # 25. FORMA DE PRESENTACIÓN RESTRICTIVA
         # =====================================================================
-        patrones_present = [
-            r'(?:únicamente|solo|exclusivamente)[^.]*(?:físico|presencial|impreso)',
-            r'no\s+(?:se\s+)?acepta[^.]*(?:electrónico|digital|virtual)',
-            r'(?:original|fedatead)[^.]*obligatori',
-        ]
-        
-        for patron in patrones_present:
-            if re.search(patron, texto_lower):
+        for patron in _VICIOS_PRESENTACION:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "presentacion_restrictiva",
                     "descripcion": "Se restringe la forma de presentación de propuestas sin justificación",
@@ -1668,17 +2650,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 26. ANTICORRUPCIÓN/COMPLIANCE EXCESIVO
         # =====================================================================
-        patrones_compliance = [
-            r'(?:certificación|certificado)[^.]*(?:anticorrupción|compliance|integridad)',
-            r'(?:programa|sistema)[^.]*(?:compliance|anticorrupción)[^.]*(?:obligatori|requisito)',
-            r'(?:obligatori|exig)[^.]*(?:código\s+de\s+ética|norma\s+ética)',
-        ]
-        
-        for patron in patrones_compliance:
-            if re.search(patron, texto_lower):
+        for patron in _VICIOS_COMPLIANCE:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "compliance_restrictivo",
                     "descripcion": "Se exige certificación de compliance/anticorrupción como requisito",
@@ -1689,17 +2668,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 27. VALORIZACIÓN ÚNICA O CONDICIONADA
         # =====================================================================
-        patrones_valor = [
-            r'valorización[^.]*(?:única|final|al\s+término)',
-            r'pago[^.]*(?:único|contra\s+entrega\s+total)',
-            r'no\s+(?:se\s+)?(?:procede|acepta)[^.]*valorización[^.]*(?:parcial|mensual)',
-        ]
-        
-        for patron in patrones_valor:
-            if re.search(patron, texto_lower):
+        for patron in _VICIOS_VALORIZACION:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "valorizacion_restrictiva",
                     "descripcion": "Se exige valorización única sin pagos parciales",
@@ -1710,18 +2686,14 @@ TEXTO:
                 })
                 break
 
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 28. REQUERIMIENTOS TÉCNICOS MÍNIMOS (RTM) EXCESIVOS
         # =====================================================================
-        patrones_rtm = [
-            (r'(?:rtm|requerimiento\s+técnico\s+mínimo)[^.]*(?:capacidad|rendimiento)[^.]*([\d,]+)\s*(?:gb|tb|ghz|mb)', "especificaciones técnicas altas"),
-            (r'(?:rtm|especificaci[óo]n)[^.]*(?:marca|modelo)\s+(?:específic|únic)', "marca/modelo específico en RTM"),
-            (r'(?:rtm|requerimiento)[^.]*(?:nuevo|sin\s+uso|reciente)', "producto nuevo obligatorio"),
-            (r'(?:rtm|requerimiento)[^.]*(?:original|no\s+compatible|genuino)', "original/genuino obligatorio"),
-        ]
-        
-        for patron, desc in patrones_rtm:
-            if re.search(patron, texto_lower):
+        for patron, desc in _VICIOS_RTM:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "rtm_restrictivo",
                     "descripcion": f"RTM restrictivo: {desc}",
@@ -1732,19 +2704,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 29. REQUISITOS DE ADMISIBILIDAD EXCESIVOS
         # =====================================================================
-        patrones_admisibilidad = [
-            (r'requisito\s+(?:de\s+)?admisibilidad[^.]*(?:carta\s+fianza|garantía\s+de\s+seriedad)', "garantía de seriedad como admisibilidad"),
-            (r'admisi[óo]n[^.]*(?:constancia|certificado)[^.]*(?:vigente|actualizado)', "documentos actualizados para admisión"),
-            (r'admisibilidad[^.]*(?:balance|estado\s+financiero)', "balance/estados financieros para admisión"),
-            (r'(?:no\s+ser\s+admitid|exclu)[^.]*(?:por\s+)?(?:error|omisión)\s+(?:formal|subsanable)', "exclusión por errores formales"),
-            (r'admisibilidad[^.]*(?:notarial|legalizado)', "documentos notariales para admisión"),
-        ]
-        
-        for patron, desc in patrones_admisibilidad:
-            if re.search(patron, texto_lower):
+        for patron, desc in _VICIOS_ADMISIBILIDAD:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "admisibilidad_excesiva",
                     "descripcion": f"Requisito de admisibilidad excesivo: {desc}",
@@ -1755,19 +2722,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 30. FACTORES DE EVALUACIÓN SUBJETIVOS O MAL DISEÑADOS
         # =====================================================================
-        patrones_factores = [
-            (r'factor\s+(?:de\s+)?evaluación[^.]*(?:a\s+criterio|discreción|consideración)', "factor subjetivo"),
-            (r'puntaje[^.]*(?:calidad|presentación|creatividad)', "criterio de calidad subjetivo"),
-            (r'(?:metodología|plan\s+de\s+trabajo)[^.]*(?:mejor|más\s+completo)', "metodología sin criterios claros"),
-            (r'factor[^.]*(?:100|90|80)\s*(?:puntos|%)[^.]*experiencia', "peso excesivo en experiencia"),
-            (r'evalua(?:ción|rá)[^.]*(?:presentación|formato|estética)', "evaluación de presentación"),
-        ]
-        
-        for patron, desc in patrones_factores:
-            if re.search(patron, texto_lower):
+        for patron, desc in _VICIOS_FACTORES:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "factor_evaluacion_defectuoso",
                     "descripcion": f"Factor de evaluación defectuoso: {desc}",
@@ -1778,17 +2740,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 31. METODOLOGÍA DE EVALUACIÓN TÉCNICA DEFECTUOSA
         # =====================================================================
-        patrones_metodologia = [
-            (r'puntaje\s+técnico[^.]*(?:mínimo|aprobatorio)[^.]*([\d]+)', "puntaje mínimo alto"),
-            (r'evalua(?:ción|rá)\s+técnic[^.]*(?:eliminatori|excluyente)', "evaluación técnica eliminatoria"),
-            (r'propuesta\s+técnica[^.]*(?:descartad|rechazad)[^.]*(?:por|si)', "descarte técnico estricto"),
-        ]
-        
-        for patron, desc in patrones_metodologia:
-            match = re.search(patron, texto_lower)
+        for patron, desc in _VICIOS_METODOLOGIA:
+            match = buscar(patron)
             if match:
                 vicios.append({
                     "tipo": "metodologia_evaluacion_defectuosa",
@@ -1800,18 +2759,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 32. TÉRMINOS DE REFERENCIA (TDR) MAL DEFINIDOS
         # =====================================================================
-        patrones_tdr = [
-            (r't[ée]rminos\s+de\s+referencia[^.]*(?:según|conforme)[^.]*entidad', "TDR a criterio de entidad"),
-            (r'(?:alcance|prestaci[óo]n)[^.]*(?:y/o\s+)?(?:otros|adicionales)\s+que\s+(?:la\s+entidad|se)', "alcance abierto"),
-            (r'(?:podr[áa]|podr[íi]a)[^.]*(?:solicitar|requerir)[^.]*(?:adicional|otros)', "prestaciones adicionales indefinidas"),
-            (r'(?:actividades|trabajos)[^.]*(?:no\s+previst|complement)', "actividades no previstas"),
-        ]
-        
-        for patron, desc in patrones_tdr:
-            if re.search(patron, texto_lower):
+        for patron, desc in _VICIOS_TDR:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "tdr_indefinido",
                     "descripcion": f"TDR mal definido: {desc}",
@@ -1822,18 +2777,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 33. CAPACIDAD TÉCNICA Y PROFESIONAL EXCESIVA
         # =====================================================================
-        patrones_capacidad = [
-            (r'capacidad\s+técnica[^.]*([\d]+)\s*(?:obras|servicios|contratos)[^.]*similar', "cantidad de contratos similares alta"),
-            (r'(?:igual|idéntico)[^.]*(?:servicio|obra|bien)', "experiencia idéntica requerida"),
-            (r'(?:mismo\s+)?(?:sector|rubro|giro)[^.]*(?:obligatori|requerid)', "mismo sector obligatorio"),
-            (r'(?:cliente|entidad)[^.]*(?:público|estatal)[^.]*(?:obligatori|únicamente)', "solo clientes públicos"),
-        ]
-        
-        for patron, desc in patrones_capacidad:
-            if re.search(patron, texto_lower):
+        for patron, desc in _VICIOS_CAPACIDAD:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "capacidad_tecnica_excesiva",
                     "descripcion": f"Capacidad técnica excesiva: {desc}",
@@ -1844,19 +2795,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 34. DOCUMENTOS DE PRESENTACIÓN OBLIGATORIA EXCESIVOS
         # =====================================================================
-        patrones_documentos = [
-            (r'(?:obligatori|present)[^.]*(?:curriculum|cv|hoja\s+de\s+vida)', "CV obligatorio"),
-            (r'(?:obligatori|present)[^.]*(?:brochure|catálogo|portafolio)', "catálogo/brochure obligatorio"),
-            (r'(?:copia|fotocopia)[^.]*(?:legalizada|certificada|notarial)', "copias legalizadas"),
-            (r'(?:documento|constancia)[^.]*(?:apostillad)', "apostilla requerida"),
-            (r'(?:traducción\s+)?(?:oficial|certificada)', "traducción oficial"),
-        ]
-        
-        for patron, desc in patrones_documentos:
-            if re.search(patron, texto_lower):
+        for patron, desc in _VICIOS_DOCUMENTOS:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "documentos_excesivos",
                     "descripcion": f"Documentación obligatoria excesiva: {desc}",
@@ -1867,16 +2813,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 35. CRITERIOS DE DESEMPATE NO CLAROS
         # =====================================================================
-        patrones_desempate = [
-            (r'desempate[^.]*(?:a\s+criterio|discreción|sorteo)', "desempate subjetivo"),
-            (r'(?:empate|igualdad)[^.]*(?:no\s+se\s+establece|sin\s+criterio)', "sin criterio de desempate"),
-        ]
-        
-        for patron, desc in patrones_desempate:
-            if re.search(patron, texto_lower):
+        for patron, desc in _VICIOS_DESEMPATE:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "desempate_defectuoso",
                     "descripcion": f"Criterio de desempate defectuoso: {desc}",
@@ -1887,17 +2831,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 36. OBJETO CONTRACTUAL MAL DEFINIDO
         # =====================================================================
-        patrones_objeto = [
-            (r'objeto[^.]*(?:y/o|u\s+otros|entre\s+otros)', "objeto contractual ambiguo"),
-            (r'(?:incluye|comprende)[^.]*(?:todo|cualquier)[^.]*(?:necesari|requerid)', "alcance abierto"),
-            (r'(?:prestaciones|actividades)[^.]*(?:complement|adicional|conexas)', "prestaciones conexas indefinidas"),
-        ]
-        
-        for patron, desc in patrones_objeto:
-            if re.search(patron, texto_lower):
+        for patron, desc in _VICIOS_OBJETO:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "objeto_mal_definido",
                     "descripcion": f"Objeto contractual mal definido: {desc}",
@@ -1908,17 +2849,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 37. HABILITACIÓN PROFESIONAL EXCESIVA
         # =====================================================================
-        patrones_habilitacion = [
-            (r'habilitaci[óo]n[^.]*(?:vigente|activa)[^.]*(?:colegio|institución)', "habilitación profesional específica"),
-            (r'(?:inscripci[óo]n|registro)[^.]*(?:obligatori|requerid)[^.]*(?:cámar|asociación|gremio)', "inscripción en gremio"),
-            (r'(?:rne|rnp|sunat)[^.]*(?:específic|determinad)', "registro específico no necesario"),
-        ]
-        
-        for patron, desc in patrones_habilitacion:
-            if re.search(patron, texto_lower):
+        for patron, desc in _VICIOS_HABILITACION:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "habilitacion_excesiva",
                     "descripcion": f"Habilitación profesional excesiva: {desc}",
@@ -1929,39 +2867,35 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 38. PONDERACIÓN TÉCNICA/ECONÓMICA DESEQUILIBRADA
         # =====================================================================
-        patron_ponderacion = r'(?:ponderaci[óo]n|peso)[^.]*(?:técnic|económic)[^.]*(\d+)[^.]*%'
-        matches_pond = re.findall(patron_ponderacion, texto_lower)
+        matches_pond = hallar(_VICIO_PONDERACION)
         if matches_pond:
             for peso in matches_pond:
-                try:
-                    peso_num = int(peso)
-                    if peso_num > 80 or peso_num < 20:
-                        vicios.append({
-                            "tipo": "ponderacion_desequilibrada",
-                            "descripcion": f"Ponderación técnica/económica desequilibrada ({peso_num}%)",
-                            "ubicacion": "Metodología de Evaluación",
-                            "base_legal": "Art. 28 del Reglamento",
-                            "severidad": "MEDIA",
-                            "fundamento": "La ponderación debe equilibrar aspectos técnicos y económicos (usualmente 70-30 o 80-20)"
-                        })
-                        break
-                except:
-                    pass
+                peso_num = int(peso)
+                if peso_num > 80 or peso_num < 20:
+                    vicios.append({
+                        "tipo": "ponderacion_desequilibrada",
+                        "descripcion": f"Ponderación técnica/económica desequilibrada ({peso_num}%)",
+                        "ubicacion": "Metodología de Evaluación",
+                        "base_legal": "Art. 28 del Reglamento",
+                        "severidad": "MEDIA",
+                        "fundamento": "La ponderación debe equilibrar aspectos técnicos y económicos (usualmente 70-30 o 80-20)"
+                    })
+                    break
+        
+        if completo():
+            return terminar()
         
         # =====================================================================
         # 39. VISITA TÉCNICA OBLIGATORIA
         # =====================================================================
-        patrones_visita = [
-            r'visita\s+(?:técnica|de\s+campo)[^.]*(?:obligatori|indispensable)',
-            r'(?:obligatori|indispensable)[^.]*visita\s+(?:al\s+)?(?:lugar|sitio|obra)',
-            r'no\s+(?:se\s+)?admitir[áa][^.]*(?:sin|que\s+no)[^.]*visita',
-        ]
-        
-        for patron in patrones_visita:
-            if re.search(patron, texto_lower):
+        for patron in _VICIOS_VISITA:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "visita_obligatoria",
                     "descripcion": "Se exige visita técnica obligatoria como requisito",
@@ -1972,17 +2906,14 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 40. MUESTRAS FÍSICAS OBLIGATORIAS
         # =====================================================================
-        patrones_muestras = [
-            r'muestra\s+(?:física|original)[^.]*(?:obligatori|present)',
-            r'prototipo[^.]*(?:obligatori|present|entregar)',
-            r'(?:obligatori|present)[^.]*(?:muestra|prototipo|ejemplar)',
-        ]
-        
-        for patron in patrones_muestras:
-            if re.search(patron, texto_lower):
+        for patron in _VICIOS_MUESTRAS:
+            if buscar(patron):
                 vicios.append({
                     "tipo": "muestras_obligatorias",
                     "descripcion": "Se exige presentación obligatoria de muestras físicas",
@@ -1993,58 +2924,57 @@ TEXTO:
                 })
                 break
         
+        if completo():
+            return terminar()
+        
         # =====================================================================
         # 41. PLAZO DE VALIDEZ DE OFERTA EXCESIVO
         # =====================================================================
-        patron_validez = r'(?:validez|vigencia)\s+(?:de\s+)?(?:la\s+)?(?:oferta|propuesta)[^.]*(\d+)\s*(?:días|meses)'
-        match_validez = re.search(patron_validez, texto_lower)
+        match_validez = buscar(_VICIO_VALIDEZ)
         if match_validez:
-            try:
-                plazo_validez = int(match_validez.group(1))
-                if plazo_validez > 90:  # Más de 90 días puede ser excesivo
-                    vicios.append({
-                        "tipo": "validez_oferta_excesiva",
-                        "descripcion": f"Validez de oferta de {plazo_validez} días es excesiva",
-                        "ubicacion": "Condiciones de Presentación",
-                        "base_legal": "Art. 2 de la Ley 32069",
-                        "severidad": "BAJA",
-                        "fundamento": "La validez de oferta no debe exceder plazos razonables (60-90 días)"
-                    })
-            except:
-                pass
+            plazo_validez = int(match_validez.group(1))
+            if plazo_validez > 90:  # Más de 90 días puede ser excesivo
+                vicios.append({
+                    "tipo": "validez_oferta_excesiva",
+                    "descripcion": f"Validez de oferta de {plazo_validez} días es excesiva",
+                    "ubicacion": "Condiciones de Presentación",
+                    "base_legal": "Art. 2 de la Ley 32069",
+                    "severidad": "BAJA",
+                    "fundamento": "La validez de oferta no debe exceder plazos razonables (60-90 días)"
+                })
+        
+        if completo():
+            return terminar()
         
         # =====================================================================
         # 42. CRONOGRAMA CON PLAZOS INSUFICIENTES
         # =====================================================================
-        patrones_cronograma = [
-            (r'(?:registro|inscripción)\s+(?:de\s+)?participantes[^.]*(\d+)\s*días?', "registro de participantes"),
-            (r'presentaci[óo]n\s+(?:de\s+)?(?:propuestas|ofertas)[^.]*(\d+)\s*días?', "presentación de propuestas"),
-        ]
-        
-        for patron, etapa in patrones_cronograma:
-            match = re.search(patron, texto_lower)
+        for patron, etapa in _VICIOS_CRONOGRAMA:
+            match = buscar(patron)
             if match:
-                try:
-                    dias = int(match.group(1))
-                    if dias < 3:
-                        vicios.append({
-                            "tipo": "cronograma_ajustado",
-                            "descripcion": f"Plazo insuficiente para {etapa}: {dias} días",
-                            "ubicacion": "Cronograma del Procedimiento",
-                            "base_legal": "Directivas de Bases Estándar",
-                            "severidad": "MEDIA",
-                            "fundamento": "Los plazos del cronograma deben permitir participación efectiva"
-                        })
-                        break
-                except:
-                    pass
+                dias = int(match.group(1))
+                if dias < 3:
+                    vicios.append({
+                        "tipo": "cronograma_ajustado",
+                        "descripcion": f"Plazo insuficiente para {etapa}: {dias} días",
+                        "ubicacion": "Cronograma del Procedimiento",
+                        "base_legal": "Directivas de Bases Estándar",
+                        "severidad": "MEDIA",
+                        "fundamento": "Los plazos del cronograma deben permitir participación efectiva"
+                    })
+                    break
 
-        print(f"🔍 Análisis exhaustivo por reglas: {len(vicios)} vicios detectados")
-        
+        return terminar()
+    
+    def _ubicar_vicios_en_paginas(self, vicios: List[Dict], paginas_lower: List[Tuple[int, str]]):
+        """
+        Agrega página, capítulo y cita a los vicios que aún no la tienen,
+        buscando las palabras clave de su tipo (paginas_lower: (página, texto en minúsculas))
+        """
         # =====================================================================
         # POST-PROCESAMIENTO: Agregar ubicación por página a cada vicio
         # =====================================================================
-        if texto_por_pagina:
+        if paginas_lower:
             for vicio in vicios:
                 if "pagina" not in vicio:  # Si no tiene página aún
                     # Buscar palabras clave del vicio en las páginas
@@ -2092,20 +3022,13 @@ TEXTO:
                         palabras_clave = [tipo.replace("_", " ")]
                     
                     # Buscar en qué página aparecen las palabras clave
-                    for pagina_data in texto_por_pagina:
-                        num_pagina = pagina_data["pagina"]
-                        texto_pagina = pagina_data["texto"].lower()
-                        
+                    for num_pagina, texto_pagina in paginas_lower:
                         for palabra in palabras_clave:
                             if palabra in texto_pagina:
                                 vicio["pagina"] = num_pagina
                                 
                                 # Buscar capítulo en esa página
-                                cap_match = re.search(
-                                    r'(capítulo\s+[ivxlcd\d]+[^\n]*|[\d\.]+\s*[A-ZÁÉÍÓÚ][^\n]{0,50})',
-                                    texto_pagina[:texto_pagina.find(palabra)],
-                                    re.IGNORECASE
-                                )
+                                cap_match = _CAPITULO_EN_PAGINA.search(texto_pagina[:texto_pagina.find(palabra)])
                                 if cap_match:
                                     vicio["capitulo"] = cap_match.group(1).strip()[:100]
                                 
@@ -2123,30 +3046,20 @@ TEXTO:
                         if "pagina" in vicio:
                             break  # Ya encontramos la página
             
-            print(f"📍 Ubicación por página agregada a {sum(1 for v in vicios if 'pagina' in v)} vicios")
-        
-        return vicios
+            logger.info("📍 Ubicación por página agregada a %d vicios", sum(1 for v in vicios if 'pagina' in v))
     
     def _extraer_numero_proceso(self, texto: str) -> str:
         """Extrae el número de proceso del texto"""
-        patrones = [
-            r'(?:LP|PA|CD|AS|SIE)\s*N[°º]?\s*([\d\-]+\s*-\s*\d{4})',
-            r'Procedimiento\s+N[°º]?\s*([\d\-]+)',
-        ]
-        for patron in patrones:
-            match = re.search(patron, texto, re.IGNORECASE)
+        for patron in _NUMERO_PROCESO_PATRONES:
+            match = patron.search(texto)
             if match:
                 return match.group(0)
         return "No identificado"
     
     def _extraer_entidad(self, texto: str) -> str:
         """Extrae el nombre de la entidad del texto"""
-        patrones = [
-            r'(?:ENTIDAD|CONVOCANTE)[:\s]+([A-ZÁÉÍÓÚÑ\s]+)',
-            r'(?:MUNICIPALIDAD|GOBIERNO REGIONAL|MINISTERIO)[^\n]+',
-        ]
-        for patron in patrones:
-            match = re.search(patron, texto[:2000], re.IGNORECASE)
+        for patron in _ENTIDAD_PATRONES:
+            match = patron.search(texto, 0, 2000)
             if match:
                 return match.group(0)[:100]
         return "Entidad no identificada"
@@ -2165,6 +3078,118 @@ TEXTO:
         return "No identificado"
 
 
+# A partir de cuántas páginas se reparte la extracción de un PDF entre procesos
+_PAGINAS_PARA_PARALELO = 200
+
+
+def _armar_resultado_texto(pdf_path: str, paginas: int, metadata: Dict, textos: Tuple[str, ...]) -> Dict:
+    """
+    Resultado de extraer_texto_pdf. Dict nuevo en cada llamada: lo cacheado no
+    se modifica desde fuera
+    """
+    return {
+        "archivo": os.path.basename(pdf_path),
+        "paginas": paginas,
+        "texto_completo": "".join(f"{texto}\n\n" for texto in textos),
+        "texto_por_pagina": [
+            {"pagina": indice + 1, "texto": texto}
+            for indice, texto in enumerate(textos)
+        ],
+        "metadata": dict(metadata) if metadata else metadata
+    }
+
+
+def _tablas_de_documento(doc) -> List[Dict]:
+    """Bloques con aspecto de tabla de un documento abierto (ver extraer_tablas_pdf)"""
+    tablas = []
+    
+    for num_pagina, pagina in enumerate(doc, 1):
+        # Buscar tablas usando análisis de bloques (sin imágenes: el
+        # "dict" por defecto copia los bytes de cada imagen)
+        bloques = pagina.get_text("dict", flags=_FLAGS_DICT_SIN_IMAGENES, sort=False)["blocks"]
+        
+        for bloque in bloques:
+            # Detectar si parece tabla (múltiples columnas alineadas)
+            lineas = bloque.get("lines")
+            if not lineas or len(lineas) <= 2:
+                continue
+            
+            tabla_texto = []
+            for linea in lineas:
+                fila = " | ".join([
+                    span["text"] for span in linea.get("spans", [])
+                ])
+                if fila.strip():
+                    tabla_texto.append(fila)
+            
+            if tabla_texto:
+                tablas.append({
+                    "pagina": num_pagina,
+                    "contenido": tabla_texto
+                })
+    
+    return tablas
+
+
+def _leer_texto_pdf(pdf_path: str, paralelo: bool = False) -> Tuple[int, Dict, Tuple[str, ...]]:
+    """
+    Lee el PDF y devuelve (número de páginas, metadata, texto de cada página).
+    Con paralelo=False no se crean procesos: dentro de un worker de procesar_lote
+    un pool anidado multiplicaría los procesos, y en el servidor haría fork
+    desde los hilos de las peticiones
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        paginas = doc.page_count
+        metadata = doc.metadata
+        # Un proceso por cada _PAGINAS_PARA_PARALELO páginas, sin pasar de los núcleos
+        workers = min(os.cpu_count() or 1, -(-paginas // _PAGINAS_PARA_PARALELO)) if paralelo else 1
+        if workers < 2:
+            return paginas, metadata, _textos_de_paginas(doc, 0, paginas)
+    finally:
+        doc.close()
+    
+    # PDF grande: cada proceso abre su propio documento y extrae un tramo
+    # contiguo de páginas; map devuelve los tramos en orden
+    tamano_tramo = -(-paginas // workers)
+    tramos = [(pdf_path, inicio, min(inicio + tamano_tramo, paginas)) for inicio in range(0, paginas, tamano_tramo)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        textos = tuple(texto for tramo in executor.map(_extraer_tramo_worker, tramos) for texto in tramo)
+    return paginas, metadata, textos
+
+
+def _textos_de_paginas(doc, inicio: int, fin: int) -> Tuple[str, ...]:
+    """Texto de las páginas [inicio, fin) de un documento abierto"""
+    # sort=False: orden nativo del PDF, sin reconstruir el orden de lectura
+    return tuple(doc.load_page(indice).get_text("text", sort=False) for indice in range(inicio, fin))
+
+
+def _extraer_tramo_worker(tramo: Tuple[str, int, int]) -> Tuple[str, ...]:
+    """Worker de _leer_texto_pdf: abre el PDF por su cuenta y extrae un tramo de páginas"""
+    pdf_path, inicio, fin = tramo
+    doc = fitz.open(pdf_path)
+    try:
+        return _textos_de_paginas(doc, inicio, fin)
+    finally:
+        doc.close()
+
+
+@functools.lru_cache(maxsize=32)
+def _leer_texto_pdf_cacheado(ruta: str, mtime_ns: int, tamano: int, paralelo: bool) -> Tuple[int, Dict, Tuple[str, ...]]:
+    """_leer_texto_pdf memorizado; mtime_ns y tamano solo forman parte de la clave"""
+    return _leer_texto_pdf(ruta, paralelo)
+
+
+def _extraer_texto_worker(pdf_path: str) -> Dict:
+    """Worker de procesar_lote (a nivel de módulo para poder enviarse a otro proceso)"""
+    return PDFProcessor().extraer_texto_pdf(pdf_path)
+
+
+def _detectar_vicios_worker(texto: str) -> List[Dict]:
+    """Worker de detectar_vicios_lote (a nivel de módulo para poder enviarse a otro proceso)"""
+    return PDFProcessor()._detectar_vicios_por_reglas(texto)
+
+
 class DocumentAnalyzer:
     """
     Analizador de documentos que combina extracción y análisis inteligente
@@ -0,0 +1,107 @@
+import copy
+
+import fitz
+
+from engine.evaluador_propuestas import EvaluadorPropuestas
+from engine.pdf_processor import PDFProcessor
+
+
+def _crear_pdf(ruta, paginas):
+    doc = fitz.open()
+    for texto in paginas:
+        pagina = doc.new_page()
+        pagina.insert_text((72, 72), texto)
+    doc.save(str(ruta))
+    doc.close()
+
+
+def _propuesta(precio, requisitos_ok=True, rtm_ok=True):
+    return {
+        "etapa1_requisitos_minimos": {
+            "rnp_vigente": {"presentado": requisitos_ok},
+            "habilitacion": {"presentado": False},
+        },
+        "etapa2_rtm": {"especificaciones_tecnicas": {"cumple": rtm_ok}},
+        "etapa3_factores_tecnicos": {"experiencia": {"puntaje_estimado": 40, "max": 50}},
+        "etapa4_economica": {"precio_ofertado": precio},
+    }
+
+
+# =============================================================================
+# PDFProcessor: procesar_lote y detectar_vicios_lote
+# =============================================================================
+
+def test_procesar_lote_conserva_el_orden(tmp_path):
+    rutas = []
+    for i in range(3):
+        ruta = tmp_path / f"documento_{i}.pdf"
+        _crear_pdf(ruta, [f"documento {i} pagina 1", f"documento {i} pagina 2"])
+        rutas.append(str(ruta))
+    rutas.append(str(tmp_path / "no_existe.pdf"))
+
+    procesador = PDFProcessor()
+    resultados = procesador.procesar_lote(rutas, max_workers=2)
+
+    assert len(resultados) == 4
+    for i, resultado in enumerate(resultados[:3]):
+        assert resultado["paginas"] == 2
+        assert f"documento {i} pagina 2" in resultado["texto_completo"]
+        assert resultado == procesador.extraer_texto_pdf(rutas[i])
+    assert "error" in resultados[3]
+
+
+def test_detectar_vicios_lote_igual_que_en_serie():
+    textos = [
+        "No se permite consorcio. La experiencia del postor: S/ 5,000,000.00 en obras similares.",
+        "El profesional con 15 años de experiencia como residente de obra.",
+        "Texto sin requisitos restrictivos",
+    ]
+    procesador = PDFProcessor()
+
+    en_lote = procesador.detectar_vicios_lote(textos, max_workers=2)
+
+    assert en_lote == [procesador._detectar_vicios_por_reglas(texto) for texto in textos]
+    assert en_lote[0]
+
+
+# =============================================================================
+# EvaluadorPropuestas.evaluar_propuestas_batch
+# =============================================================================
+
+def test_pm_solo_de_ofertas_que_llegan_a_la_etapa_economica():
+    evaluador = EvaluadorPropuestas()
+    propuestas = [
+        ("A", _propuesta(95000)),
+        ("B", _propuesta(80000, requisitos_ok=False)),  # Más barata, pero descalificada en etapa 1
+        ("C", _propuesta(85000, rtm_ok=False)),  # Más barata, pero descalificada en etapa 2
+    ]
+
+    resultados = evaluador.evaluar_propuestas_batch(propuestas, 100000)
+
+    assert [r["postor"] for r in resultados] == ["A", "B", "C"]
+    assert resultados[0]["puntaje_economico"] == 100
+    assert resultados[1]["etapa_final"] == 1
+    assert resultados[2]["etapa_final"] == 2
+
+
+def test_puntaje_economico_relativo_al_menor_precio():
+    evaluador = EvaluadorPropuestas()
+    propuestas = [("A", _propuesta(90000)), ("B", _propuesta(100000))]
+
+    resultados = evaluador.evaluar_propuestas_batch(propuestas, 100000)
+
+    assert resultados[0]["puntaje_economico"] == 100
+    assert resultados[1]["puntaje_economico"] == 90.0
+    assert resultados[0]["timestamp"] == resultados[1]["timestamp"]
+
+
+def test_no_modifica_los_datos_del_llamador():
+    evaluador = EvaluadorPropuestas()
+    datos = _propuesta("95,000.00")
+    del datos["etapa3_factores_tecnicos"]
+    original = copy.deepcopy(datos)
+
+    resultados = evaluador.evaluar_propuestas_batch([("A", datos)], 100000)
+
+    assert datos == original
+    assert resultados[0]["etapas"][4]["precio_ofertado"] == 95000.0
@@ -0,0 +1,156 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from engine import pdf_processor
+from engine.gemini_cache import GeminiCache
+from engine.pdf_processor import PDFProcessor, _cierre_primer_objeto_json, _primer_objeto_json
+
+
+class StreamFalso:
+    """Imita el iterador de generate_content_stream y registra lo entregado y el close()"""
+
+    def __init__(self, fragmentos):
+        self.fragmentos = list(fragmentos)
+        self.entregados = 0
+        self.cerrado = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.entregados >= len(self.fragmentos):
+            raise StopIteration
+        fragmento = self.fragmentos[self.entregados]
+        self.entregados += 1
+        return SimpleNamespace(text=fragmento)
+
+    def close(self):
+        self.cerrado = True
+
+
+def _procesador(stream):
+    """PDFProcessor cuyo cliente de Gemini devuelve siempre el mismo stream"""
+    procesador = PDFProcessor()
+    procesador._client = SimpleNamespace(models=SimpleNamespace(
+        generate_content_stream=lambda model, contents: stream
+    ))
+    return procesador
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = GeminiCache(db_path=str(tmp_path / "gemini_cache.db"))
+    monkeypatch.setattr(pdf_processor, "get_gemini_cache", lambda: cache)
+    return cache
+
+
+# =============================================================================
+# Recorrido de llaves
+# =============================================================================
+
+def test_llaves_dentro_de_cadenas_no_cuentan():
+    texto = 'Claro: {"a": "}{", "b": {"c": "\\"}"}} y algo más {"d": 1}'
+    objeto = _primer_objeto_json(texto)
+
+    assert json.loads(objeto) == {"a": "}{", "b": {"c": '"}'}}
+
+
+def test_objeto_cortado_no_cierra():
+    assert _cierre_primer_objeto_json('{"a": {"b": 1}', 0) == -1
+    assert _cierre_primer_objeto_json('{"a": "}"', 0) == -1
+
+
+# =============================================================================
+# _consultar_gemini en streaming
+# =============================================================================
+
+def test_corta_el_stream_al_cerrar_el_objeto_y_lo_cierra(cache):
+    stream = StreamFalso(['Claro: {"a": ', '1} y luego', ' más prosa', ' {"b": 2}'])
+    procesador = _procesador(stream)
+
+    respuesta = procesador._consultar_gemini("prompt")
+
+    assert respuesta == 'Claro: {"a": 1} y luego'
+    assert stream.entregados == 2
+    assert stream.cerrado
+    assert cache.get(procesador.model_name, "prompt") == respuesta
+
+
+def test_respuesta_guardada_no_vuelve_a_llamar(cache):
+    procesador = _procesador(StreamFalso(['{"a": 1}']))
+    procesador._consultar_gemini("prompt")
+
+    otro_stream = StreamFalso(['{"a": 2}'])
+    procesador._client.models.generate_content_stream = lambda model, contents: otro_stream
+
+    assert procesador._consultar_gemini("prompt") == '{"a": 1}'
+    assert otro_stream.entregados == 0
+
+
+def test_objeto_cortado_no_se_guarda(cache):
+    stream = StreamFalso(['{"a": ', '[1, 2'])
+    procesador = _procesador(stream)
+
+    assert procesador._consultar_gemini("prompt") == '{"a": [1, 2'
+    assert stream.cerrado
+    assert cache.get(procesador.model_name, "prompt") is None
+
+
+def test_objeto_no_decodificable_no_se_guarda(cache):
+    procesador = _procesador(StreamFalso(["{bad json here}"]))
+
+    assert procesador._consultar_gemini("prompt") == "{bad json here}"
+    assert cache.get(procesador.model_name, "prompt") is None
+
+
+def test_respuesta_en_prosa_no_se_guarda(cache):
+    procesador = _procesador(StreamFalso(["Sin JSON, ", "solo texto"]))
+
+    assert procesador._consultar_gemini("prompt") == "Sin JSON, solo texto"
+    assert cache.get(procesador.model_name, "prompt") is None
+
+
+# =============================================================================
+# Análisis en lote
+# =============================================================================
+
+def test_enviar_analisis_pendientes(cache):
+    procesador = _procesador(StreamFalso(['{"d1": {"tipo_documento": "bases"}}']))
+    procesador.encolar_analisis("d1", "texto uno", "bases")
+    procesador.encolar_analisis("d2", "texto dos", "vicios")
+
+    resultados = procesador.enviar_analisis_pendientes()
+
+    assert resultados["d1"] == {"tipo_documento": "bases"}
+    assert "error" in resultados["d2"]
+    # La cola queda vacía: un segundo envío no llama a Gemini
+    assert procesador.enviar_analisis_pendientes() == {}
+
+
+def test_analizar_documento_gemini_lote(cache):
+    procesador = _procesador(StreamFalso(['{"bases": {"ok": true}}']))
+
+    resultados = procesador.analizar_documento_gemini_lote("texto", ["bases", "vicios", "bases"])
+
+    assert list(resultados) == ["bases", "vicios"]
+    assert resultados["bases"] == {"ok": True}
+    assert "error" in resultados["vicios"]
+    assert procesador.analizar_documento_gemini_lote("texto", []) == {}
+
+
+def test_analizar_documento_gemini_lote_con_fallo_de_api(cache):
+    procesador = PDFProcessor()
+
+    def falla(model, contents):
+        raise RuntimeError("quota exceeded")
+
+    procesador._client = SimpleNamespace(models=SimpleNamespace(generate_content_stream=falla))
+
+    resultados = procesador.analizar_documento_gemini_lote("texto", ["bases", "vicios"])
+
+    assert resultados == {
+        "bases": {"error": "quota exceeded"},
+        "vicios": {"error": "quota exceeded"},
+    }
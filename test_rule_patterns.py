@@ -0,0 +1,85 @@
+import time
+
+from engine import pdf_processor
+
+# Texto de 200 KB sin puntos, cifras ni "%": las palabras clave de las reglas se
+# repiten pero ninguna regla llega a coincidir, así que cada tramo [^.]{0,300}
+# se recorre hasta su tope desde cada palabra clave (el peor caso del retroceso)
+VOCABULARIO = (
+    "monto facturado acumulado profesional experiencia ratio de liquidez solvencia "
+    "endeudamiento capital social mayor patrimonio neto consorcio prohibido seguro "
+    "póliza pago conformidad ponderación peso técnico económica garantía adelanto "
+    "penalidad equipamiento propio validez de la oferta personal clave rtm capacidad "
+    "puntaje técnico mínimo visita muestra plazo días calendario consultas marca "
+    "modelo tipo subcontratación banco resolución modificación carta fianza "
+)
+TAMANO_PATOLOGICO = 200_000
+PRESUPUESTO_SEGUNDOS = 0.050
+
+
+def _patrones(valor):
+    """Patrones compilados dentro de una tabla de reglas (tuplas, pares o dicts)"""
+    if hasattr(valor, "finditer"):
+        yield valor
+    elif isinstance(valor, (tuple, list)):
+        for elemento in valor:
+            yield from _patrones(elemento)
+    elif isinstance(valor, dict):
+        for elemento in list(valor) + list(valor.values()):
+            yield from _patrones(elemento)
+
+
+def _patrones_de_reglas():
+    vistos = {}
+    for nombre, valor in vars(pdf_processor).items():
+        if nombre.startswith("_VICIO"):
+            for patron in _patrones(valor):
+                vistos.setdefault(id(patron), (nombre, patron))
+    return list(vistos.values())
+
+
+def test_patrones_de_reglas_en_texto_patologico():
+    texto = (VOCABULARIO * (TAMANO_PATOLOGICO // len(VOCABULARIO) + 1))[:TAMANO_PATOLOGICO]
+    patrones = _patrones_de_reglas()
+    assert patrones, "No se encontraron tablas de reglas en pdf_processor"
+
+    lentos = []
+    for nombre, patron in patrones:
+        # El mejor de tres intentos: se mide el patrón, no el ruido de la máquina
+        tiempos = []
+        for _ in range(3):
+            inicio = time.perf_counter()
+            for _ in patron.finditer(texto):
+                pass
+            tiempos.append(time.perf_counter() - inicio)
+        if min(tiempos) > PRESUPUESTO_SEGUNDOS:
+            lentos.append(f"{nombre}: {min(tiempos) * 1000:.1f} ms -> {patron.pattern[:80]}")
+
+    assert not lentos, "Patrones por encima de 50 ms:\n" + "\n".join(lentos)
+
+
+def test_tramo_acotado_a_300_caracteres():
+    # El tope cambia resultados: dos palabras clave a más de 300 caracteres ya no se enlazan
+    patron = pdf_processor._VICIO_EQUIPAMIENTO
+    cerca = "equipamiento " + "x" * 280 + " propio"
+    lejos = "equipamiento " + "x" * 320 + " propio"
+
+    assert patron.search(cerca) is not None
+    assert patron.search(lejos) is None
+
+    # El punto sigue cortando la oración, dentro o fuera del tope
+    assert patron.search("equipamiento disponible. Local propio") is None
+
+
+def test_ponderacion_exige_porcentaje_en_la_oracion():
+    patron = pdf_processor._VICIO_PONDERACION
+
+    assert patron.findall("peso del puntaje técnico 90%") == ["90"]
+    assert patron.findall("peso del puntaje técnico 90 puntos. Económico 10%") == []
+
+
+if __name__ == "__main__":
+    test_patrones_de_reglas_en_texto_patologico()
+    test_tramo_acotado_a_300_caracteres()
+    test_ponderacion_exige_porcentaje_en_la_oracion()
+    print("\n✅ Summary: All rule pattern tests PASSED.")